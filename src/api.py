@@ -0,0 +1,306 @@
+"""Fælles API-Football klient: én connection pool, HTTP/2, keep-alive og token-bucket rate limiting.
+
+Brug:
+    from api import get_client
+    js = get_client().get("/fixtures", {"league": 119, "season": 2023})
+"""
+from __future__ import annotations
+import os, time, threading, importlib.util
+from pathlib import Path
+import httpx
+from dotenv import load_dotenv
+from cache import ResponseCache
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASE = "https://v3.football.api-sports.io"
+RATE_PER_MIN = float(os.getenv("APIFOOTBALL_RATE_PER_MIN", "10"))  # Free plan: 10 kald/min
+MAX_RETRIES = 3
+TIMEOUT = 30.0
+USE_CACHE = os.getenv("APIFOOTBALL_CACHE", "1") != "0"
+
+# API-Football sender både minut- og dagskvote som headers
+H_MIN_LIMIT = "x-ratelimit-limit"
+H_MIN_REMAINING = "x-ratelimit-remaining"
+H_DAY_LIMIT = "x-ratelimit-requests-limit"
+H_DAY_REMAINING = "x-ratelimit-requests-remaining"
+
+
+class RateLimitExhausted(RuntimeError):
+    """Dagskvoten er brugt op – flere kald giver ingen mening før i morgen."""
+
+
+def _header_float(headers, name: str) -> float | None:
+    val = headers.get(name)
+    try:
+        return float(val) if val is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Token-bucket der kalibreres løbende fra API'ets rate-limit headers.
+
+    `reserve()` trækker et token og returnerer hvor længe kalderen skal vente;
+    tokens må gå negative, så samtidige kaldere automatisk stiller sig i kø.
+    Selve ventetiden klares af kalderen (time.sleep eller asyncio.sleep).
+    """
+
+    def __init__(self, rate_per_min: float = RATE_PER_MIN, capacity: float | None = None):
+        self.rate_per_min = float(rate_per_min)
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self.tokens = self.capacity
+        self.day_remaining: float | None = None
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate_per_min / 60.0)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            if self.day_remaining is not None and self.day_remaining <= 0:
+                raise RateLimitExhausted("Dagskvoten (x-ratelimit-requests-remaining) er 0")
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1.0
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens * 60.0 / self.rate_per_min
+
+    def acquire(self) -> float:
+        """Blokerende variant af reserve(); returnerer sovetid i sekunder."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def update_from_headers(self, headers) -> None:
+        """Synkronisér bucket med serverens tal efter hvert svar."""
+        limit = _header_float(headers, H_MIN_LIMIT)
+        remaining = _header_float(headers, H_MIN_REMAINING)
+        day_remaining = _header_float(headers, H_DAY_REMAINING)
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit and limit > 0:
+                self.rate_per_min = limit
+                self.capacity = limit
+            if remaining is not None:
+                # serveren ved bedst – men vi tæller ikke op over det vi selv har reserveret
+                self.tokens = min(self.tokens, remaining)
+            if day_remaining is not None:
+                self.day_remaining = day_remaining
+
+    def set_rate(self, rate_per_min: float, capacity: float | None = None) -> None:
+        """Ændr tempoet undervejs (fx når en dagskvote skal spredes over resten af døgnet)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate_per_min = float(rate_per_min)
+            self.capacity = float(capacity if capacity is not None else rate_per_min)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def penalize(self, seconds: float) -> None:
+        """Efter 429: tøm bucket så næste token tidligst er klar om `seconds`."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 1.0 - seconds * self.rate_per_min / 60.0)
+
+
+def _retry_after(r: httpx.Response, attempt: int, rate_per_min: float) -> float:
+    ra = _header_float(r.headers, "retry-after")
+    return ra if ra is not None else 60.0 / rate_per_min * (attempt + 1)
+
+
+def _decode(r: httpx.Response, path: str, params, cache: ResponseCache | None, entry) -> dict:
+    """Fælles svarhåndtering: 304 fra cache, 429 som errors-dict, ellers JSON (+ gem i cache)."""
+    if r.status_code == 304 and entry is not None:
+        return cache.refresh(entry, path, params)
+    if r.status_code == 429:
+        return {"errors": {"rateLimit": "Too many requests"}}
+    r.raise_for_status()
+    js = r.json()
+    if cache is not None:
+        cache.store(path, params, r.content, js, r.headers)
+    return js
+
+
+def build_headers(api_key: str | None, base_url: str) -> dict:
+    if "rapidapi" in base_url:
+        return {
+            "X-RapidAPI-Key": api_key or "",
+            "X-RapidAPI-Host": "v3.football.api-sports.io",
+            "Accept": "application/json",
+        }
+    return {"x-apisports-key": api_key or "", "Accept": "application/json"}
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class ApiClient:
+    """Persistent httpx.Client med connection pool + fælles TokenBucket."""
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None,
+                 rate_per_min: float = RATE_PER_MIN, timeout: float = TIMEOUT,
+                 max_retries: int = MAX_RETRIES, bucket: TokenBucket | None = None,
+                 cache: ResponseCache | None = None):
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = (base_url or DEFAULT_BASE).rstrip("/")
+        self.max_retries = max_retries
+        self.bucket = bucket or TokenBucket(rate_per_min)
+        self.headers = build_headers(api_key, self.base_url)
+        self.http = httpx.Client(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=timeout,
+            http2=http2_available(),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+        self.n_requests = 0
+        self.wait_s = 0.0   # tid brugt i rate limiter
+        self.http_s = 0.0   # tid brugt på netværk
+        self.bytes_in = 0   # modtagne body-bytes
+
+    def request(self, path: str, params=None, headers=None) -> httpx.Response:
+        """Rå GET med rate limiting og 429-retry; returnerer httpx.Response."""
+        for attempt in range(self.max_retries + 1):
+            self.wait_s += self.bucket.acquire()
+            t0 = time.perf_counter()
+            r = self.http.get(path, params=params, headers=headers)
+            self.http_s += time.perf_counter() - t0
+            self.n_requests += 1
+            self.bytes_in += len(r.content)
+            self.bucket.update_from_headers(r.headers)
+            if r.status_code == 429 and attempt < self.max_retries:
+                wait = _retry_after(r, attempt, self.bucket.rate_per_min)
+                print(f"⏳ 429 rate limit – venter {wait:.1f}s og prøver igen ...")
+                self.bucket.penalize(wait)
+                continue
+            return r
+        return r
+
+    def get(self, path: str, params=None) -> dict:
+        """GET der returnerer JSON (evt. fra cache); 429 efter alle forsøg giver et errors-dict som API'et selv ville."""
+        entry = self.cache.lookup(path, params) if self.cache is not None else None
+        if entry is not None and entry.fresh:
+            return entry.json()
+        r = self.request(path, params, headers=ResponseCache.conditional_headers(entry))
+        return _decode(r, path, params, self.cache, entry)
+
+    def close(self) -> None:
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncApiClient:
+    """Async søster til ApiClient: httpx.AsyncClient, samme TokenBucket og et loft over samtidige kald."""
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None,
+                 rate_per_min: float = RATE_PER_MIN, timeout: float = TIMEOUT,
+                 max_retries: int = MAX_RETRIES, concurrency: int = 4,
+                 bucket: TokenBucket | None = None, cache: ResponseCache | None = None):
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = (base_url or DEFAULT_BASE).rstrip("/")
+        self.max_retries = max_retries
+        self.bucket = bucket or TokenBucket(rate_per_min)
+        self.headers = build_headers(api_key, self.base_url)
+        import asyncio   # kun async-stien betaler for asyncio-importen
+
+        self.sem = asyncio.Semaphore(concurrency)
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=timeout,
+            http2=http2_available(),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency,
+                                keepalive_expiry=60),
+        )
+        self.n_requests = 0
+        self.wait_s = 0.0
+        self.http_s = 0.0
+        self.bytes_in = 0
+
+    async def request(self, path: str, params=None, headers=None) -> httpx.Response:
+        import asyncio
+
+        async with self.sem:
+            for attempt in range(self.max_retries + 1):
+                wait = self.bucket.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.wait_s += wait
+                t0 = time.perf_counter()
+                r = await self.http.get(path, params=params, headers=headers)
+                self.http_s += time.perf_counter() - t0
+                self.n_requests += 1
+                self.bytes_in += len(r.content)
+                self.bucket.update_from_headers(r.headers)
+                if r.status_code == 429 and attempt < self.max_retries:
+                    wait = _retry_after(r, attempt, self.bucket.rate_per_min)
+                    print(f"⏳ 429 rate limit – venter {wait:.1f}s og prøver igen ...")
+                    self.bucket.penalize(wait)
+                    continue
+                return r
+            return r
+
+    async def get(self, path: str, params=None) -> dict:
+        entry = self.cache.lookup(path, params) if self.cache is not None else None
+        if entry is not None and entry.fresh:
+            return entry.json()
+        r = await self.request(path, params, headers=ResponseCache.conditional_headers(entry))
+        return _decode(r, path, params, self.cache, entry)
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def async_client(concurrency: int = 4, use_cache: bool = True) -> AsyncApiClient:
+    """Ny AsyncApiClient med nøgle/base fra .env (skal lukkes af kalderen); use_cache=False til live-polling."""
+    load_dotenv(ROOT / ".env")
+    return AsyncApiClient(
+        api_key=os.getenv("APIFOOTBALL_KEY"),
+        base_url=os.getenv("APIFOOTBALL_BASE", DEFAULT_BASE),
+        concurrency=concurrency,
+        cache=default_cache() if use_cache else None,
+    )
+
+
+_client: ApiClient | None = None
+_cache: ResponseCache | None = None
+_client_lock = threading.Lock()
+
+
+def default_cache() -> ResponseCache | None:
+    """Delt on-disk svarcache (slås fra med APIFOOTBALL_CACHE=0)."""
+    global _cache
+    if USE_CACHE and _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def get_client() -> ApiClient:
+    """Delt klient pr. proces – læser .env første gang den bruges."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            load_dotenv(ROOT / ".env")
+            _client = ApiClient(
+                api_key=os.getenv("APIFOOTBALL_KEY"),
+                base_url=os.getenv("APIFOOTBALL_BASE", DEFAULT_BASE),
+                cache=default_cache(),
+            )
+        return _client
@@ -0,0 +1,325 @@
+"""Backfill af mange ligaer × sæsoner med genoptagelige checkpoints.
+
+Arbejdet deles i enheder (liga, sæson, side). Side 1 afslører antallet af
+sider, og de øvrige sider planlægges derefter. Enhederne køres på en
+begrænset trådpulje med fælles ApiClient/TokenBucket. Hver færdig side
+skrives atomisk til data/raw/backfill/ og logges i et append-only checkpoint
+(data/state/backfill_log.jsonl). Et genstartet job springer derfor præcis de
+enheder over, der allerede er hentet. Når alle sider i en sæson er hentet,
+streames sæsonen ind i fixture-store.
+
+Dagskvoten spredes jævnt over resten af døgnet (nulstilles 00:00 UTC), så et
+langt backfill ikke brænder hele kvoten af i første time. Slå det fra med
+--no-spread.
+
+Manifest (JSON):
+    {"targets": [{"league": 119, "seasons": "2015-2023"},
+                 {"league": 39,  "seasons": [2022, 2023]}]}
+
+Kør:  python src/backfill.py --manifest backfill.json --workers 4
+      python src/backfill.py --league 119 --seasons 2019 2020 2021
+"""
+from __future__ import annotations
+import argparse, json, os, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from api import get_client, TokenBucket, RateLimitExhausted
+from instrument import start_trace, get_tracer, span
+from normalize import normalize_ndjson
+from store import STORE_DIR
+
+ROOT = Path(__file__).resolve().parents[1]
+RAW_DIR = ROOT / "data" / "raw" / "backfill"
+STATE_LOG = ROOT / "data" / "state" / "backfill_log.jsonl"
+DAY_RESERVE = 0.10     # andel af resterende dagskvote der lades ligge til andre jobs
+MIN_RATE = 1.0         # kald/min – spredningen må aldrig gå helt i stå
+
+
+@dataclass(frozen=True)
+class Unit:
+    league: int
+    season: int
+    page: int = 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.league}:{self.season}:{self.page}"
+
+    @property
+    def params(self) -> dict:
+        p = {"league": self.league, "season": self.season}
+        if self.page > 1:   # første kald uden 'page', som i ingest.fetch_fixtures
+            p["page"] = self.page
+        return p
+
+
+def parse_seasons(spec) -> list[int]:
+    """[2021, 2022] | "2015-2023" | 2023 → liste af sæsoner."""
+    if isinstance(spec, int):
+        return [spec]
+    if isinstance(spec, str):
+        lo, _, hi = spec.partition("-")
+        return list(range(int(lo), int(hi or lo) + 1))
+    return [int(s) for s in spec]
+
+
+def load_manifest(path: Path) -> list[tuple[int, int]]:
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    targets = []
+    for t in doc["targets"]:
+        targets += [(int(t["league"]), s) for s in parse_seasons(t["seasons"])]
+    return list(dict.fromkeys(targets))   # dubletter væk, rækkefølgen bevaret
+
+
+class Checkpoint:
+    """Append-only log over færdige enheder og sæsoner; genafspilles ved opstart."""
+
+    def __init__(self, path: Path = STATE_LOG):
+        self.path = path
+        self.units: dict[str, dict] = {}
+        self.stored: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+        if path.exists():
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:   # halvskrevet sidste linje efter et nedbrud
+                        continue
+                    self._apply(rec)
+
+    def _apply(self, rec: dict) -> None:
+        if rec["kind"] == "unit":
+            self.units[rec["key"]] = rec
+        elif rec["kind"] == "stored":
+            self.stored.add((rec["league"], rec["season"]))
+
+    def _append(self, rec: dict) -> None:
+        rec["at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(rec)
+
+    def mark_unit(self, unit: Unit, status: str, n: int = 0, total: int = 1) -> None:
+        self._append({"kind": "unit", "key": unit.key, "status": status, "n": n, "total": total})
+
+    def mark_stored(self, league: int, season: int, rows: int) -> None:
+        self._append({"kind": "stored", "league": league, "season": season, "rows": rows})
+
+    def unit(self, unit: Unit) -> dict | None:
+        return self.units.get(unit.key)
+
+    def pages(self, league: int, season: int) -> int | None:
+        """Antal sider ifølge side 1 (None hvis side 1 ikke er hentet endnu)."""
+        first = self.units.get(Unit(league, season).key)
+        return first["total"] if first and first["status"] == "done" else None
+
+
+def seconds_until_reset(now: datetime | None = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+class QuotaPacer:
+    """Ekstra token-bucket der spreder dagens resterende kvote frem til nulstilling.
+
+    Dagskvoten læses fra klientens bucket (x-ratelimit-requests-remaining); indtil
+    første svar er kommet, eller hvis API'et ikke sender den, bruges `daily_quota`.
+    """
+
+    def __init__(self, client, daily_quota: int | None = None, reserve: float = DAY_RESERVE,
+                 spread: bool = True):
+        self.client = client
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self.spread = spread
+        self.bucket = TokenBucket(self.rate())
+
+    def budget(self) -> float | None:
+        remaining = self.client.bucket.day_remaining
+        if remaining is None:
+            remaining = self.daily_quota
+        return None if remaining is None else remaining * (1.0 - self.reserve)
+
+    def rate(self) -> float:
+        plan = self.client.bucket.rate_per_min
+        budget = self.budget()
+        if not self.spread or budget is None:
+            return plan
+        if budget < 1:
+            raise RateLimitExhausted(f"Dagskvoten er nede på reserven ({self.reserve:.0%}) – fortsæt efter 00:00 UTC")
+        return max(MIN_RATE, min(plan, budget / (seconds_until_reset() / 60.0)))
+
+    def acquire(self) -> float:
+        rate = self.rate()
+        self.bucket.set_rate(rate, capacity=min(rate, 10.0))
+        return self.bucket.acquire()
+
+
+class Backfill:
+    def __init__(self, targets, client=None, workers: int = 4, checkpoint: Checkpoint | None = None,
+                 pacer: QuotaPacer | None = None, raw_dir: Path = RAW_DIR, store_dir: Path = STORE_DIR):
+        self.targets = list(targets)
+        self.client = client or get_client()
+        self.workers = workers
+        self.ckpt = checkpoint or Checkpoint()
+        self.pacer = pacer or QuotaPacer(self.client)
+        self.raw_dir = raw_dir
+        self.store_dir = store_dir
+        self.stats = {"fetched": 0, "skipped": 0, "blocked": 0, "failed": 0, "seasons_stored": 0}
+
+    # ---------- én enhed (kører i worker-tråd) ----------
+    def page_path(self, unit: Unit) -> Path:
+        return self.raw_dir / f"{unit.league}_{unit.season}" / f"page_{unit.page:03d}.ndjson"
+
+    def fetch(self, unit: Unit) -> tuple[str, int, int, object]:
+        self.pacer.acquire()
+        js = self.client.get("/fixtures", unit.params)
+        errors = js.get("errors")
+        if errors:
+            status = "blocked" if isinstance(errors, dict) and "plan" in errors else "failed"
+            return status, 0, 1, errors
+        items = js.get("response", [])
+        total = int((js.get("paging") or {}).get("total", 1) or 1)
+        path = self.page_path(unit)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        tmp.replace(path)   # siden findes kun hvis den er skrevet helt
+        return "done", len(items), total, None
+
+    # ---------- planlægning ----------
+    def pending_units(self, league: int, season: int) -> list[Unit]:
+        total = self.ckpt.pages(league, season)
+        if total is None:
+            first = self.ckpt.unit(Unit(league, season))
+            return [] if first and first["status"] == "blocked" else [Unit(league, season)]
+        return [u for u in (Unit(league, season, p) for p in range(2, total + 1))
+                if (self.ckpt.unit(u) or {}).get("status") != "done"]
+
+    def season_complete(self, league: int, season: int) -> bool:
+        total = self.ckpt.pages(league, season)
+        return total is not None and all(
+            (self.ckpt.unit(Unit(league, season, p)) or {}).get("status") == "done"
+            for p in range(1, total + 1))
+
+    def store_season(self, league: int, season: int) -> int:
+        """Saml sæsonens sider til én NDJSON og stream den ind i fixture-store."""
+        total = self.ckpt.pages(league, season)
+        raw = self.raw_dir / f"fixtures_{league}_{season}.ndjson"
+        with span("store_season", league=league, season=season) as sp:
+            with raw.open("wb") as out:
+                for p in range(1, total + 1):
+                    out.write(self.page_path(Unit(league, season, p)).read_bytes())
+            rows = normalize_ndjson(raw, self.store_dir) if raw.stat().st_size else 0
+            sp.update(rows=rows, bytes=raw.stat().st_size)
+        self.ckpt.mark_stored(league, season, rows)
+        self.stats["seasons_stored"] += 1
+        return rows
+
+    def run(self) -> dict:
+        queue: deque[Unit] = deque()
+        for league, season in self.targets:
+            if (league, season) in self.ckpt.stored:
+                self.stats["skipped"] += 1
+                continue
+            if self.season_complete(league, season):   # hentet før nedbruddet, men ikke gemt
+                self.store_season(league, season)
+                continue
+            queue.extend(self.pending_units(league, season))
+
+        print(f"🗂️ {len(self.targets)} liga/sæsoner, {self.stats['skipped']} allerede færdige, "
+              f"{len(queue)} enheder i kø (workers={self.workers})")
+        running = {}
+        stop = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            try:
+                while queue or running:
+                    while queue and len(running) < self.workers and stop is None:
+                        unit = queue.popleft()
+                        running[pool.submit(self.fetch, unit)] = unit
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        unit = running.pop(fut)
+                        try:
+                            status, n, total, err = fut.result()
+                        except RateLimitExhausted as e:
+                            stop = stop or e
+                            continue
+                        except Exception as e:   # netværk o.l.: enheden prøves igen ved næste kørsel
+                            status, n, total, err = "failed", 0, 1, repr(e)
+                        self._completed(unit, status, n, total, err, queue)
+            except KeyboardInterrupt:
+                stop = "afbrudt"
+                for fut in running:
+                    fut.cancel()
+        if stop is not None:
+            print(f"⏸️ Stoppet ({stop}). Kør igen for at fortsætte – checkpoint: {self.ckpt.path}")
+        return self.stats
+
+    def _completed(self, unit: Unit, status: str, n: int, total: int, err, queue: deque) -> None:
+        if status == "failed":
+            self.stats["failed"] += 1
+            print(f"⚠️ {unit.key}: {err} – prøves igen ved næste kørsel")
+            return
+        self.ckpt.mark_unit(unit, status, n, total)
+        if status == "blocked":
+            self.stats["blocked"] += 1
+            print(f"🔒 Liga {unit.league} sæson {unit.season}: ingen adgang på planen – springes over")
+            return
+        self.stats["fetched"] += 1
+        if unit.page == 1 and total > 1:
+            queue.extend(Unit(unit.league, unit.season, p) for p in range(2, total + 1)
+                         if (self.ckpt.unit(Unit(unit.league, unit.season, p)) or {}).get("status") != "done")
+        if self.season_complete(unit.league, unit.season):
+            rows = self.store_season(unit.league, unit.season)
+            print(f"💾 Liga {unit.league} sæson {unit.season}: {rows} rækker i store")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill af mange ligaer × sæsoner (genoptagelig)")
+    parser.add_argument("--manifest", type=Path, help="JSON med {'targets': [{'league': id, 'seasons': ...}]}")
+    parser.add_argument("--league", type=int, nargs="+", help="liga-id'er (alternativ til manifest)")
+    parser.add_argument("--seasons", nargs="+", default=["2021-2023"], help="fx 2019 2020 eller 2015-2023")
+    parser.add_argument("--workers", type=int, default=4, help="max samtidige kald")
+    parser.add_argument("--daily-quota", type=int, help="dagskvote hvis API'et ikke oplyser den (Free: 100)")
+    parser.add_argument("--reserve", type=float, default=DAY_RESERVE, help="andel af dagskvoten der lades ligge")
+    parser.add_argument("--no-spread", action="store_true", help="kør så hurtigt minutkvoten tillader")
+    parser.add_argument("--state", type=Path, default=STATE_LOG, help="checkpoint-fil")
+    args = parser.parse_args()
+
+    if args.manifest:
+        targets = load_manifest(args.manifest)
+    elif args.league:
+        seasons = [s for spec in args.seasons for s in parse_seasons(spec)]
+        targets = [(lg, s) for lg in args.league for s in seasons]
+    else:
+        parser.error("angiv --manifest eller --league")
+
+    tr = start_trace("backfill")
+    client = get_client()
+    get_tracer().watch_client(client)
+    pacer = QuotaPacer(client, args.daily_quota, args.reserve, spread=not args.no_spread)
+    job = Backfill(targets, client, args.workers, Checkpoint(args.state), pacer)
+    t0 = time.perf_counter()
+    stats = job.run()
+    print(f"✅ {stats} på {time.perf_counter() - t0:.1f}s ({client.n_requests} kald)")
+    if client.cache is not None:
+        print(client.cache.summary())
+    print("🧭 Trace:", tr.save())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Walk-forward backtest: runde for runde i datoorden, med cachet feature-matrix og varm-startede refits.
+
+client.py evaluerer med én TimeSeriesSplit (5 folds) over hele perioden. Her
+simuleres i stedet driften: før hver runde (liga, sæson, runde) trænes modellen
+på alle kampe spillet før rundens første kamp, og rundens kampe scores.
+
+* Feature-matricen bygges én gang med train.build_matrix. Features er pre-match
+  (shift=True, ratings fra tidligere spilledage), så et rækkeudsnit af den fulde
+  matrix er præcis det en kørsel "dengang" ville have set. Matricen caches på
+  disk under data/cache/backtest/ (nøgle = hash af kampdata + feature-sæt) og
+  åbnes som memmap ved næste kørsel.
+* Træningssættet er altid et præfiks af de datosorterede rækker, så et skridt
+  tilføjer kun rundens nye kampe. LogisticRegression varmstartes fra forrige
+  skridts koefficienter (warm_start=True), hvilket typisk kræver en håndfuld
+  L-BFGS-iterationer i stedet for en fuld løsning. --refit-every k genbruger
+  modellen i k runder mellem refits.
+* Output: tabel pr. runde (Brier, LogLoss, gns. p mod faktisk andel, rullende
+  gennemsnit over --rolling runder) og reliability-tabel pr. sæson (p-bins,
+  ECE). Begge gemmes i data/reports/backtest_<kandidat>.json, og
+  sandsynlighederne pr. kamp i data/parquet/backtest_<kandidat>.parquet.
+
+Kør:  python src/backtest.py [--league 119] [--seasons 2021 2022 2023] [--eval-from 2022]
+                             [--candidate logreg_C1_w5 ...] [--refit-every 1] [--cold]
+"""
+from __future__ import annotations
+import argparse, hashlib, json, os, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from train import BASELINE, Candidate, build_matrix, default_grid, make_model, prepare
+from instrument import start_trace, span, profiled
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "cache" / "backtest"
+REPORTS_DIR = ROOT / "data" / "reports"
+PARQ_DIR = ROOT / "data" / "parquet"
+CACHE_VERSION = 1
+MIN_TRAIN = 150          # ingen forudsigelser før der er så mange træningskampe
+EPS = 1e-15              # som sklearn.metrics.log_loss
+KEY_COLUMNS = ["fixture_id", "date", "home", "away", "home_goals", "away_goals"]
+
+
+# ---------- runder ----------
+def date_ns(dates: pd.Series) -> np.ndarray:
+    return dates.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+
+def round_steps(df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    """(skridt-tabel i kronologisk orden, skridt-nr. pr. kamp).
+
+    Et skridt er en runde (league_id, season, round). Uden round-kolonne bruges
+    kalenderuger, der starter tirsdag, så en fredag–mandag-runde holdes samlet.
+    """
+    if "round" in df.columns and df["round"].notna().all():
+        label = df["round"].astype(str)
+    else:
+        week = (df["date"] - pd.Timedelta(days=1)).dt.tz_localize(None).dt.to_period("W-MON")
+        label = "uge " + week.dt.start_time.dt.strftime("%Y-%m-%d")
+    keys = pd.DataFrame({"league_id": df["league_id"].to_numpy(), "season": df["season"].to_numpy(),
+                         "round": label.to_numpy(), "t": date_ns(df["date"])})
+    steps = (keys.groupby(["league_id", "season", "round"], sort=False)["t"]
+             .agg(start_ns="min", n="size").reset_index()
+             .sort_values(["start_ns", "league_id"], kind="stable").reset_index(drop=True))
+    steps["start"] = pd.to_datetime(steps["start_ns"], utc=True)
+    step_of = keys.merge(steps[["league_id", "season", "round"]].reset_index(),
+                         on=["league_id", "season", "round"], how="left")["index"].to_numpy()
+    return steps, step_of
+
+
+# ---------- feature-cache ----------
+def matrix_key(df: pd.DataFrame, candidates) -> str:
+    h = hashlib.sha1(pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False).to_numpy().tobytes())
+    spec = {"v": CACHE_VERSION,
+            "windows": sorted({w for c in candidates for w in c.windows}),
+            "spans": sorted({s for c in candidates for s in c.ewm_spans}),
+            "ratings": sorted({k for c in candidates for k in c.ratings})}
+    h.update(json.dumps(spec, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def cached_matrix(df: pd.DataFrame, candidates, tm=None, cache_dir: Path | None = CACHE_DIR):
+    """train.build_matrix, men gemt som .npy og memory-mappet ved genbrug (cache_dir=None: ingen cache)."""
+    if cache_dir is None:
+        return build_matrix(df, candidates, tm)
+    key = matrix_key(df, candidates)
+    path, meta = cache_dir / f"X_{key}.npy", cache_dir / f"X_{key}.json"
+    if path.exists() and meta.exists():
+        with span("matrix_cache", hit=True):
+            return np.load(path, mmap_mode="r"), json.loads(meta.read_text(encoding="utf-8"))
+    X, cols = build_matrix(df, candidates, tm)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, X)
+    tmp.replace(path)
+    meta.write_text(json.dumps(cols), encoding="utf-8")
+    return X, cols
+
+
+# ---------- walk-forward ----------
+def walk_forward(X, cols: list[str], y: np.ndarray, dates: np.ndarray, steps: pd.DataFrame, step_of: np.ndarray,
+                 cand: Candidate, refit_every: int = 1, warm: bool = True, min_train: int = MIN_TRAIN,
+                 eval_mask: np.ndarray | None = None) -> tuple[np.ndarray, pd.DataFrame]:
+    """Sandsynligheder pr. kamp (NaN hvis ikke evalueret) + log pr. skridt.
+
+    dates skal være sorteret stigende (int64 ns); træningssættet for et skridt er
+    rækkerne med dato < rundens første kamp.
+    """
+    Xc = np.ascontiguousarray(prepare(np.asarray(X[:, [cols.index(f) for f in cand.features]]), cand.kind))
+    order = np.argsort(step_of, kind="stable")
+    bounds = np.searchsorted(step_of[order], np.arange(len(steps) + 1))
+    n_train = np.searchsorted(dates, steps["start_ns"].to_numpy())
+    warm = warm and cand.kind == "logreg"
+    params = {**cand.params, "warm_start": True} if warm else cand.params
+
+    p = np.full(len(y), np.nan)
+    log, mdl, since, fitted_k = [], None, refit_every, -1
+    for s in range(len(steps)):
+        idx = order[bounds[s]:bounds[s + 1]]
+        k = int(n_train[s])
+        if k < min_train or (eval_mask is not None and not eval_mask[idx].any()):
+            continue
+        # ingen nye kampe siden sidste fit (fx flere ligaers runder samme weekend) → samme model
+        refit = mdl is None or (since >= refit_every and k > fitted_k)
+        fit_ms, n_iter = 0.0, 0
+        if refit:
+            if mdl is None or not warm:
+                mdl = make_model(cand.kind, params)
+            t0 = time.perf_counter()
+            mdl.fit(Xc[:k], y[:k])      # varm start: coef_ fra forrige skridt er startpunktet
+            fit_ms = (time.perf_counter() - t0) * 1000
+            n_iter = int(np.max(getattr(mdl, "n_iter_", [0])))
+            since, fitted_k = 0, k
+        since += 1
+        p[idx] = mdl.predict_proba(Xc[idx])[:, 1]
+        log.append({"step": s, "train_rows": k, "refit": refit, "fit_ms": fit_ms, "n_iter": n_iter})
+    return p, pd.DataFrame(log, columns=["step", "train_rows", "refit", "fit_ms", "n_iter"])
+
+
+# ---------- metrikker ----------
+def _pointwise(y: np.ndarray, p: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    pc = np.clip(p, EPS, 1 - EPS)
+    return (p - y) ** 2, -(y * np.log(pc) + (1 - y) * np.log(1 - pc))
+
+
+def round_table(steps: pd.DataFrame, step_of: np.ndarray, y: np.ndarray, p: np.ndarray,
+                log: pd.DataFrame, rolling: int = 10) -> pd.DataFrame:
+    """Brier/LogLoss/kalibrering pr. evalueret runde + rullende (kampvægtede) gennemsnit."""
+    ok = ~np.isnan(p)
+    sq, ll = _pointwise(y[ok], p[ok])
+    s = step_of[ok]
+    agg = pd.DataFrame({"step": s, "sq": sq, "ll": ll, "p": p[ok], "y": y[ok]}).groupby("step")
+    sums = agg.sum()
+    sums["n"] = agg.size()
+    out = steps.loc[sums.index, ["league_id", "season", "round", "start"]].copy()
+    out["n"] = sums["n"].to_numpy()
+    n_roll = sums["n"].rolling(rolling, min_periods=1).sum()
+    roll = lambda col: (sums[col].rolling(rolling, min_periods=1).sum() / n_roll).to_numpy()
+    for name, col in (("brier", "sq"), ("logloss", "ll"), ("mean_p", "p"), ("home_rate", "y")):
+        out[name] = (sums[col] / sums["n"]).to_numpy()
+    out["cal_gap"] = out["mean_p"] - out["home_rate"]          # >0: modellen overvurderer hjemmesejre
+    out["brier_roll"], out["logloss_roll"] = roll("sq"), roll("ll")
+    out["cal_gap_roll"] = roll("p") - roll("y")
+    out = out.join(log.set_index("step")[["train_rows", "refit", "fit_ms", "n_iter"]])
+    return out.reset_index(names="step")
+
+
+def reliability_table(y: np.ndarray, p: np.ndarray, season: np.ndarray, bins: int = 10) -> pd.DataFrame:
+    """Reliability-diagram som tabel: pr. sæson og p-bin antal, gns. p og faktisk andel."""
+    ok = ~np.isnan(p)
+    b = np.minimum((p[ok] * bins).astype(int), bins - 1)
+    t = (pd.DataFrame({"season": season[ok], "bin": b, "p": p[ok], "y": y[ok]})
+         .groupby(["season", "bin"]).agg(n=("y", "size"), mean_p=("p", "mean"), home_rate=("y", "mean"))
+         .reset_index())
+    t["lo"], t["hi"] = t["bin"] / bins, (t["bin"] + 1) / bins
+    return t[["season", "lo", "hi", "n", "mean_p", "home_rate"]]
+
+
+def season_summary(y: np.ndarray, p: np.ndarray, season: np.ndarray, rel: pd.DataFrame) -> pd.DataFrame:
+    ok = ~np.isnan(p)
+    sq, ll = _pointwise(y[ok], p[ok])
+    t = (pd.DataFrame({"season": season[ok], "brier": sq, "logloss": ll, "mean_p": p[ok], "home_rate": y[ok]})
+         .groupby("season").agg(n=("brier", "size"), brier=("brier", "mean"), logloss=("logloss", "mean"),
+                                mean_p=("mean_p", "mean"), home_rate=("home_rate", "mean")))
+    gap = (rel["mean_p"] - rel["home_rate"]).abs() * rel["n"]
+    t["ece"] = gap.groupby(rel["season"]).sum() / rel.groupby("season")["n"].sum()
+    return t.reset_index()
+
+
+# ---------- kørsel ----------
+def load_data(league_id=None, seasons=None) -> tuple[pd.DataFrame, object]:
+    """Afsluttede kampe fra den memory-mappede kamptabel + runde-navne fra fixture-store."""
+    from matchtable import load_match_table
+    from store import read_fixtures
+
+    with span("match_table") as sp:
+        mt = load_match_table(status="FT").select(league_id=league_id, seasons=seasons)
+        df, tm = mt.frame(), mt.team_matches()
+        sp.update(rows=len(df), bytes=mt.nbytes)
+    rounds = read_fixtures(["fixture_id", "round"], league_id=league_id, seasons=seasons, status="FT")
+    df["round"] = df["fixture_id"].map(rounds.set_index("fixture_id")["round"])
+    return df, tm
+
+
+def backtest(df: pd.DataFrame, candidates, tm=None, eval_from=None, refit_every: int = 1, warm: bool = True,
+             min_train: int = MIN_TRAIN, rolling: int = 10, bins: int = 10,
+             cache_dir: Path | None = CACHE_DIR) -> dict:
+    """Walk-forward for hver kandidat på samme (cachede) matrix; returnerer {navn: resultater}."""
+    y = (df["home_goals"] > df["away_goals"]).astype(int).to_numpy()
+    dates = date_ns(df["date"])
+    if np.any(np.diff(dates) < 0):
+        raise ValueError("df skal være sorteret på dato (som matchtable.frame())")
+    season = df["season"].to_numpy()
+    eval_mask = season >= eval_from if eval_from is not None else None
+    X, cols = cached_matrix(df, candidates, tm, cache_dir)
+    with span("steps"):
+        steps, step_of = round_steps(df)
+
+    results = {}
+    for cand in candidates:
+        with span("walk_forward", candidate=cand.name, steps=len(steps)) as sp:
+            t0 = time.perf_counter()
+            p, log = walk_forward(X, cols, y, dates, steps, step_of, cand, refit_every, warm, min_train, eval_mask)
+            sp.update(fits=int(log["refit"].sum()) if len(log) else 0)
+        rounds = round_table(steps, step_of, y, p, log, rolling)
+        rel = reliability_table(y, p, season, bins)
+        results[cand.name] = {"p": p, "rounds": rounds, "reliability": rel,
+                              "seasons": season_summary(y, p, season, rel), "log": log,
+                              "seconds": time.perf_counter() - t0}
+    return results
+
+
+def save_results(name: str, df: pd.DataFrame, res: dict, config: dict,
+                 reports_dir: Path = REPORTS_DIR, parq_dir: Path = PARQ_DIR) -> tuple[Path, Path]:
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    parq_dir.mkdir(parents=True, exist_ok=True)
+    records = lambda t: json.loads(t.to_json(orient="records", date_format="iso"))
+    report = {"candidate": name, "config": config, "seconds": round(res["seconds"], 3),
+              "seasons": records(res["seasons"]), "rounds": records(res["rounds"]),
+              "reliability": records(res["reliability"])}
+    rep = reports_dir / f"backtest_{name}.json"
+    rep.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    out = df[["fixture_id", "date", "league_id", "season", "round", "home", "away",
+              "home_goals", "away_goals"]].copy()
+    out["p_home_win"] = res["p"]
+    pq = parq_dir / f"backtest_{name}.parquet"
+    out[out["p_home_win"].notna()].to_parquet(pq, index=False)
+    return rep, pq
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest runde for runde")
+    parser.add_argument("--league", type=int, nargs="+", help="liga-id'er (default: alle i fixture-store)")
+    parser.add_argument("--seasons", type=int, nargs="+", help="sæsoner (default: alle)")
+    parser.add_argument("--eval-from", type=int, help="første sæson der scores (default: anden sæson)")
+    parser.add_argument("--candidate", nargs="+", default=[BASELINE.name],
+                        help="kandidatnavne fra train.default_grid (fx logreg_C0.1_w5-elo)")
+    parser.add_argument("--refit-every", type=int, default=1, help="refit hver k'te runde (1 = hver runde)")
+    parser.add_argument("--cold", action="store_true", help="ingen varm start (fuld refit fra nul)")
+    parser.add_argument("--min-train", type=int, default=MIN_TRAIN)
+    parser.add_argument("--rolling", type=int, default=10, help="runder i det rullende gennemsnit")
+    parser.add_argument("--bins", type=int, default=10, help="p-bins i reliability-tabellen")
+    parser.add_argument("--no-cache", action="store_true", help="byg feature-matricen forfra")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=os.getenv("APIFOOTBALL_PROFILE"),
+                        help="profilér hele kørslen (rapport i data/reports)")
+    args = parser.parse_args()
+
+    tr = start_trace("backtest")
+    with profiled(args.profile, "backtest"):
+        run(args)
+    print(tr.summary())
+    print("🧭 Trace:", tr.save())
+
+
+def run(args):
+    grid = {c.name: c for c in [BASELINE, *default_grid(with_hgb=True)]}
+    unknown = [n for n in args.candidate if n not in grid]
+    if unknown:
+        raise SystemExit(f"Ukendt kandidat: {', '.join(unknown)} (vælg blandt {', '.join(grid)})")
+    candidates = [grid[n] for n in args.candidate]
+
+    df, tm = load_data(args.league, args.seasons)
+    if df.empty:
+        raise SystemExit("Ingen FT-kampe i fixture-store for det valg – kør ingest.py først")
+    seasons = sorted(df["season"].unique())
+    eval_from = args.eval_from or (seasons[1] if len(seasons) > 1 else seasons[0])
+    print(f"📚 {len(df)} kampe, sæsoner {seasons[0]}–{seasons[-1]}; scorer fra {eval_from}")
+
+    results = backtest(df, candidates, tm, eval_from, args.refit_every, not args.cold, args.min_train,
+                       args.rolling, args.bins, None if args.no_cache else CACHE_DIR)
+    config = {"league": args.league, "seasons": [int(s) for s in seasons], "eval_from": int(eval_from),
+              "refit_every": args.refit_every, "warm": not args.cold, "min_train": args.min_train}
+    fmt = lambda v: f"{v:.4f}"
+    for name, res in results.items():
+        log = res["log"]
+        print(f"\n=== {name} ===")
+        print(f"⏱️ {len(log)} runder, {int(log['refit'].sum())} refits ({log['n_iter'].sum()} iterationer) "
+              f"på {res['seconds']:.2f}s")
+        print(res["seasons"].to_string(index=False, float_format=fmt))
+        cols = ["season", "round", "n", "brier", "logloss", "mean_p", "home_rate", "brier_roll", "cal_gap_roll"]
+        print("\nSeneste runder:")
+        print(res["rounds"][cols].tail(8).to_string(index=False, float_format=fmt))
+        rep, pq = save_results(name, df, res, config)
+        print("Rapport:", rep)
+        print("Gemte:", pq)
+
+
+if __name__ == "__main__":
+    main()
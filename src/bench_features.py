@@ -0,0 +1,96 @@
+"""Benchmark: features.rolling_features vs. den gamle groupby().rolling() + merge-kæde.
+
+Kør:  python src/bench_features.py [--leagues 50] [--seasons 20] [--teams 14]
+"""
+from __future__ import annotations
+import argparse, time
+import numpy as np
+import pandas as pd
+from features import rolling_features
+
+def synthetic_fixtures(n_leagues=50, n_seasons=20, n_teams=14, seed=0) -> pd.DataFrame:
+    """Dobbelt round-robin pr. liga/sæson, én runde pr. uge, Poisson-mål."""
+    rng = np.random.default_rng(seed)
+    teams = np.arange(n_teams)
+    # cirkelmetoden: (n_teams-1) runder med n_teams/2 kampe, spejlet til anden halvdel
+    rounds = []
+    rot = list(teams[1:])
+    for _ in range(n_teams - 1):
+        lineup = [teams[0]] + rot
+        rounds.append([(lineup[i], lineup[-1 - i]) for i in range(n_teams // 2)])
+        rot = rot[-1:] + rot[:-1]
+    rounds += [[(a, h) for h, a in r] for r in rounds]
+    pairs = np.array(rounds)                     # (rounds, matches, 2)
+    n_rounds, n_match = pairs.shape[:2]
+
+    frames = []
+    for lg in range(n_leagues):
+        for s in range(n_seasons):
+            start = np.datetime64(f"{2000 + s}-07-15")
+            dates = start + np.repeat(np.arange(n_rounds) * 7, n_match).astype("timedelta64[D]")
+            h = pairs[:, :, 0].ravel()
+            a = pairs[:, :, 1].ravel()
+            frames.append(pd.DataFrame({
+                "fixture_id": (lg * 100 + s) * 10_000 + np.arange(len(h)),
+                "date": pd.to_datetime(dates).tz_localize("UTC") + pd.Timedelta(hours=18),
+                "league_id": lg,
+                "season": 2000 + s,
+                "round": np.repeat([f"Regular Season - {r + 1}" for r in range(n_rounds)], n_match),
+                "home": [f"L{lg}T{t}" for t in h],
+                "away": [f"L{lg}T{t}" for t in a],
+                "home_goals": rng.poisson(1.5, len(h)),
+                "away_goals": rng.poisson(1.1, len(h)),
+                "status": "FT",
+            }))
+    return pd.concat(frames, ignore_index=True).sort_values("date", kind="stable").reset_index(drop=True)
+
+def pandas_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Den oprindelige client.py-kæde: long format, 4× groupby().rolling(5), 2× merge."""
+    cols = ["date","season","round","home","away","home_goals","away_goals"]
+    home = df[cols].rename(columns={"home":"team","away":"opp","home_goals":"gf","away_goals":"ga"})
+    home["is_home"] = 1
+    away = df[cols].rename(columns={"away":"team","home":"opp","away_goals":"gf","home_goals":"ga"})
+    away["is_home"] = 0
+    lf = pd.concat([home, away], ignore_index=True)
+    lf["pts"] = np.select([lf["gf"]>lf["ga"], lf["gf"]==lf["ga"]], [3,1], default=0)
+    lf = lf.sort_values(["team","date"])
+    lf["form5"] = lf.groupby("team")["pts"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
+    lf["gd5"]   = (lf["gf"]-lf["ga"]).groupby(lf["team"]).rolling(5, min_periods=1).sum().reset_index(level=0, drop=True)
+    lf["gf5"]   = lf.groupby("team")["gf"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
+    lf["ga5"]   = lf.groupby("team")["ga"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
+    fh = lf[lf["is_home"]==1][["date","team","form5","gd5","gf5","ga5"]].rename(columns={"team":"home"})
+    fa = lf[lf["is_home"]==0][["date","team","form5","gd5","gf5","ga5"]].rename(columns={"team":"away"})
+    return df.merge(fh, on=["date","home"], how="left").merge(fa, on=["date","away"], how="left", suffixes=("","_away"))
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark af rullende form-features")
+    parser.add_argument("--leagues", type=int, default=50)
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_fixtures(args.leagues, args.seasons, args.teams)
+    print(f"📊 {len(df):,} fixtures ({args.leagues} ligaer × {args.seasons} sæsoner × {args.teams} hold)")
+
+    t_old, ref = timed(lambda: pandas_reference(df), args.repeat)
+    t_new, new = timed(lambda: rolling_features(df, windows=(5,)), args.repeat)
+    cols = ["form5","gd5","gf5","ga5","form5_away","gd5_away","gf5_away","ga5_away"]
+    same = np.allclose(ref[cols].to_numpy(), new[cols].to_numpy(), equal_nan=True)
+    print(f"groupby().rolling() + merge : {t_old*1000:8.1f} ms")
+    print(f"features.rolling_features   : {t_new*1000:8.1f} ms   ({t_old/t_new:.1f}× hurtigere)")
+    print(f"identiske værdier           : {'✅' if same else '❌'}")
+
+    t_multi, _ = timed(lambda: rolling_features(df, windows=(3, 5, 10), ewm_spans=(5,)), args.repeat)
+    print(f"3/5/10 + EWMA(5), 32 kolonner: {t_multi*1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
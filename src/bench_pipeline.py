@@ -0,0 +1,197 @@
+"""End-to-end benchmark mod mockapi.py: ingest → normalize → features → train.
+
+Starter mock-serveren i en baggrundstråd, peger klienten på den (cache slået fra)
+og kører hele pipelinen i en midlertidig mappe. Rapporterer kald/s, wall/CPU-tid
+pr. trin og peak RSS, og sammenligner med en tidligere kørsel (--baseline).
+
+Kør:  python src/bench_pipeline.py --leagues 4 --seasons 3 --latency-ms 20
+      python src/bench_pipeline.py --save data/reports/bench_base.json
+      python src/bench_pipeline.py --baseline data/reports/bench_base.json
+"""
+from __future__ import annotations
+import argparse, json, os, platform, sys, tempfile, time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource   # kun Unix – på Windows rapporteres peak RSS som utilgængelig
+except ImportError:
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORT_FILE = ROOT / "data" / "reports" / "bench_pipeline.json"
+
+
+def peak_rss_mb() -> float | None:
+    """Peak RSS for processen + dens (loky-)børn; ru_maxrss er KiB på Linux, bytes på macOS.
+    None hvor `resource` ikke findes (Windows)."""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, kids) * scale / 1e6, 1)
+
+
+def fmt_mb(mb: float | None) -> str:
+    return "n/a" if mb is None else f"{mb:.0f} MB"
+
+
+class Stages:
+    def __init__(self):
+        self.rows: list[dict] = []
+
+    @contextmanager
+    def stage(self, name: str, **extra):
+        rec = {"stage": name, **extra}
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = round(time.perf_counter() - t0, 4)
+            rec["cpu_s"] = round(time.process_time() - c0, 4)
+            rec["peak_rss_mb"] = peak_rss_mb()
+            self.rows.append(rec)
+            print(f"  {name:<10} {rec['wall_s']:8.2f}s wall  {rec['cpu_s']:8.2f}s cpu  "
+                  f"{fmt_mb(rec['peak_rss_mb']):>10} peak")
+
+
+def configure_env(base_url: str, rate_per_min: float) -> None:
+    """Skal ske før api.py importeres (USE_CACHE/RATE_PER_MIN læses ved import)."""
+    os.environ["APIFOOTBALL_BASE"] = base_url
+    os.environ["APIFOOTBALL_CACHE"] = "0"
+    os.environ["APIFOOTBALL_RATE_PER_MIN"] = str(rate_per_min)
+    os.environ.setdefault("APIFOOTBALL_KEY", "mock")
+
+
+def run(args) -> dict:
+    from mockapi import MockConfig, MockServer
+
+    cfg = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_per_min=args.mock_rate,
+                     p429=args.p429, page_size=args.page_size, n_leagues=args.leagues, n_teams=args.teams,
+                     current_season=args.first_season + args.seasons)
+    seasons = list(range(args.first_season, args.first_season + args.seasons))
+    st = Stages()
+
+    with MockServer(cfg, args.recordings) as srv, tempfile.TemporaryDirectory() as tmp:
+        configure_env(srv.base_url, args.client_rate)
+        import api
+        from ingest import fetch_fixtures, fetch_seasons_async
+        from normalize import normalize_ndjson
+        from store import read_fixtures
+        from features import rolling_features
+        from train import BASELINE, default_grid, run_grid
+
+        tmp = Path(tmp)
+        store_dir, raw_dir = tmp / "fixtures", tmp / "raw"
+        raw_dir.mkdir()
+        leagues = srv.state.data.league_ids()
+        print(f"🧪 Mock {srv.base_url}: {len(leagues)} ligaer × {len(seasons)} sæsoner")
+
+        client = api.get_client()
+        with st.stage("ingest", mode="async" if args.use_async else "sync") as rec:
+            items = {}
+            if args.use_async:
+                import asyncio
+                for lid in leagues:
+                    res = asyncio.run(fetch_seasons_async(lid, seasons, concurrency=args.concurrency))
+                    items.update({(lid, yr): fx for yr, fx in res.items()})
+            else:
+                for lid in leagues:
+                    for yr in seasons:
+                        items[(lid, yr)] = fetch_fixtures(lid, yr)
+            rec["requests"] = srv.state.n_requests
+            rec["http_429"] = srv.state.n_429
+            rec["items"] = sum(len(v) for v in items.values())
+        rec["req_per_s"] = round(rec["requests"] / max(rec["wall_s"], 1e-9), 1)
+        if not args.use_async:
+            rec["rate_wait_s"] = round(client.wait_s, 3)
+            rec["http_s"] = round(client.http_s, 3)
+
+        with st.stage("normalize") as rec:
+            raw_bytes = rows = 0
+            for (lid, yr), fx in items.items():
+                path = raw_dir / f"fixtures_{lid}_{yr}.ndjson"
+                with path.open("w", encoding="utf-8") as f:
+                    for item in fx:
+                        f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                raw_bytes += path.stat().st_size
+                rows += normalize_ndjson(path, store_dir)
+            rec["rows"], rec["raw_mb"] = rows, round(raw_bytes / 1e6, 2)
+        del items
+
+        with st.stage("features") as rec:
+            df = read_fixtures(["fixture_id", "date", "league_id", "season", "home", "away",
+                                "home_goals", "away_goals"], status="FT", store_dir=store_dir)
+            feats = rolling_features(df, windows=(3, 5, 10), ewm_spans=(5,), shift=True)
+            rec["rows"], rec["columns"] = len(feats), feats.shape[1]
+
+        with st.stage("train") as rec:
+            y = (df["home_goals"] > df["away_goals"]).astype(int).to_numpy()
+            candidates = default_grid() if args.grid else [BASELINE]
+            table, *_ = run_grid(df, y, candidates, n_splits=args.splits, n_jobs=args.n_jobs)
+            rec["fits"] = len(candidates) * args.splits
+            rec["best_logloss"] = round(float(table.loc[0, "logloss"]), 5)
+        client.close()
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()
+                   if k not in ("save", "baseline")},
+        "stages": st.rows,
+        "total_wall_s": round(sum(r["wall_s"] for r in st.rows), 4),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(cur: dict, base: dict) -> None:
+    """Udskriv ændring pr. trin i forhold til baseline (negativ = hurtigere/mindre)."""
+    prev = {r["stage"]: r for r in base.get("stages", [])}
+    print(f"\nΔ mod baseline ({base.get('created', '?')}):")
+    for r in cur["stages"]:
+        b = prev.get(r["stage"])
+        if not b:
+            continue
+        parts = []
+        for k in ("wall_s", "cpu_s", "peak_rss_mb", "req_per_s"):
+            if r.get(k) is not None and b.get(k):
+                parts.append(f"{k} {r[k]:.2f} ({(r[k] / b[k] - 1) * 100:+.1f}%)")
+        print(f"  {r['stage']:<10} " + "  ".join(parts))
+    if base.get("config") != cur["config"]:
+        print("  ⚠️ konfigurationen afviger fra baseline – sammenlign med forsigtighed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline-benchmark mod lokal mock-API")
+    parser.add_argument("--leagues", type=int, default=2)
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--first-season", type=int, default=2021)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--page-size", type=int, default=50, help="mock-paginering af /fixtures (0 = fra)")
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--p429", type=float, default=0.0, help="andel tilfældige 429-svar")
+    parser.add_argument("--mock-rate", type=int, default=10_000, help="mock-serverens minutkvote")
+    parser.add_argument("--client-rate", type=float, default=6_000, help="klientens token-bucket (kald/min)")
+    parser.add_argument("--recordings", type=Path, help="optagede svar (http_cache.sqlite eller mappe)")
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--grid", action="store_true", help="hele kandidatgitteret i stedet for baseline")
+    parser.add_argument("--splits", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--save", type=Path, default=REPORT_FILE)
+    parser.add_argument("--baseline", type=Path, help="tidligere rapport at sammenligne med")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"\n⏱️ Total {report['total_wall_s']:.2f}s, peak RSS {fmt_mb(report['peak_rss_mb'])}")
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+    args.save.parent.mkdir(parents=True, exist_ok=True)
+    args.save.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("Rapport:", args.save)
+
+
+if __name__ == "__main__":
+    main()
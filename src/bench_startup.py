@@ -0,0 +1,112 @@
+"""Kold-start benchmark for CLI-kommandoerne, baseret på `python -X importtime`.
+
+Hver kommandos modul importeres i en frisk proces. stderr fra -X importtime
+giver den kumulative import-tid og mængden af importerede moduler. To ting
+tjekkes:
+
+* forbudte tunge imports: fx må `cli.py last10` aldrig trække pandas/numpy ind,
+  og `cli.py` selv må kun importere stdlib
+* tidsbudget i ms pr. modul (min. over --runs kørsler, så støj ikke giver falske alarmer)
+
+Exit-kode 1 hvis et af tjekkene fejler, så den kan bruges som gate i CI/Makefile.
+
+Kør:  python src/bench_startup.py [--runs 5] [--save data/reports/startup.json] [--baseline ...]
+"""
+from __future__ import annotations
+import argparse, json, os, subprocess, sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+HEAVY = {"pandas", "numpy", "pyarrow", "sklearn", "scipy", "joblib"}
+# modul → (top-level pakker der ikke må importeres, budget i ms)
+GUARDS = {
+    "cli":         (HEAVY | {"httpx", "api"}, 40),
+    "api":         (HEAVY | {"asyncio"}, 250),
+    "last10games": (HEAVY, 300),
+    "diagnose":    (HEAVY, 300),
+    "live":        (HEAVY | {"httpx", "api"}, 300),   # `live get` er en ren HTTP-klient mod daemonen
+    "predict":     ({"sklearn", "scipy"}, 1500),
+    "ingest":      ({"sklearn", "scipy"}, 1500),
+}
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """(kumulativ import-tid i ms, importerede top-level pakker) for `import module` i en ny proces."""
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       capture_output=True, text=True, env=env, cwd=ROOT)
+    if r.returncode != 0:
+        raise RuntimeError(f"import {module} fejlede:\n{r.stderr[-2000:]}")
+    total, names = 0.0, set()
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if cum.strip().isdigit():
+            names.add(name.strip().split(".")[0])
+            if name.strip() == module:
+                total = int(cum) / 1000
+    return total, names
+
+
+def measure(modules, runs: int = 5) -> dict:
+    out = {}
+    for m in modules:
+        times, names = [], set()
+        for _ in range(runs):
+            ms, names = import_profile(m)
+            times.append(ms)
+        out[m] = {"ms": round(min(times), 1), "median_ms": round(sorted(times)[len(times) // 2], 1),
+                  "heavy": sorted(names & (HEAVY | {"httpx", "asyncio"}))}
+    return out
+
+
+def check(results: dict) -> list[str]:
+    problems = []
+    for m, (forbidden, budget) in GUARDS.items():
+        r = results.get(m)
+        if r is None:
+            continue
+        bad = sorted(set(r["heavy"]) & forbidden)
+        if bad:
+            problems.append(f"{m} importerer {', '.join(bad)}")
+        if r["ms"] > budget:
+            problems.append(f"{m} bruger {r['ms']:.0f} ms (budget {budget} ms)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-tid (kold start) for CLI-kommandoerne")
+    parser.add_argument("--runs", type=int, default=5, help="kørsler pr. modul (min. bruges)")
+    parser.add_argument("--modules", nargs="+", default=list(GUARDS), help="moduler der måles")
+    parser.add_argument("--save", type=Path, help="gem resultatet som JSON")
+    parser.add_argument("--baseline", type=Path, help="tidligere JSON at sammenligne med")
+    args = parser.parse_args()
+
+    results = measure(args.modules, args.runs)
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))["modules"] if args.baseline else {}
+    print(f"{'modul':<12} {'min ms':>8} {'median':>8} {'Δ base':>8}  tunge imports")
+    for m, r in results.items():
+        delta = f"{r['ms'] - base[m]['ms']:+.0f}" if m in base else ""
+        print(f"{m:<12} {r['ms']:>8.1f} {r['median_ms']:>8.1f} {delta:>8}  {', '.join(r['heavy']) or '–'}")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        report = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                  "python": sys.version.split()[0], "modules": results}
+        args.save.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"📝 Gemt: {args.save}")
+
+    problems = check(results)
+    for p in problems:
+        print(f"❌ {p}")
+    if problems:
+        sys.exit(1)
+    print("✅ Kold start inden for budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""On-disk cache af API-Football svar (SQLite) med TTL pr. endpoint, ETag/Last-Modified og LRU.
+
+Nøglen er sha256 af path + normaliserede params, så samme kald altid rammer samme række.
+Afsluttede sæsoner udløber aldrig; den igangværende sæson udløber efter få minutter.
+"""
+from __future__ import annotations
+import os, json, time, sqlite3, hashlib, threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_PATH = ROOT / "data" / "cache" / "http_cache.sqlite"
+MAX_BYTES = int(os.getenv("APIFOOTBALL_CACHE_MB", "256")) * 1024 * 1024
+SEASON_ROLLOVER_MONTH = 7   # Superliga-sæsonen "2025" starter i juli 2025 og slutter i 2026
+
+NEVER = None            # TTL: udløber aldrig
+LIVE_TTL = 5 * 60       # igangværende sæson / kampe der ikke er færdige
+DAY = 24 * 3600
+
+# statuskoder hvor kampen aldrig ændrer sig igen
+FINISHED = {"FT", "AET", "PEN", "CANC", "ABD", "AWD", "WO"}
+
+# TTL pr. path; None = udløber aldrig, 0 = cache ikke
+ENDPOINT_TTL = {
+    "/status": 0,
+    "/odds/live": 0,
+    "/countries": 7 * DAY,
+    "/leagues/seasons": DAY,
+    "/leagues": DAY,
+    "/teams": DAY,
+    "/standings": 3600,
+    "/injuries": 3600,
+    "/players/topscorers": 3600,
+    "/odds": 10 * 60,
+    "/predictions": 10 * 60,
+    "/fixtures/headtohead": 3600,
+    "/fixtures/events": DAY,
+    "/fixtures/lineups": DAY,
+    "/fixtures/statistics": DAY,
+    "/fixtures/players": DAY,
+    "/trophies": 7 * DAY,
+    "/sidelined": DAY,
+}
+
+
+def normalize_params(params) -> list[tuple[str, str]]:
+    """Sortér og stringificér params; None-værdier droppes som i httpx."""
+    return sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+
+
+def cache_key(path: str, params=None) -> str:
+    raw = json.dumps([path, normalize_params(params)], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def current_season(now: datetime | None = None) -> int:
+    """Igangværende sæson: APIFOOTBALL_SEASON hvis sat, ellers ud fra dagens dato (skifter i juli)."""
+    env = os.getenv("APIFOOTBALL_SEASON")
+    if env:
+        return int(env)
+    now = now or datetime.now(timezone.utc)
+    return now.year if now.month >= SEASON_ROLLOVER_MONTH else now.year - 1
+
+
+def ttl_for(path: str, params, js: dict) -> float | None:
+    """Hvor længe et svar må genbruges uden revalidering (sekunder, None = altid)."""
+    if path == "/fixtures":
+        params = params or {}
+        season = params.get("season")
+        if season is not None and int(season) < current_season():
+            return NEVER
+        # kun opslag på bestemte kampe må fryses når de alle er færdige; en filtreret sæsonforespørgsel
+        # (status=FT, from/to, last=N) svarer også kun med færdige kampe, men får nye med tiden
+        if "id" in params or "ids" in params:
+            resp = js.get("response") or []
+            statuses = {((fx.get("fixture") or {}).get("status") or {}).get("short") for fx in resp}
+            if resp and statuses <= FINISHED:
+                return NEVER
+        return LIVE_TTL
+    return ENDPOINT_TTL.get(path, LIVE_TTL)
+
+
+class Entry:
+    __slots__ = ("key", "body", "etag", "last_modified", "expires_at")
+
+    def __init__(self, key, body, etag, last_modified, expires_at):
+        self.key = key
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.time()
+
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """SQLite-baseret svarcache; trådsikker, delt af sync- og async-klienten."""
+
+    def __init__(self, path: Path = CACHE_PATH, max_bytes: int = MAX_BYTES):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                params TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_last_access ON responses(last_access)")
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def lookup(self, path: str, params=None) -> Entry | None:
+        key = cache_key(path, params)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access=? WHERE key=?", (time.time(), key))
+        entry = Entry(key, *row)
+        if entry.fresh:
+            self.hits += 1
+        else:
+            self.misses += 1  # udløbet – bliver evt. til en revalidering (304)
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: Entry | None) -> dict:
+        if entry is None:
+            return {}
+        hdrs = {}
+        if entry.etag:
+            hdrs["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            hdrs["If-Modified-Since"] = entry.last_modified
+        return hdrs
+
+    def refresh(self, entry: Entry, path: str, params) -> dict:
+        """304 Not Modified: genbrug body og forny udløbstid."""
+        js = entry.json()
+        ttl = ttl_for(path, params, js)
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._db.execute("UPDATE responses SET expires_at=?, last_access=? WHERE key=?",
+                             (expires, time.time(), entry.key))
+            self.revalidated += 1
+        return js
+
+    def store(self, path: str, params, body: bytes, js: dict, headers) -> None:
+        if js.get("errors"):
+            return  # fejlsvar (plan, rate limit) skal ikke huskes
+        ttl = ttl_for(path, params, js)
+        if ttl == 0:
+            return
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        key = cache_key(path, params)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?,?)",
+                (key, path, json.dumps(normalize_params(params)), body,
+                 headers.get("etag"), headers.get("last-modified"), expires, now, len(body)),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """LRU: slet mindst brugte rækker til vi er under 90% af loftet."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key=?", (key,))
+            total -= size
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+    def summary(self) -> str:
+        return f"📦 Cache: {self.hits} hits / {self.misses} misses / {self.revalidated} revalideret"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._db.close()
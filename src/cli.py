@@ -0,0 +1,55 @@
+"""Ét indgangspunkt til alle scripts: python src/cli.py <kommando> [argumenter].
+
+Kommandoens modul importeres først når kommandoen er valgt. `cli.py last10`
+betaler derfor kun for api.py (httpx) og ikke for pandas/sklearn, og
+`cli.py --help` importerer ingenting ud over argparse. Argumenterne efter
+kommandoen gives videre uændret til modulets egen main():
+
+    python src/cli.py last10
+    python src/cli.py ingest --incremental
+    python src/cli.py train --grid
+    python src/cli.py predict -n 5 --source api
+    python src/cli.py diagnose --mode full
+
+Import-tiden holdes øje med af bench_startup.py (`-X importtime`).
+"""
+from __future__ import annotations
+import argparse, importlib, sys
+
+# kommando → (modul, hjælpetekst); modulerne skal have en main() der selv parser sys.argv
+COMMANDS = {
+    "ingest":   ("ingest", "hent Superliga-fixtures til fixture-store"),
+    "diagnose": ("diagnose", "probe API-Football endpoints for planen"),
+    "last10":   ("last10games", "seneste 10 og næste 10 kampe i sæsonen"),
+    "train":    ("client", "træn home-win model (baseline eller --grid)"),
+    "predict":  ("predict", "scor kommende kampe med seneste model"),
+    "backtest": ("backtest", "walk-forward backtest runde for runde"),
+    "odds":     ("odds", "odds-/prediction-snapshots og model-vs-marked edge"),
+    "backfill": ("backfill", "genoptagelig backfill af mange ligaer × sæsoner"),
+    "details":  ("details", "events/lineups/statistik i bulk"),
+    "ratings":  ("ratings", "Elo/Dixon-Coles-ratinger fra fixture-store"),
+    "simulate": ("simulate", "Monte Carlo af resten af sæsonen"),
+    "live":     ("live", "live-daemon + lokal HTTP (serve/get)"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Superliga-ML kommandoer",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="Se argumenterne for en kommando med: cli.py <kommando> --help")
+    sub = parser.add_subparsers(dest="cmd", metavar="<kommando>", required=True)
+    for name, (_, text) in COMMANDS.items():
+        sub.add_parser(name, help=text, add_help=False)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv[:1])   # kun kommandoen – resten er modulets egne flag
+    module = importlib.import_module(COMMANDS[args.cmd][0])   # først her betales den tunge import
+    sys.argv = [f"cli.py {args.cmd}", *argv[1:]]
+    return module.main()
+
+
+if __name__ == "__main__":
+    main()
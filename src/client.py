@@ -1,63 +1,80 @@
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import brier_score_loss, log_loss
-import pandas as pd, numpy as np
+import argparse, os
 from pathlib import Path
+from matchtable import load_match_table
+from train import BASELINE, default_grid, run_grid, fit_final, save_model, save_report
+from online import FeatureStore
+from ratings import RatingEngine
+from instrument import start_trace, span, profiled
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PARQ_DIR = PROJECT_ROOT / "data" / "parquet"
-IN_FILE  = PARQ_DIR / "fixtures_superliga_2021_2023.parquet"
 OUT_FILE = PARQ_DIR / "preds_superliga_2021_2023.parquet"
+SEASONS  = [2021, 2022, 2023]
+LEAGUE_ID = 119   # Superliga – fixture-store kan indeholde flere ligaer efter backfill
 
-df = pd.read_parquet(IN_FILE)
-
-# Kun afsluttede kampe og kronologisk orden (vigtigt for TimeSeriesSplit)
-df = df[df["status"]=="FT"].copy()
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date").reset_index(drop=True)
-
-def long_format(df):
-    home = df[["date","season","round","home","away","home_goals","away_goals"]].rename(
-        columns={"home":"team","away":"opp","home_goals":"gf","away_goals":"ga"}
-    )
-    home["is_home"]=1
-    away = df[["date","season","round","home","away","home_goals","away_goals"]].rename(
-        columns={"away":"team","home":"opp","away_goals":"gf","home_goals":"ga"}
-    )
-    away["is_home"]=0
-    out = pd.concat([home,away], ignore_index=True)
-    out["pts"] = np.select([out["gf"]>out["ga"], out["gf"]==out["ga"]],[3,1], default=0)
-    return out.sort_values(["team","date"])
-
-lf = long_format(df)
-lf["form5"] = lf.groupby("team")["pts"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
-lf["gd5"]   = (lf["gf"]-lf["ga"]).groupby(lf["team"]).rolling(5, min_periods=1).sum().reset_index(level=0, drop=True)
-lf["gf5"]   = lf.groupby("team")["gf"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
-lf["ga5"]   = lf.groupby("team")["ga"].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
-
-feat_home = lf[lf["is_home"]==1][["date","team","form5","gd5","gf5","ga5"]].rename(columns={"team":"home"})
-feat_away = lf[lf["is_home"]==0][["date","team","form5","gd5","gf5","ga5"]].rename(columns={"team":"away"})
-X = df.merge(feat_home, on=["date","home"], how="left").merge(feat_away, on=["date","away"], how="left", suffixes=("","_away"))
-
-y = (X["home_goals"] > X["away_goals"]).astype(int)
-features = ["form5","gd5","gf5","ga5","form5_away","gd5_away","gf5_away","ga5_away"]
-X_feat = X[features].fillna(0).to_numpy()
-
-print("Class balance (home win):", y.mean().round(3), f"({y.sum()}/{len(y)})")
-
-tscv = TimeSeriesSplit(n_splits=5)
-probs = np.zeros(len(X_feat), dtype=float)
-
-for train_idx, test_idx in tscv.split(X_feat):
-    mdl = LogisticRegression(max_iter=1000)
-    mdl.fit(X_feat[train_idx], y.iloc[train_idx])
-    probs[test_idx] = mdl.predict_proba(X_feat[test_idx])[:,1]
-
-print("Brier:", brier_score_loss(y, probs))
-print("LogLoss:", log_loss(y, probs))
-
-Xout = X[["date","home","away"]].copy()
-Xout["p_home_win"] = probs
-OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-Xout.to_parquet(OUT_FILE, index=False)
-print("Gemte:", OUT_FILE)
+def main():
+    parser = argparse.ArgumentParser(description="Træn home-win model på Superliga fixtures")
+    parser.add_argument("--grid", action="store_true",
+                        help="prøv hele kandidatgitteret (C × vinduessæt) i stedet for kun baseline")
+    parser.add_argument("--hgb", action="store_true", help="tag HistGradientBoosting med i gitteret")
+    parser.add_argument("--league", type=int, default=LEAGUE_ID, help="liga-id der trænes på")
+    parser.add_argument("--splits", type=int, default=5, help="antal TimeSeriesSplit folds")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="antal processer (-1 = alle kerner)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=os.getenv("APIFOOTBALL_PROFILE"),
+                        help="profilér hele kørslen (rapport i data/reports)")
+    args = parser.parse_args()
+
+    tr = start_trace("client")
+    with profiled(args.profile, "client"):
+        run(args)
+    print(tr.summary())
+    print("🧭 Trace:", tr.save())
+
+def run(args):
+    # Kun afsluttede kampe i kronologisk orden (vigtigt for TimeSeriesSplit) fra den memory-mappede
+    # kamptabel; hold-rækkerne er allerede sorteret, så features.py ikke skal folde dem ud igen
+    with span("match_table") as sp:
+        mt = load_match_table(status="FT").select(league_id=args.league, seasons=SEASONS)
+        df, tm = mt.frame(), mt.team_matches()
+        sp.update(rows=len(df), bytes=mt.nbytes)
+
+    y = (df["home_goals"] > df["away_goals"]).astype(int).to_numpy()
+    print("Class balance (home win):", y.mean().round(3), f"({y.sum()}/{len(y)})")
+
+    # Form-features bygges i train.build_matrix via features.py med shift=True
+    # (kun kampe FØR den aktuelle tæller med – ellers lækker kampens eget resultat ind i form5/gd5)
+    candidates = default_grid(args.hgb) if (args.grid or args.hgb) else [BASELINE]
+    table, oof, X, cols = run_grid(df, y, candidates, n_splits=args.splits, n_jobs=args.n_jobs, tm=tm)
+
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    best_name = table.loc[0, "candidate"]
+    best = next(c for c in candidates if c.name == best_name)
+    print(f"🏆 Bedste: {best_name}")
+    print("Brier:", table.loc[0, "brier"])
+    print("LogLoss:", table.loc[0, "logloss"])
+    print("Rapport:", save_report(table))
+
+    mdl = fit_final(X, cols, y, best)
+    with span("feature_state", rows=len(df)):
+        state = FeatureStore.from_history(df, best.windows, best.ewm_spans)  # så predict.py ikke skal genberegne historik
+    ratings = None
+    if best.ratings:
+        with span("rating_state", rows=len(df)):
+            ratings = RatingEngine()
+            ratings.update(df)   # checkpoint efter sidste spilledag; predict.py opdaterer kun nye runder
+    with span("save_model") as sp:
+        path = save_model(mdl, best, table.loc[0, ["brier", "logloss"]].to_dict(), state, ratings)
+        sp["bytes"] = path.stat().st_size
+    print("Model:", path)
+
+    # Out-of-fold p_home_win (NaN for første træningsblok, som aldrig er testet)
+    Xout = df[["fixture_id","date","home","away"]].copy()   # fixture_id: join mod odds (odds.py edge)
+    Xout["p_home_win"] = oof[best_name]
+    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with span("write_oof", rows=len(Xout)) as sp:
+        Xout.to_parquet(OUT_FILE, index=False)
+        sp["bytes"] = OUT_FILE.stat().st_size
+    print("Gemte:", OUT_FILE)
+
+if __name__ == "__main__":
+    main()
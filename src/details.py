@@ -0,0 +1,270 @@
+"""Kampdetaljer (events, lineups, holdstatistik, spillerstatistik) hentet i bulk.
+
+/fixtures?ids=a-b-c (max 20 id'er pr. kald) returnerer de samme kampe som
+/fixtures, men med events/lineups/statistics/players indlejret. Ét kald
+erstatter derfor op til 80 enkeltkald til /fixtures/events, /lineups osv.
+
+Kun afsluttede kampe fra fixture-store hentes, og kampe der allerede findes i
+coverage-tabellen springes over. Resultatet normaliseres til lange tabeller
+under data/details/<tabel>/league_id=/season=/. Hver række bærer flushens
+token (`flush`), og coverage skrives sidst for hver flush. read_details
+beholder kun rækker fra den flush coverage peger på for kampen, så en afbrudt
+flush (rækker uden coverage) blot hentes igen uden at give dubletter – og
+identiske rækker inden for samme kamp (fx to ens events i samme minut) bevares.
+
+    from details import read_details
+    ev = read_details("events", seasons=[2023])
+
+Kør:  python src/details.py --league 119 --seasons 2021 2022 2023
+"""
+from __future__ import annotations
+import argparse, time, uuid
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from api import get_client
+from instrument import start_trace, get_tracer, span
+from store import PARTITIONING, ROWS_PER_GROUP, build_filter, read_fixtures
+
+ROOT = Path(__file__).resolve().parents[1]
+DETAILS_DIR = ROOT / "data" / "details"
+IDS_PER_CALL = 20          # API-Football: max 20 ids pr. /fixtures?ids=...
+FLUSH_EVERY = 500          # kampe pr. skrivning til parquet
+PLAYED = ("FT", "AET", "PEN")
+ENDPOINTS_PER_FIXTURE = 4  # events, lineups, statistics, players hver for sig
+
+_KEYS = [("fixture_id", pa.int64()), ("league_id", pa.int32()), ("season", pa.int32()),
+         ("flush", pa.string())]   # flush-token: samme som i filnavnet part-<token>-*.parquet
+
+SCHEMAS = {
+    "events": pa.schema(_KEYS + [
+        ("elapsed", pa.int16()), ("extra", pa.int16()), ("team_id", pa.int64()),
+        ("player_id", pa.int64()), ("assist_id", pa.int64()),
+        ("type", pa.string()), ("detail", pa.string()), ("comments", pa.string()),
+    ]),
+    "lineups": pa.schema(_KEYS + [
+        ("team_id", pa.int64()), ("formation", pa.string()), ("coach_id", pa.int64()),
+        ("player_id", pa.int64()), ("player", pa.string()), ("number", pa.int16()),
+        ("pos", pa.string()), ("grid", pa.string()), ("starter", pa.bool_()),
+    ]),
+    "statistics": pa.schema(_KEYS + [
+        ("team_id", pa.int64()), ("type", pa.string()), ("value", pa.float64()), ("raw", pa.string()),
+    ]),
+    "players": pa.schema(_KEYS + [
+        ("team_id", pa.int64()), ("player_id", pa.int64()), ("minutes", pa.int16()),
+        ("rating", pa.float32()), ("goals", pa.int16()), ("assists", pa.int16()),
+        ("shots", pa.int16()), ("shots_on", pa.int16()), ("passes", pa.int16()),
+        ("key_passes", pa.int16()), ("tackles", pa.int16()), ("yellow", pa.int8()), ("red", pa.int8()),
+    ]),
+    "coverage": pa.schema(_KEYS + [
+        ("fetched_at", pa.timestamp("ms", tz="UTC")), ("n_events", pa.int32()),
+        ("n_lineups", pa.int32()), ("n_statistics", pa.int32()), ("n_players", pa.int32()),
+    ]),
+}
+TABLES = ("events", "lineups", "statistics", "players")
+
+
+def _g(d, *path):
+    for p in path:
+        if not isinstance(d, dict):
+            return None
+        d = d.get(p)
+    return d
+
+
+def _num(v) -> float | None:
+    """Statistikværdier kommer som 12, "55%" eller None."""
+    if v is None:
+        return None
+    if isinstance(v, str):
+        v = v.strip().rstrip("%")
+        try:
+            return float(v)
+        except ValueError:
+            return None
+    return float(v)
+
+
+class DetailRows:
+    """Kolonnevise buffere for alle detaljetabeller (dict af lister pr. tabel)."""
+
+    def __init__(self):
+        self.cols = {t: {f.name: [] for f in SCHEMAS[t]} for t in SCHEMAS}
+        self.n_fixtures = 0
+        self.token = uuid.uuid4().hex[:12]
+
+    def _add(self, table: str, keys: tuple, **vals) -> None:
+        cols = self.cols[table]
+        for name, v in zip(("fixture_id", "league_id", "season", "flush"), (*keys, self.token)):
+            cols[name].append(v)
+        for name, v in vals.items():
+            cols[name].append(v)
+
+    def add_fixture(self, item: dict) -> None:
+        keys = (_g(item, "fixture", "id"), _g(item, "league", "id"), _g(item, "league", "season"))
+        counts = {t: len(self.cols[t]["fixture_id"]) for t in TABLES}
+        for e in item.get("events") or []:
+            self._add("events", keys, elapsed=_g(e, "time", "elapsed"), extra=_g(e, "time", "extra"),
+                      team_id=_g(e, "team", "id"), player_id=_g(e, "player", "id"),
+                      assist_id=_g(e, "assist", "id"), type=e.get("type"), detail=e.get("detail"),
+                      comments=e.get("comments"))
+        for lu in item.get("lineups") or []:
+            for starter, group in ((True, lu.get("startXI")), (False, lu.get("substitutes"))):
+                for p in group or []:
+                    pl = p.get("player") or {}
+                    self._add("lineups", keys, team_id=_g(lu, "team", "id"), formation=lu.get("formation"),
+                              coach_id=_g(lu, "coach", "id"), player_id=pl.get("id"), player=pl.get("name"),
+                              number=pl.get("number"), pos=pl.get("pos"), grid=pl.get("grid"), starter=starter)
+        for st in item.get("statistics") or []:
+            for s in st.get("statistics") or []:
+                v = s.get("value")
+                self._add("statistics", keys, team_id=_g(st, "team", "id"), type=s.get("type"),
+                          value=_num(v), raw=None if v is None else str(v))
+        for tp in item.get("players") or []:
+            for p in tp.get("players") or []:
+                s = (p.get("statistics") or [{}])[0]
+                self._add("players", keys, team_id=_g(tp, "team", "id"), player_id=_g(p, "player", "id"),
+                          minutes=_g(s, "games", "minutes"), rating=_num(_g(s, "games", "rating")),
+                          goals=_g(s, "goals", "total"), assists=_g(s, "goals", "assists"),
+                          shots=_g(s, "shots", "total"), shots_on=_g(s, "shots", "on"),
+                          passes=_g(s, "passes", "total"), key_passes=_g(s, "passes", "key"),
+                          tackles=_g(s, "tackles", "total"), yellow=_g(s, "cards", "yellow"),
+                          red=_g(s, "cards", "red"))
+        n = {t: len(self.cols[t]["fixture_id"]) - counts[t] for t in TABLES}
+        self._add("coverage", keys, fetched_at=datetime.now(timezone.utc), n_events=n["events"],
+                  n_lineups=n["lineups"], n_statistics=n["statistics"], n_players=n["players"])
+        self.n_fixtures += 1
+
+    def tables(self) -> dict[str, pa.Table]:
+        return {t: pa.Table.from_pydict(self.cols[t], schema=SCHEMAS[t]) for t in SCHEMAS}
+
+
+def write_details(rows: DetailRows, details_dir: Path = DETAILS_DIR) -> dict[str, int]:
+    """Append til hver tabel (nye filer, ingen partition slettes); coverage til sidst."""
+    token = rows.token
+    written = {}
+    tables = rows.tables()
+    for name in TABLES + ("coverage",):
+        tbl = tables[name]
+        written[name] = tbl.num_rows
+        if not tbl.num_rows:
+            continue
+        ds.write_dataset(
+            tbl, details_dir / name, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{token}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=ROWS_PER_GROUP, min_rows_per_group=0,
+        )
+    return written
+
+
+def details_dataset(table: str, details_dir: Path = DETAILS_DIR) -> ds.Dataset | None:
+    path = details_dir / table
+    if not path.exists():
+        return None
+    return ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=SCHEMAS[table])
+
+
+def coverage_marks(league_id=None, seasons=None, details_dir: Path = DETAILS_DIR) -> pa.Table:
+    """(fixture_id, flush) for den seneste coverage pr. kamp – den flush kampens detaljer læses fra."""
+    dset = details_dataset("coverage", details_dir)
+    if dset is None:
+        return SCHEMAS["coverage"].empty_table().select(["fixture_id", "flush"])
+    cov = dset.to_table(columns=["fixture_id", "flush", "fetched_at"], filter=build_filter(league_id, seasons))
+    cov = cov.sort_by([("fixture_id", "ascending"), ("fetched_at", "descending")])
+    fid = cov.column("fixture_id").to_numpy()
+    first = np.r_[True, fid[1:] != fid[:-1]] if len(fid) else np.zeros(0, bool)
+    return cov.filter(pa.array(first)).select(["fixture_id", "flush"])
+
+
+def read_details(table: str, columns=None, *, league_id=None, seasons=None,
+                 details_dir: Path = DETAILS_DIR) -> pd.DataFrame:
+    dset = details_dataset(table, details_dir)
+    if dset is None:
+        return SCHEMAS[table].empty_table().to_pandas()
+    marks = coverage_marks(league_id, seasons, details_dir)
+    cols = None if columns is None else list(dict.fromkeys([*columns, "fixture_id", "flush"]))
+    tbl = dset.to_table(columns=cols, filter=build_filter(league_id, seasons))
+    # kun rækker fra kampens coverage-flush: en afbrudt flush (uden coverage) eller en tidligere
+    # hentning tæller ikke med, mens ens rækker inden for samme flush bevares (i API-rækkefølge)
+    tbl = tbl.append_column("_row", pa.array(np.arange(tbl.num_rows)))
+    tbl = tbl.join(marks, keys=["fixture_id", "flush"], join_type="left semi").sort_by("_row")
+    return tbl.select(columns if columns is not None else tbl.column_names).to_pandas()
+
+
+def covered_ids(league_id=None, seasons=None, details_dir: Path = DETAILS_DIR) -> set[int]:
+    marks = coverage_marks(league_id, seasons, details_dir)
+    return set(marks.column("fixture_id").to_pylist())
+
+
+def missing_fixture_ids(league_id=None, seasons=None, details_dir: Path = DETAILS_DIR) -> list[int]:
+    """Afsluttede kampe i fixture-store der endnu ikke har detaljer."""
+    ids = read_fixtures(["fixture_id"], league_id=league_id, seasons=seasons, status=list(PLAYED))["fixture_id"]
+    have = covered_ids(league_id, seasons, details_dir)
+    return [int(i) for i in dict.fromkeys(ids) if int(i) not in have]
+
+
+def fetch_details(ids, client=None, details_dir: Path = DETAILS_DIR, flush_every: int = FLUSH_EVERY) -> dict:
+    """Hent detaljer for `ids` i bidder af 20 og skriv dem løbende til parquet."""
+    client = client or get_client()
+    ids = list(ids)
+    rows, totals, calls = DetailRows(), {t: 0 for t in TABLES + ("coverage",)}, 0
+
+    def flush():
+        nonlocal rows
+        if rows.n_fixtures:
+            with span("write_details", rows=rows.n_fixtures):
+                for k, v in write_details(rows, details_dir).items():
+                    totals[k] += v
+            rows = DetailRows()
+
+    for i in range(0, len(ids), IDS_PER_CALL):
+        chunk = ids[i:i + IDS_PER_CALL]
+        with span("fetch_ids", ids=len(chunk)) as sp:
+            js = client.get("/fixtures", {"ids": "-".join(str(x) for x in chunk)})
+            calls += 1
+            if js.get("errors"):
+                print("⚠️ API errors:", js["errors"])
+                continue
+            for item in js.get("response", []):
+                if _g(item, "fixture", "status", "short") in PLAYED:   # detaljer for ikke-spillede kampe ændrer sig
+                    rows.add_fixture(item)
+            sp["rows"] = len(js.get("response", []))
+        if rows.n_fixtures >= flush_every:
+            flush()
+    flush()
+    return {"calls": calls, **totals}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hent events/lineups/statistik i bulk via /fixtures?ids=")
+    parser.add_argument("--league", type=int, nargs="+", help="liga-id'er (default: alle i fixture-store)")
+    parser.add_argument("--seasons", type=int, nargs="+", help="sæsoner (default: alle)")
+    parser.add_argument("--limit", type=int, help="max antal kampe i denne kørsel")
+    args = parser.parse_args()
+
+    tr = start_trace("details")
+    client = get_client()
+    get_tracer().watch_client(client)
+    with span("plan"):
+        todo = missing_fixture_ids(args.league, args.seasons)
+    if args.limit:
+        todo = todo[:args.limit]
+    if not todo:
+        print("✅ Alle afsluttede kampe har allerede detaljer")
+        return
+    print(f"➡️ {len(todo)} kampe mangler detaljer – {-(-len(todo) // IDS_PER_CALL)} kald "
+          f"(i stedet for {len(todo) * ENDPOINTS_PER_FIXTURE} enkeltkald)")
+    t0 = time.perf_counter()
+    res = fetch_details(todo, client)
+    print(f"💾 {res['coverage']} kampe: {res['events']} events, {res['lineups']} lineup-rækker, "
+          f"{res['statistics']} holdstatistikker, {res['players']} spillerlinjer "
+          f"({res['calls']} kald, {time.perf_counter() - t0:.1f}s) → {DETAILS_DIR}")
+    print("🧭 Trace:", tr.save())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,41 @@
 from __future__ import annotations
-import os, sys, json, time, argparse
+import os, sys, json, argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-import httpx
 from dotenv import load_dotenv
+from api import ApiClient, DEFAULT_BASE, default_cache
+from instrument import start_trace, span, profiled
 
 # ---------- konfiguration ----------
-RATE_DELAY = float(os.getenv("APIFOOTBALL_RATE_DELAY", "7.0"))  # sek. mellem kald (Free ~7s)
+# Tempoet styres af token-bucket i api.py ud fra x-ratelimit-* headers (ingen fast pause)
+RATE_PER_MIN = float(os.getenv("APIFOOTBALL_RATE_PER_MIN", "10"))  # Free ~10 rpm
 MAX_RETRIES = 3
+MAX_CONCURRENCY = 8   # loft over samtidige probes; selve tempoet styres stadig af token-bucket
 
 # ---------- miljø ----------
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 REPORTS_DIR = DATA_DIR / "reports"
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-load_dotenv(ROOT / ".env")
-API_KEY  = os.getenv("APIFOOTBALL_KEY")
-BASE_URL = os.getenv("APIFOOTBALL_BASE", "https://v3.football.api-sports.io")
-
-if not API_KEY:
-    print("❌ APIFOOTBALL_KEY mangler i .env i projektroden")
-    sys.exit(1)
-
-HEADERS = {
-    "x-apisports-key": API_KEY,
-    "Accept": "application/json",
-}
+_client: ApiClient | None = None
+
+def client() -> ApiClient:
+    """Fælles klient – .env læses og nøglen tjekkes først her, ikke når modulet importeres."""
+    global _client
+    if _client is None:
+        load_dotenv(ROOT / ".env")
+        api_key = os.getenv("APIFOOTBALL_KEY")
+        if not api_key:
+            print("❌ APIFOOTBALL_KEY mangler i .env i projektroden")
+            sys.exit(1)
+        _client = ApiClient(api_key, os.getenv("APIFOOTBALL_BASE", DEFAULT_BASE), rate_per_min=RATE_PER_MIN,
+                            max_retries=MAX_RETRIES, cache=default_cache())
+    return _client
 
 # ---------- hjælpefunktioner ----------
-def throttled_get(path: str, params=None, max_retries: int = MAX_RETRIES) -> dict:
-    """GET med simpel throttling + 429-retry."""
-    url = f"{BASE_URL}{path}"
-    for attempt in range(max_retries + 1):
-        r = httpx.get(url, params=params, headers=HEADERS, timeout=30)
-        if r.status_code == 429:
-            wait = RATE_DELAY * (attempt + 1)
-            print(f"⏳ 429 rate limit – venter {wait:.1f}s og prøver igen ...")
-            time.sleep(wait)
-            continue
-        r.raise_for_status()
-        js = r.json()
-        # lille generel pause for at holde os under 10 rpm
-        time.sleep(RATE_DELAY)
-        return js
-    # hvis vi ender her, lykkedes det ikke
-    return {"errors": {"rateLimit": "Too many requests"}}
+def throttled_get(path: str, params=None) -> dict:
+    """GET via fælles klient: token-bucket throttling + 429-retry."""
+    return client().get(path, params)
 
 def status_of(js: dict) -> tuple[str, object]:
     if isinstance(js, dict) and js.get("errors"):
@@ -60,9 +51,15 @@ def find_superliga_id() -> int | None:
     return None
 
 def pick_sample_fixture(league_id: int, seasons=(2023, 2022, 2021)) -> dict | None:
-    """Find en afsluttet kamp vi kan bruge til at slå events/lineups osv. op."""
+    """Find en afsluttet kamp vi kan bruge til at slå events/lineups osv. op.
+
+    Beder kun om sæsonens seneste FT-kamp (status=FT&last=1) i stedet for hele
+    sæsonens kampliste; afviser planen `last`, nøjes vi med FT-udsnittet.
+    """
     for yr in seasons:
-        js = throttled_get("/fixtures", {"league": league_id, "season": yr})
+        js = throttled_get("/fixtures", {"league": league_id, "season": yr, "status": "FT", "last": 1})
+        if js.get("errors"):
+            js = throttled_get("/fixtures", {"league": league_id, "season": yr, "status": "FT"})
         for fx in js.get("response", []):
             stat = (fx.get("fixture", {}).get("status") or {}).get("short")
             if stat == "FT":
@@ -90,72 +87,147 @@ def pick_player_from_lineup(fixture_id: int) -> int | None:
                 return pid
     return None
 
+def probe(name: str, path: str, params: dict) -> tuple[str, object]:
+    with span("probe", endpoint=name) as sp:
+        st, meta = status_of(throttled_get(path, params))
+        sp["status"] = st
+    return st, meta
+
+def probe_concurrency(limit: int = MAX_CONCURRENCY) -> int:
+    """Samtidige kald ud fra planens registrerede minutkvote (Free ~10/min → sekventielt)."""
+    return max(1, min(limit, int(client().bucket.rate_per_min // 10)))
+
+def run_graph(tasks: dict, workers: int) -> dict:
+    """Kør {navn: (afhængigheder, fn)} på en trådpulje så snart afhængighederne er klar.
+
+    fn kaldes med afhængighedernes resultater som positionelle argumenter. Gav en
+    afhængighed None (fx ingen spiller i lineup), springes opgaven over med None.
+    """
+    results, pending, running = {}, dict(tasks), {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as pool:
+        while pending or running:
+            ready = [n for n, (deps, _) in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                deps, fn = pending.pop(name)
+                if any(results[d] is None for d in deps):
+                    results[name] = None
+                else:
+                    running[pool.submit(fn, *(results[d] for d in deps))] = name
+            if not running:
+                if ready:
+                    continue   # overspringninger kan have frigivet nye opgaver
+                raise ValueError(f"Ukendte eller cykliske afhængigheder: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[running.pop(fut)] = fut.result()
+    return results
+
+def sample_task(lid: int):
+    with span("pick_sample"):
+        return pick_sample_fixture(lid)
+
+def player_task(sample: dict):
+    with span("pick_player"):
+        return pick_player_from_lineup(sample["fixture_id"])
+
+def probe_task(name: str, path: str, make_params):
+    def task(*deps):
+        params = make_params(*deps)
+        return params, probe(name, path, params)
+    return task
+
 # ---------- hovedkørsel ----------
 def main():
     parser = argparse.ArgumentParser(description="Diagnose af API-Football features")
     parser.add_argument("--mode", choices=["quick", "full"], default="quick",
                         help="quick = få kald; full = alle kald (langsommere)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="max samtidige probes (begrænses yderligere af planens minutkvote)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=os.getenv("APIFOOTBALL_PROFILE"),
+                        help="profilér hele kørslen (rapport i data/reports)")
     args = parser.parse_args()
 
-    report = {"base_url": BASE_URL, "mode": args.mode, "probed": []}
+    tr = start_trace("diagnose")
+    tr.watch_client(client())
+    try:
+        with profiled(args.profile, "diagnose"):
+            run(args)
+    finally:   # også ved sys.exit, så en fejlet kørsel kan analyseres
+        print(tr.summary(max_depth=0))
+        print("🧭 Trace:", tr.save())
 
-    lid = find_superliga_id()
+def run(args):
+    report = {"base_url": client().base_url, "mode": args.mode, "probed": []}
+
+    with span("find_league"):
+        lid = find_superliga_id()
     if not lid:
         print("❌ Kunne ikke finde Superliga via search=Superliga")
         sys.exit(2)
     print(f"✅ Superliga ID: {lid}")
 
-    sample = pick_sample_fixture(lid)
-    if not sample:
-        print("⚠️ Fandt ingen afsluttet kamp i 2021–2023")
-        sys.exit(3)
-
-    print(f"🔎 Bruger fixture {sample['fixture_id']} (season {sample['season']})")
-
-    player_id = pick_player_from_lineup(sample["fixture_id"])  # til trophies/sidelined
-    if player_id:
-        print(f"👤 Eksempelspiller fra lineup: {player_id}")
-    else:
-        print("⚠️ Kunne ikke finde spiller fra lineup — trophies/sidelined springes muligvis over")
-
-    # --- endpoints at teste ---
+    # --- endpoints at teste: (navn, sti, afhængigheder, params ud fra afhængighedernes værdier) ---
     quick_checks = [
-        ("countries", "/countries", {}),
-        ("seasons",   "/leagues/seasons", {}),
-        ("leagues(DK)","/leagues", {"country":"Denmark","season":sample["season"]}),
-        ("standings", "/standings", {"league": lid, "season": sample["season"]}),
-        ("teams",     "/teams", {"league": lid, "season": sample["season"]}),
-        ("fixtures",  "/fixtures", {"league": lid, "season": sample["season"]}),
-        ("events",    "/fixtures/events", {"fixture": sample["fixture_id"]}),
-        ("lineups",   "/fixtures/lineups", {"fixture": sample["fixture_id"]}),
-        ("stats_teams","/fixtures/statistics", {"fixture": sample["fixture_id"]}),
+        ("countries", "/countries", (), lambda: {}),
+        ("seasons",   "/leagues/seasons", (), lambda: {}),
+        ("leagues(DK)","/leagues", ("sample",), lambda s: {"country":"Denmark","season":s["season"]}),
+        ("standings", "/standings", ("sample",), lambda s: {"league": lid, "season": s["season"]}),
+        ("teams",     "/teams", ("sample",), lambda s: {"league": lid, "season": s["season"]}),
+        ("fixtures",  "/fixtures", ("sample",), lambda s: {"league": lid, "season": s["season"]}),
+        ("events",    "/fixtures/events", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
+        ("lineups",   "/fixtures/lineups", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
+        ("stats_teams","/fixtures/statistics", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
     ]
 
     full_extra = [
-        ("stats_players","/fixtures/players", {"fixture": sample["fixture_id"]}),
-        ("h2h",       "/fixtures/headtohead", {"h2h": f"{sample['home_id']}-{sample['away_id']}"}),
-        ("injuries",  "/injuries", {"league": lid, "season": sample["season"]}),
-        ("odds_prematch","/odds", {"fixture": sample["fixture_id"]}),
-        ("odds_inplay",  "/odds/live", {}),
-        ("predictions","/predictions", {"fixture": sample["fixture_id"]}),
-        ("topscorers","/players/topscorers", {"league": lid, "season": sample["season"]}),
-        # kræver player_id:
-        ("trophies",  "/trophies", {"player": player_id} if player_id else None),
-        ("sidelined", "/sidelined", {"player": player_id} if player_id else None),
+        ("stats_players","/fixtures/players", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
+        ("h2h",       "/fixtures/headtohead", ("sample",), lambda s: {"h2h": f"{s['home_id']}-{s['away_id']}"}),
+        ("injuries",  "/injuries", ("sample",), lambda s: {"league": lid, "season": s["season"]}),
+        ("odds_prematch","/odds", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
+        ("odds_inplay",  "/odds/live", (), lambda: {}),
+        ("predictions","/predictions", ("sample",), lambda s: {"fixture": s["fixture_id"]}),
+        ("topscorers","/players/topscorers", ("sample",), lambda s: {"league": lid, "season": s["season"]}),
+        # kræver player_id (springes over hvis lineup ikke gav en spiller):
+        ("trophies",  "/trophies", ("player",), lambda p: {"player": p}),
+        ("sidelined", "/sidelined", ("player",), lambda p: {"player": p}),
     ]
 
     checks = quick_checks if args.mode == "quick" else quick_checks + full_extra
 
-    for name, path, params in checks:
-        if params is None:
-            st, meta = "SKIPPED", "mangler player_id"
+    # Afhængighedsgraf: liga → eksempelkamp → spiller; alt andet kører så snart det kan
+    tasks = {"sample": ((), lambda: sample_task(lid)), "player": (("sample",), player_task)}
+    for name, path, deps, make in checks:
+        tasks[f"probe:{name}"] = (deps, probe_task(name, path, make))
+    workers = probe_concurrency(args.concurrency)
+    print(f"⚡ {workers} samtidige kald (plan: {client().bucket.rate_per_min:g} kald/min)")
+    results = run_graph(tasks, workers)
+
+    sample, player_id = results["sample"], results["player"]
+    if not sample:
+        print("⚠️ Fandt ingen afsluttet kamp i 2021–2023")
+        sys.exit(3)
+    print(f"🔎 Bruger fixture {sample['fixture_id']} (season {sample['season']})")
+    if player_id:
+        print(f"👤 Eksempelspiller fra lineup: {player_id}")
+    else:
+        print("⚠️ Kunne ikke finde spiller fra lineup — trophies/sidelined springes over")
+
+    for name, path, deps, _ in checks:
+        res = results[f"probe:{name}"]
+        if res is None:
+            params, (st, meta) = None, ("SKIPPED", f"mangler {'player_id' if 'player' in deps else 'fixture'}")
         else:
-            js = throttled_get(path, params)
-            st, meta = status_of(js)
+            params, (st, meta) = res
         print(f"{name:<16} -> {st} {meta}")
         report["probed"].append({"endpoint": name, "path": path, "params": params, "status": st, "meta": meta})
 
+    cache = client().cache
+    if cache is not None:
+        report["cache"] = cache.stats()
+        print(cache.summary())
+
     out_path = REPORTS_DIR / "apifootball_feature_report.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"\n📝 Rapport gemt: {out_path}")
 
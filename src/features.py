@@ -0,0 +1,137 @@
+"""Vektoriseret form-feature motor (rullende vinduer + EWMA) for fixture-tabeller.
+
+Alle kampe foldes ud til hold-rækker (hjemme + ude), sorteres én gang på
+(hold, dato), og hvert vindue beregnes med kumulative summer:
+sum(x[i-w+1..i]) = cs[i+1] - cs[max(i+1-w, start)]. Resultatet skrives direkte
+tilbage til fixture-rækkerne via positionsindeks – ingen merges på (date, team),
+så et hold med to kampe samme dato giver ikke dublerede rækker.
+
+    feats = rolling_features(df, windows=(3, 5, 10), ewm_spans=(5,))
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+# feature-navn → (kolonne i hold-rækken, aggregat); svarer til de gamle form5/gd5/gf5/ga5
+AGGS = {
+    "form": ("pts", "mean"),
+    "gd":   ("gd", "sum"),
+    "gf":   ("gf", "mean"),
+    "ga":   ("ga", "mean"),
+}
+
+
+class TeamMatches:
+    """Hold-rækker i (hold, dato)-orden som rå NumPy-arrays.
+
+    Række k < n er hjemmeholdet i fixture k, række n + k er udeholdet.
+    `order` mapper sorteret position → hold-række; `starts` er første sorterede
+    position for hvert holds blok.
+    """
+    __slots__ = ("n", "order", "starts", "group_start", "values")
+
+    def __init__(self, df: pd.DataFrame, home="home", away="away"):
+        n = len(df)
+        hg = df["home_goals"].to_numpy(dtype=float)
+        ag = df["away_goals"].to_numpy(dtype=float)
+        codes, _ = pd.factorize(np.concatenate([df[home].to_numpy(), df[away].to_numpy()]))
+        dates = pd.DatetimeIndex(pd.to_datetime(df["date"], utc=True)).asi8  # kun rækkefølgen bruges
+        dates = np.concatenate([dates, dates])
+        # stabil sortering: hold, dato, og ved samme dato den oprindelige fixture-rækkefølge
+        order = np.lexsort((np.tile(np.arange(n), 2), dates, codes))
+        self._init_sorted(n, order, codes[order], np.concatenate([hg, ag])[order],
+                          np.concatenate([ag, hg])[order])
+
+    @classmethod
+    def from_sorted(cls, n: int, order, codes, gf, ga) -> "TeamMatches":
+        """Fra hold-rækker der allerede er (hold, dato)-sorteret, fx matchtable.MatchTable – ingen sortering."""
+        tm = cls.__new__(cls)
+        tm._init_sorted(n, np.asarray(order), np.asarray(codes),
+                        np.asarray(gf, dtype=float), np.asarray(ga, dtype=float))
+        return tm
+
+    def _init_sorted(self, n, order, sc, gf, ga) -> None:
+        is_start = np.ones(len(order), dtype=bool)
+        is_start[1:] = sc[1:] != sc[:-1]
+        starts = np.flatnonzero(is_start)
+        group_start = starts[np.cumsum(is_start) - 1]
+
+        pts = np.where(gf > ga, 3.0, np.where(gf == ga, 1.0, 0.0))
+        self.n = n
+        self.order = order
+        self.starts = starts
+        self.group_start = group_start
+        self.values = {"gf": gf, "ga": ga, "gd": gf - ga, "pts": pts}
+
+    def scatter(self, sorted_vals: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Sorteret feature → (hjemme-array, ude-array) i fixture-rækkefølge."""
+        out = np.empty(2 * self.n, dtype=float)
+        out[self.order] = sorted_vals
+        return out[:self.n], out[self.n:]
+
+
+def window_agg(x: np.ndarray, group_start: np.ndarray, w: int, how: str, shift: bool) -> np.ndarray:
+    """Rullende sum/mean over de sidste w værdier pr. hold (min_periods=1).
+
+    shift=True udelader den aktuelle kamp (pre-match feature, ingen leakage).
+    """
+    cs = np.concatenate([[0.0], np.cumsum(x)])
+    pos = np.arange(len(x))
+    end = pos if shift else pos + 1
+    lo = np.maximum(end - w, group_start)
+    total = cs[end] - cs[lo]
+    count = end - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res = total / count if how == "mean" else total
+    return np.where(count > 0, res, np.nan)
+
+
+def ewm_mean(x: np.ndarray, group_start: np.ndarray, span: int, shift: bool) -> np.ndarray:
+    """EWMA (pandas adjust=True) pr. hold med ét lineært filter over hele arrayet.
+
+    y[i] = x[i] + d*y[i-1] køres på tværs af holdblokke; overslæbet fra forrige
+    blok er d^(i-start+1) * y[start-1] og trækkes fra igen.
+    """
+    from scipy.signal import lfilter
+
+    decay = 1.0 - 2.0 / (span + 1.0)
+    k = np.arange(len(x)) - group_start + 1
+    carry = decay ** k
+    has_prev = group_start > 0
+    prev_idx = np.where(has_prev, group_start - 1, 0)
+
+    def run(v):
+        y = lfilter([1.0], [1.0, -decay], v)
+        return y - carry * np.where(has_prev, y[prev_idx], 0.0)
+
+    res = run(x) / run(np.ones(len(x)))
+    if shift:
+        res = np.concatenate([[np.nan], res[:-1]])
+        res[k == 1] = np.nan
+    return res
+
+
+def feature_names(windows=(5,), ewm_spans=()) -> list[str]:
+    names = [f"{k}{w}" for w in windows for k in AGGS]
+    names += [f"{k}_ewm{s}" for s in ewm_spans for k in AGGS]
+    return names + [f"{c}_away" for c in names]
+
+
+def rolling_features(df: pd.DataFrame, windows=(5,), ewm_spans=(), shift: bool = False,
+                     tm: TeamMatches | None = None) -> pd.DataFrame:
+    """Form-features for hjemme- og udehold pr. fixture-række (samme index som df).
+
+    Kolonner: form{w} (snit point), gd{w} (sum målforskel), gf{w}/ga{w} (snit mål)
+    for hvert vindue, *_ewm{span} for EWMA, og de samme med suffix _away.
+    """
+    tm = tm or TeamMatches(df)
+    home, away = {}, {}
+    for w in windows:
+        for name, (col, how) in AGGS.items():
+            h, a = tm.scatter(window_agg(tm.values[col], tm.group_start, w, how, shift))
+            home[f"{name}{w}"], away[f"{name}{w}_away"] = h, a
+    for span in ewm_spans:
+        for name, (col, _) in AGGS.items():
+            h, a = tm.scatter(ewm_mean(tm.values[col], tm.group_start, span, shift))
+            home[f"{name}_ewm{span}"], away[f"{name}_ewm{span}_away"] = h, a
+    return pd.DataFrame({**home, **away}, index=df.index)
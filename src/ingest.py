@@ -1,20 +1,23 @@
-import os, json, time
+import os, json, asyncio, argparse
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from dotenv import load_dotenv
-import httpx
 import pandas as pd
+from api import get_client, async_client, default_cache
+from store import STORE_DIR, write_fixtures, read_fixtures, partition_exists
+from normalize import normalize_ndjson, table_from_items
+from instrument import start_trace, get_tracer, span, profiled
 
-load_dotenv()
-API_KEY = os.getenv("APIFOOTBALL_KEY")
-BASE_URL = "https://v3.football.api-sports.io"
-HEADERS = {"x-apisports-key": API_KEY, "Accept": "application/json"}
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"   # mapper oprettes først når der skrives (ingen sideeffekter ved import)
+STATE_FILE = DATA_DIR/"state"/"ingest_watermarks.json"
 
-DATA_DIR = Path("data"); (DATA_DIR/"raw").mkdir(parents=True, exist_ok=True); (DATA_DIR/"parquet").mkdir(parents=True, exist_ok=True); (DATA_DIR/"csv").mkdir(parents=True, exist_ok=True)
+FINISHED = {"FT", "AET", "PEN", "CANC", "ABD", "AWD", "WO"}  # ændrer sig ikke mere
+WINDOW_SLACK = timedelta(days=1)   # overlap med sidste sync (sene rettelser fra API'et)
+LOOKAHEAD = timedelta(days=7)      # kommende kampe vi også opdaterer (flyttede kickoffs)
+IDS_PER_CALL = 20                  # API-Football: max 20 ids pr. /fixtures?ids=...
 
 def get(path, params=None):
-    r = httpx.get(f"{BASE_URL}{path}", params=params, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    js = r.json()
+    js = get_client().get(path, params)
     if js.get("errors"):
         # Gør fejl synlige, men lad kaldet returnere så vi kan håndtere dem
         print("⚠️ API errors:", js["errors"])
@@ -30,13 +33,21 @@ def find_superliga_id():
             return item["league"]["id"], name
     raise SystemExit("Kunne ikke finde dansk Superliga via search=Superliga")
 
-def fetch_fixtures(league_id: int, season: int):
+def _plan_blocked(js, season, page=None):
+    if js.get("errors") and "plan" in js["errors"]:
+        where = f" (ved page {page})" if page else ""
+        print(f"🔒 Ingen adgang til sæson {season} på Free plan{where}. Springer over.")
+        return True
+    return False
+
+def fetch_fixtures(league_id: int, season: int, **extra):
+    """Hent alle sider af /fixtures for liga+sæson; `extra` er ekstra filtre (fx from/to)."""
     all_fx = []
+    base = {"league": league_id, "season": season, **extra}
 
     # Første kald UDEN 'page'
-    js = get("/fixtures", params={"league": league_id, "season": season})
-    if js.get("errors") and "plan" in js["errors"]:
-        print(f"🔒 Ingen adgang til sæson {season} på Free plan. Springer over.")
+    js = get("/fixtures", params=base)
+    if _plan_blocked(js, season):
         return []
 
     all_fx.extend(js.get("response", []))
@@ -47,9 +58,8 @@ def fetch_fixtures(league_id: int, season: int):
     # Efterfølgende kald MED 'page' hvis der faktisk er flere sider
     while current < total:
         current += 1
-        js = get("/fixtures", params={"league": league_id, "season": season, "page": current})
-        if js.get("errors") and "plan" in js["errors"]:
-            print(f"🔒 Ingen adgang til sæson {season} på Free plan (ved page {current}).")
+        js = get("/fixtures", params={**base, "page": current})
+        if _plan_blocked(js, season, current):
             break
         all_fx.extend(js.get("response", []))
         paging = js.get("paging", {}) or {}
@@ -58,72 +68,244 @@ def fetch_fixtures(league_id: int, season: int):
     return all_fx
 
 def normalize_fixtures(items):
-    rows = []
-    for fx in items:
-        fixture = fx.get("fixture", {}) or {}
-        league = fx.get("league", {}) or {}
-        teams = fx.get("teams", {}) or {}
-        goals = fx.get("goals", {}) or {}
-        score = fx.get("score", {}) or {}
-
-        rows.append({
-            "fixture_id": fixture.get("id"),
-            "date": fixture.get("date"),
-            "status": (fixture.get("status") or {}).get("short"),
-            "venue": (fixture.get("venue") or {}).get("name"),
-            "league_id": league.get("id"),
-            "league": league.get("name"),
-            "season": league.get("season"),
-            "round": league.get("round"),
-            "home_id": (teams.get("home") or {}).get("id"),
-            "home": (teams.get("home") or {}).get("name"),
-            "away_id": (teams.get("away") or {}).get("id"),
-            "away": (teams.get("away") or {}).get("name"),
-            "home_goals": goals.get("home"),
-            "away_goals": goals.get("away"),
-            "fulltime_home": (score.get("fulltime") or {}).get("home"),
-            "fulltime_away": (score.get("fulltime") or {}).get("away"),
-        })
-    return pd.DataFrame(rows)
+    """API-items → flad DataFrame (kolonnevis via Arrow, se normalize.py)."""
+    return table_from_items(items).to_pandas()
 
-def main():
-    league_id, league_name = find_superliga_id()
-    print(f"✅ Superliga: {league_name} (ID={league_id})")
+async def fetch_fixtures_async(client, league_id: int, season: int):
+    """Som fetch_fixtures, men side 2..total hentes samtidigt (rækkefølgen bevares)."""
+    js = await client.get("/fixtures", params={"league": league_id, "season": season})
+    if js.get("errors"):
+        print("⚠️ API errors:", js["errors"])
+    if _plan_blocked(js, season):
+        return []
 
-    allowed_seasons = [2021, 2022, 2023]  # free plan iht. din fejlbesked
-    combined = []
-    for yr in allowed_seasons:
-        print(f"➡️ Henter fixtures for sæson {yr} ...")
-        fx = fetch_fixtures(league_id, yr)
-        if not fx:
-            continue
-
-        # Gem rå NDJSON pr. år
-        raw_path = DATA_DIR/"raw"/f"fixtures_superliga_{yr}.ndjson"
-        with raw_path.open("w", encoding="utf-8") as f:
-            for item in fx:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
-        print(f"💾 Rå data: {raw_path} ({len(fx)} records)")
-
-        df_year = normalize_fixtures(fx)
-        combined.append(df_year)
-
-        # Gem fladt pr. år
-        pq_path = DATA_DIR/"parquet"/f"fixtures_superliga_{yr}.parquet"
-        cs_path = DATA_DIR/"csv"/f"fixtures_superliga_{yr}.csv"
-        df_year.to_parquet(pq_path, index=False)
+    pages = [js.get("response", [])]
+    paging = js.get("paging", {}) or {}
+    current = paging.get("current", 1)
+    total = paging.get("total", 1)
+    if current < total:
+        rest = await asyncio.gather(*[
+            client.get("/fixtures", params={"league": league_id, "season": season, "page": p})
+            for p in range(current + 1, total + 1)
+        ])
+        for p, js_p in zip(range(current + 1, total + 1), rest):
+            if js_p.get("errors"):
+                print("⚠️ API errors:", js_p["errors"])
+            if _plan_blocked(js_p, season, p):
+                break
+            pages.append(js_p.get("response", []))
+    return [fx for page in pages for fx in page]
+
+async def fetch_seasons_async(league_id: int, seasons, concurrency: int = 4):
+    """Hent alle sæsoner samtidigt under fælles concurrency- og rate-loft."""
+    async with async_client(concurrency=concurrency) as client:
+        get_tracer().watch_client(client, "api_async")
+        results = await asyncio.gather(*[fetch_fixtures_async(client, league_id, yr) for yr in seasons])
+    return dict(zip(seasons, results))
+
+def write_raw(yr, fx, mode="w"):
+    raw_path = DATA_DIR/"raw"/f"fixtures_superliga_{yr}.ndjson"
+    raw_path.parent.mkdir(parents=True, exist_ok=True)
+    with span("write_raw", season=yr, rows=len(fx)) as sp, raw_path.open(mode, encoding="utf-8") as f:
+        for item in fx:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        sp["bytes"] = f.tell()
+    return raw_path
+
+def write_season(yr, fx, csv: bool = False) -> int:
+    """Gem rå NDJSON og stream den ind i sæsonens partition i fixture-store (og evt. CSV)."""
+    raw_path = write_raw(yr, fx)
+    print(f"💾 Rå data: {raw_path} ({len(fx)} records)")
+    return store_raw(yr, raw_path, csv)
+
+def store_raw(yr, raw_path, csv: bool = False) -> int:
+    with span("normalize", season=yr, bytes=raw_path.stat().st_size) as sp:
+        n = sp["rows"] = normalize_ndjson(raw_path)
+    print(f"💾 Store: {STORE_DIR}/league_id=…/season={yr}  ({n} rækker)")
+    if csv:
+        with raw_path.open(encoding="utf-8") as f:
+            league_id = json.loads(f.readline())["league"]["id"]   # store kan rumme flere ligaer efter backfill
+        export_csv(yr, read_fixtures(league_id=league_id, seasons=yr))
+    return n
+
+def export_csv(yr, df_year):
+    cs_path = DATA_DIR/"csv"/f"fixtures_superliga_{yr}.csv"
+    cs_path.parent.mkdir(parents=True, exist_ok=True)
+    with span("export_csv", season=yr, rows=len(df_year)) as sp:
         df_year.to_csv(cs_path, index=False)
-        print(f"💾 Parquet: {pq_path} | CSV: {cs_path}  ({len(df_year)} rækker)")
-
-    if combined:
-        df_all = pd.concat(combined, ignore_index=True)
-        pq_all = DATA_DIR/"parquet"/"fixtures_superliga_2021_2023.parquet"
-        cs_all = DATA_DIR/"csv"/"fixtures_superliga_2021_2023.csv"
-        df_all.to_parquet(pq_all, index=False)
-        df_all.to_csv(cs_all, index=False)
-        print(f"✅ Samlet dataset gemt: {pq_all} & {cs_all}  (total {len(df_all)} rækker)")
+        sp["bytes"] = cs_path.stat().st_size
+    print(f"💾 CSV: {cs_path}")
+
+def rebuild_from_raw(csv: bool = False) -> list:
+    """Genopbyg fixture-store fra alle rå NDJSON-filer – ingen API-kald."""
+    counts = []
+    for raw_path in sorted((DATA_DIR/"raw").glob("fixtures_superliga_*.ndjson")):
+        yr = int(raw_path.stem.rsplit("_", 1)[-1])
+        counts.append(store_raw(yr, raw_path, csv))
+    return counts
+
+def summarize(counts):
+    if counts:
+        print(f"✅ Fixture-store opdateret: {STORE_DIR}  (total {sum(counts)} rækker i {len(counts)} sæsoner)")
     else:
         print("⚠️ Fandt ingen data i de tilladte sæsoner. Tjek plan/headers/base-URL.")
 
+# ---------- inkrementel ingestion ----------
+def load_watermarks() -> dict:
+    if STATE_FILE.exists():
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    return {}
+
+def save_watermarks(marks: dict) -> None:
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(marks, indent=2), encoding="utf-8")
+    tmp.replace(STATE_FILE)
+
+def mark_synced(league_id: int, seasons, when: datetime | None = None) -> None:
+    marks = load_watermarks()
+    when = when or datetime.now(timezone.utc)
+    for yr in seasons:
+        marks[f"{league_id}:{yr}"] = {"synced_at": when.isoformat()}
+    save_watermarks(marks)
+
+def fetch_by_ids(ids):
+    """Hent konkrete fixtures i bidder af 20 via /fixtures?ids=a-b-c."""
+    out = []
+    ids = list(ids)
+    for i in range(0, len(ids), IDS_PER_CALL):
+        chunk = ids[i:i + IDS_PER_CALL]
+        js = get("/fixtures", params={"ids": "-".join(str(x) for x in chunk)})
+        out.extend(js.get("response", []))
+    return out
+
+def fetch_changed(league_id: int, season: int, existing: pd.DataFrame, since: datetime, now: datetime):
+    """Kampe i datovinduet [since-slack, now+lookahead] + ældre kampe der stadig ikke er færdige."""
+    lo = (since - WINDOW_SLACK).date()
+    hi = (now + LOOKAHEAD).date()
+    items = fetch_fixtures(league_id, season, **{"from": lo.isoformat(), "to": hi.isoformat()})
+
+    # efterslæbere: udsatte/afbrudte kampe fra før vinduet som endnu ikke er afsluttet
+    dates = pd.to_datetime(existing["date"], utc=True)
+    stale = existing[~existing["status"].isin(FINISHED) & (dates.dt.date < lo)]
+    seen = {(fx.get("fixture") or {}).get("id") for fx in items}
+    todo = [int(i) for i in stale["fixture_id"] if i not in seen]
+    if todo:
+        items.extend(fetch_by_ids(todo))
+    return items
+
+def upsert_season(yr, existing: pd.DataFrame, items, csv: bool = False) -> int:
+    """Upsert ændrede fixtures (på fixture_id) i sæsonens partition og append rå NDJSON."""
+    # rå data: append – senere linjer for samme fixture_id overskriver tidligere
+    write_raw(yr, items, mode="a")
+
+    with span("upsert", season=yr) as sp:
+        delta = normalize_fixtures(items).drop_duplicates("fixture_id", keep="last")
+        keep = existing[~existing["fixture_id"].isin(delta["fixture_id"])]
+        df_year = pd.concat([keep, delta], ignore_index=True)
+        write_fixtures(df_year)
+        sp["rows"] = len(delta)
+    if csv:
+        export_csv(yr, df_year)
+    n_new = len(delta) - (len(existing) - len(keep))
+    print(f"🔁 Sæson {yr}: {len(delta)} opdaterede rækker ({n_new} nye)")
+    return len(df_year)
+
+def ingest_incremental(league_id: int, seasons, csv: bool = False) -> list:
+    marks = load_watermarks()
+    now = datetime.now(timezone.utc)
+    combined = []
+    for yr in seasons:
+        mark = marks.get(f"{league_id}:{yr}")
+        if mark is None or not partition_exists(league_id, yr):
+            print(f"➡️ Ingen watermark for sæson {yr} – fuld hentning ...")
+            with span("fetch", season=yr) as sp:
+                fx = fetch_fixtures(league_id, yr)
+                sp["rows"] = len(fx)
+            if not fx:
+                continue
+            combined.append(write_season(yr, fx, csv))
+        else:
+            with span("read_store", season=yr) as sp:
+                existing = read_fixtures(league_id=league_id, seasons=yr)
+                sp["rows"] = len(existing)
+            if existing["status"].isin(FINISHED).all():
+                print(f"✅ Sæson {yr} er afsluttet – intet at hente")
+                combined.append(len(existing))
+                continue
+            since = datetime.fromisoformat(mark["synced_at"])
+            print(f"➡️ Sæson {yr}: henter ændringer siden {since:%Y-%m-%d %H:%M} ...")
+            with span("fetch_changed", season=yr) as sp:
+                items = fetch_changed(league_id, yr, existing, since, now)
+                sp["rows"] = len(items)
+            combined.append(upsert_season(yr, existing, items, csv) if items else len(existing))
+        mark_synced(league_id, [yr], now)
+    return combined
+
+def run(args):
+    if args.from_raw:
+        with span("rebuild_from_raw"):
+            summarize(rebuild_from_raw(args.csv))
+        return
+
+    get_tracer().watch_client(get_client())
+    with span("find_league"):
+        league_id, league_name = find_superliga_id()
+    print(f"✅ Superliga: {league_name} (ID={league_id})")
+
+    allowed_seasons = args.seasons  # free plan iht. din fejlbesked: 2021–2023
+    if args.incremental:
+        summarize(ingest_incremental(league_id, allowed_seasons, args.csv))
+    else:
+        if args.use_async:
+            print(f"➡️ Henter fixtures for sæson {allowed_seasons} samtidigt (concurrency={args.concurrency}) ...")
+            with span("fetch_async", seasons=len(allowed_seasons)) as sp:
+                fetched = asyncio.run(fetch_seasons_async(league_id, allowed_seasons, args.concurrency))
+                sp["rows"] = sum(len(fx) for fx in fetched.values())
+        else:
+            fetched = {}
+            for yr in allowed_seasons:
+                print(f"➡️ Henter fixtures for sæson {yr} ...")
+                with span("fetch", season=yr) as sp:
+                    fetched[yr] = fetch_fixtures(league_id, yr)
+                    sp["rows"] = len(fetched[yr])
+
+        combined = []
+        for yr in allowed_seasons:
+            fx = fetched[yr]
+            if not fx:
+                continue
+            combined.append(write_season(yr, fx, args.csv))
+        summarize(combined)
+        mark_synced(league_id, [yr for yr in allowed_seasons if fetched[yr]])
+
+    cache = default_cache()
+    if cache is not None:
+        print(cache.summary())
+
+def main():
+    parser = argparse.ArgumentParser(description="Hent Superliga fixtures fra API-Football")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="hent sæsoner og sider samtidigt (httpx.AsyncClient)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="max samtidige kald i async-mode (rate-loftet gælder stadig)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="hent kun ændrede/uafsluttede kampe siden sidste sync og upsert i parquet")
+    parser.add_argument("--csv", action="store_true",
+                        help="eksportér også hver sæson som CSV i data/csv")
+    parser.add_argument("--from-raw", action="store_true",
+                        help="genopbyg fixture-store fra data/raw/*.ndjson uden API-kald")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[2021, 2022, 2023],
+                        help="sæsoner der skal hentes (default: free plan 2021–2023)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], default=os.getenv("APIFOOTBALL_PROFILE"),
+                        help="profilér hele kørslen (rapport i data/reports)")
+    args = parser.parse_args()
+
+    tr = start_trace("ingest")
+    with profiled(args.profile, "ingest"):
+        run(args)
+    print(tr.summary())
+    print("🧭 Trace:", tr.save())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,227 @@
+"""Letvægts-instrumentering: spans med wall/CPU-tid, rækker/bytes, HTTP-tid og hukommelse.
+
+    from instrument import start_trace, span
+    tr = start_trace("ingest")
+    tr.watch_client(get_client())               # HTTP-tid vs. rate-limit-ventetid pr. span
+    with span("fetch", season=2023) as sp:
+        fx = fetch_fixtures(119, 2023)
+        sp["rows"] = len(fx)
+    tr.save()                                   # → data/reports/trace_ingest.json
+
+Spans kan nestes (også på tværs af tråde – hver tråd har sin egen stak); tællerdeltaer
+for spans der kører samtidigt på en delt klient overlapper. Peak RSS
+er processens high-water mark efter spannet (None på Windows, hvor `resource` mangler);
+sættes APIFOOTBALL_TRACEMALLOC=1 måles desuden Python-allokeringernes peak pr. span med tracemalloc (dyrere).
+Profilering af hot paths: profiled("cprofile" | "pyinstrument") eller APIFOOTBALL_PROFILE.
+"""
+from __future__ import annotations
+import json, os, sys, threading, time, tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource   # kun Unix – på Windows er peak RSS ikke tilgængelig (None)
+except ImportError:
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORTS_DIR = ROOT / "data" / "reports"   # samme mappe som apifootball_feature_report.json
+PROFILE = os.getenv("APIFOOTBALL_PROFILE") or None
+TRACEMALLOC = os.getenv("APIFOOTBALL_TRACEMALLOC", "0") == "1"
+
+_RSS_SCALE = 1 if sys.platform == "darwin" else 1024   # ru_maxrss: bytes på macOS, KiB på Linux
+
+
+def peak_rss_mb() -> float | None:
+    """Peak RSS i MB (1 decimal), eller None hvor `resource` ikke findes (Windows)."""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_SCALE / 1e6, 1)
+
+
+def client_counters(client) -> dict:
+    """Tællere fra ApiClient/AsyncApiClient: kald, netværkstid, rate-limit-ventetid og bytes."""
+    return {"http_requests": client.n_requests, "http_s": client.http_s,
+            "rate_wait_s": client.wait_s, "http_bytes": client.bytes_in}
+
+
+def cache_counters(cache) -> dict:
+    st = cache.stats()
+    return {f"cache_{k}": st[k] for k in ("hits", "misses", "revalidated") if k in st}
+
+
+class Tracer:
+    """Samler spans for én kørsel; tællerkilder (watch) giver deltaer pr. span."""
+
+    def __init__(self, run: str, malloc: bool = TRACEMALLOC):
+        self.run = run
+        self.started = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.sources: dict[str, object] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.malloc = malloc
+        if malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # ---------- tællerkilder ----------
+    def watch(self, name: str, fn) -> None:
+        """Registrér en funktion der returnerer monotont voksende tal (dict)."""
+        with self._lock:
+            self.sources[name] = fn
+
+    def watch_client(self, client, name: str = "api") -> None:
+        self.watch(name, lambda: client_counters(client))
+        if client.cache is not None:
+            self.watch(f"{name}_cache", lambda: cache_counters(client.cache))
+
+    def _counters(self) -> dict:
+        with self._lock:
+            sources = list(self.sources.items())
+        out = {}
+        for name, fn in sources:
+            for k, v in fn().items():
+                out[k] = out.get(k, 0) + v
+        return out
+
+    # ---------- spans ----------
+    def _stack(self) -> list:
+        st = getattr(self._local, "stack", None)
+        if st is None:
+            st = self._local.stack = []
+        return st
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        with self._lock:
+            sid = self._next_id
+            self._next_id += 1
+        rec = dict(attrs)
+        meta = {"id": sid, "parent": parent["id"] if parent else None, "name": name,
+                "depth": len(stack), "thread": threading.current_thread().name,
+                "malloc_peak": 0}
+        if self.malloc:
+            if parent is not None:
+                parent["malloc_peak"] = max(parent["malloc_peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        before = self._counters()
+        stack.append(meta)
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            stack.pop()
+            out = {k: v for k, v in meta.items() if k != "malloc_peak"}
+            out.update(start_s=round(t0 - self.t0, 4), wall_s=round(wall, 4), cpu_s=round(cpu, 4),
+                       peak_rss_mb=peak_rss_mb())
+            if self.malloc:
+                peak = max(meta["malloc_peak"], tracemalloc.get_traced_memory()[1])
+                out["py_peak_mb"] = round(peak / 1e6, 2)
+                if parent is not None:
+                    parent["malloc_peak"] = max(parent["malloc_peak"], peak)
+            after = self._counters()
+            for k, v in after.items():
+                d = v - before.get(k, 0)
+                if d:
+                    out[k] = round(d, 4) if isinstance(d, float) else d
+            out.update(rec)
+            with self._lock:
+                self.spans.append(out)
+
+    # ---------- output ----------
+    def to_dict(self) -> dict:
+        spans = sorted(self.spans, key=lambda s: s["start_s"])
+        return {"run": self.run, "started": self.started.isoformat(),
+                "total_s": round(time.perf_counter() - self.t0, 4),
+                "peak_rss_mb": peak_rss_mb(), "spans": spans}
+
+    def save(self, path: Path | None = None) -> Path:
+        path = path or REPORTS_DIR / f"trace_{self.run}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2, default=str),
+                        encoding="utf-8")
+        return path
+
+    def summary(self, max_depth: int = 1) -> str:
+        rss = peak_rss_mb()
+        rss = "n/a" if rss is None else f"{rss:.0f} MB"
+        lines = [f"⏱️ Trace '{self.run}' ({time.perf_counter() - self.t0:.2f}s, peak RSS {rss})"]
+        for s in sorted(self.spans, key=lambda s: s["start_s"]):
+            if s["depth"] > max_depth:
+                continue
+            extra = "".join(f"  {k}={s[k]}" for k in ("season", "endpoint", "rows", "bytes",
+                                                      "http_requests", "rate_wait_s") if k in s)
+            lines.append(f"  {'  ' * s['depth']}{s['name']:<{24 - 2 * s['depth']}} "
+                         f"{s['wall_s']:8.3f}s wall {s['cpu_s']:8.3f}s cpu{extra}")
+        return "\n".join(lines)
+
+
+_tracer = Tracer("default", malloc=False)
+
+
+def start_trace(run: str, malloc: bool = TRACEMALLOC) -> Tracer:
+    """Ny tracer for denne kørsel; module-level span() skriver herefter til den."""
+    global _tracer
+    _tracer = Tracer(run, malloc)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+@contextmanager
+def _cprofile(out: Path):
+    import cProfile, pstats
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(out.with_suffix(".prof"))
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(20)
+        print("Profil:", out.with_suffix(".prof"))
+
+
+@contextmanager
+def _pyinstrument(out: Path):
+    from pyinstrument import Profiler
+
+    prof = Profiler()
+    prof.start()
+    try:
+        yield
+    finally:
+        prof.stop()
+        out.with_suffix(".html").write_text(prof.output_html(), encoding="utf-8")
+        print(prof.output_text(unicode=True, color=False))
+        print("Profil:", out.with_suffix(".html"))
+
+
+def profiled(kind: str | None = PROFILE, run: str = "run", reports_dir: Path = REPORTS_DIR):
+    """Valgfri profiler omkring en hel kørsel: None, "cprofile" eller "pyinstrument"."""
+    if not kind:
+        return nullcontext()
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    out = reports_dir / f"profile_{run}"
+    if kind == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+            return _pyinstrument(out)
+        except ImportError:
+            print("⚠️ pyinstrument er ikke installeret – bruger cProfile")
+    elif kind != "cprofile":
+        raise ValueError(f"Ukendt profiler: {kind}")
+    return _cprofile(out)
@@ -1,35 +1,27 @@
 from __future__ import annotations
-import os, httpx
-from dotenv import load_dotenv
-import pandas as pd
+import os, argparse
+from datetime import datetime
+from typing import TYPE_CHECKING
+from api import get_client, default_cache
+
+if TYPE_CHECKING:   # kun til annotationer – pandas importeres først i fetch_season/last_next
+    import pandas as pd
 
 # Konfig
 SEASON = int(os.getenv("APIFOOTBALL_SEASON", "2025"))  # 2025 = sæson 2025/26 hos API-FOOTBALL
 LEAGUE_ID = 119  # Dansk Superliga (fundet tidligere)
-BASE = "https://v3.football.api-sports.io"
-
-load_dotenv()
-KEY = os.getenv("APIFOOTBALL_KEY")
-HDRS = {"x-apisports-key": KEY, "Accept": "application/json"}
+TZ_DK = "Europe/Copenhagen"
 
 def get(path, params=None):
-    r = httpx.get(f"{BASE}{path}", params=params, headers=HDRS, timeout=30)
-    r.raise_for_status()
-    js = r.json()
+    js = get_client().get(path, params)
     if js.get("errors"):
         raise SystemExit(f"API errors: {js['errors']}")
     return js["response"]
 
-def main():
-    # Hent ALLE fixtures for sæsonen
-    resp = get("/fixtures", {"league": LEAGUE_ID, "season": SEASON})
-    if not resp:
-        print("Ingen fixtures fundet.")
-        return
-
-    # Flad tabel
+def fetch_rows(league_id: int = LEAGUE_ID, season: int = SEASON) -> list[dict]:
+    """Hent ALLE fixtures for sæsonen som flade rækker (kun stdlib – ingen pandas-import)."""
     rows = []
-    for fx in resp:
+    for fx in get("/fixtures", {"league": league_id, "season": season}):
         fxt = fx["fixture"]; lg = fx["league"]; tm = fx["teams"]; gl = fx["goals"]
         rows.append({
             "fixture_id": fxt["id"],
@@ -41,25 +33,64 @@ def main():
             "hg": gl["home"],
             "ag": gl["away"],
         })
-    df = pd.DataFrame(rows)
+    return rows
+
+def fetch_season(league_id: int = LEAGUE_ID, season: int = SEASON) -> pd.DataFrame:
+    """Som fetch_rows, men som DataFrame med dt_utc/dt_dk (tom DataFrame hvis ingen)."""
+    import pandas as pd
+
+    df = pd.DataFrame(fetch_rows(league_id, season))
+    if df.empty:
+        return df
     # Tidsbehandling
     df["dt_utc"] = pd.to_datetime(df["utc"], utc=True)
-    df["dt_dk"] = df["dt_utc"].dt.tz_convert("Europe/Copenhagen")
+    df["dt_dk"] = df["dt_utc"].dt.tz_convert(TZ_DK)
+    return df
 
+def last_next(df: pd.DataFrame, n: int = 10) -> tuple[pd.DataFrame, pd.DataFrame]:
     # Seneste 10 SPILLEDE (status FT), sorteret efter dansk tid senest først
-    last10 = df[df["status"].eq("FT")].sort_values("dt_utc", ascending=False).head(10)
+    last10 = df[df["status"].eq("FT")].sort_values("dt_utc", ascending=False).head(n)
 
     # Næste 10 PLANLAGTE (status NS), sorteret frem i tid
-    next10 = df[df["status"].eq("NS")].sort_values("dt_utc", ascending=True).head(10)
+    next10 = df[df["status"].eq("NS")].sort_values("dt_utc", ascending=True).head(n)
+    return last10, next10
+
+def last_next_rows(rows: list[dict], n: int = 10) -> tuple[list[dict], list[dict]]:
+    """last_next på rækker fra fetch_rows; tilføjer dt_dk (bruges af CLI'en, så pandas ikke skal importeres)."""
+    from zoneinfo import ZoneInfo
+
+    tz = ZoneInfo(TZ_DK)
+    for r in rows:
+        r["dt_dk"] = datetime.fromisoformat(r["utc"]).astimezone(tz)
+    played = sorted((r for r in rows if r["status"] == "FT"), key=lambda r: r["dt_dk"], reverse=True)
+    planned = sorted((r for r in rows if r["status"] == "NS"), key=lambda r: r["dt_dk"])
+    return played[:n], planned[:n]
+
+def main():
+    parser = argparse.ArgumentParser(description="Seneste og næste kampe i sæsonen (direkte fra API'et)")
+    parser.add_argument("--league", type=int, default=LEAGUE_ID)
+    parser.add_argument("--season", type=int, default=SEASON)
+    parser.add_argument("-n", type=int, default=10, help="antal kampe hver vej")
+    args = parser.parse_args()
+
+    rows = fetch_rows(args.league, args.season)
+    if not rows:
+        print("Ingen fixtures fundet.")
+        return
+    last10, next10 = last_next_rows(rows, args.n)
 
     # Print pænt
-    print("\n=== Seneste 10 kampe (spillet) ===")
-    for _, r in last10.iterrows():
+    print(f"\n=== Seneste {args.n} kampe (spillet) ===")
+    for r in last10:
         print(f"{r['dt_dk']:%d-%m-%Y %H:%M}  {r['home']} {r['hg']}-{r['ag']} {r['away']}  (runde: {r['round']})")
 
-    print("\n=== Næste 10 kampe (planlagt) ===")
-    for _, r in next10.iterrows():
+    print(f"\n=== Næste {args.n} kampe (planlagt) ===")
+    for r in next10:
         print(f"{r['dt_dk']:%d-%m-%Y %H:%M}  {r['home']} vs {r['away']}  (runde: {r['round']})")
 
+    cache = default_cache()
+    if cache is not None:
+        print("\n" + cache.summary())
+
 if __name__ == "__main__":
     main()
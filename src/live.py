@@ -0,0 +1,492 @@
+"""Live-daemon: sæsonens fixtures i hukommelsen, kickoff-styret polling og lokale svar på millisekunder.
+
+last10games.py henter hele sæsonen hver gang den køres. Her hentes sæsonen én gang
+(fra fixture-store eller API'et) og holdes som DataFrame i hukommelsen. Derefter
+polles kun kampe der er i gang eller tæt på kickoff, via /fixtures?ids= i bidder
+af 20. Intervallet afhænger af kampens status:
+
+* i spil (1H/2H/ET/P): hvert minut; pause (HT/BT): hvert 3. minut
+* NS inden for PRE_WINDOW før kickoff: med halveret afstand til kickoff (min. 1 min)
+* forsinket kickoff: hvert 2. minut i op til LATE_GRACE
+
+Uden aktive kampe sover daemonen til næste kickoff-vindue eller næste
+resync, og bruger altså ingen kald. En fuld resync (typisk 1-2 kald) fanger
+flyttede kampe.
+
+Ændringer (diff på status/mål/dato) skrives til sæsonens partition i fixture-store
+og ind i tabellen i hukommelsen. Når en kamp bliver FT, opdateres forudsigelserne
+for de kommende kampe med predict.Predictor.
+
+Svarene bygges som JSON-bytes ved hver ændring. En lokal HTTP-forespørgsel
+koster derfor kun et opslag:
+
+    GET /last10  /next10  /predictions  /live  /status      (?n=5 for et andet antal)
+
+Kør:  python src/live.py serve [--league 119] [--season 2025] [--port 8766]
+      python src/live.py get next10            # CLI-klient mod den kørende daemon
+"""
+from __future__ import annotations
+import argparse, asyncio, json, os, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlsplit
+from cache import current_season
+
+if TYPE_CHECKING:   # numpy/pandas importeres først i daemonen – `live get` forbliver en let HTTP-klient
+    import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+SEASON = current_season()   # APIFOOTBALL_SEASON eller ud fra datoen (skifter i juli)
+LEAGUE_ID = 119
+HOST, PORT = "127.0.0.1", int(os.getenv("APIFOOTBALL_LIVE_PORT", "8766"))
+MAX_N = 500                            # loft for ?n= på de lokale endpoints
+IDS_PER_CALL = 20                      # API-Football: max 20 ids pr. /fixtures?ids=...
+
+IN_PLAY = {"1H", "2H", "ET", "P", "LIVE"}
+BREAK = {"HT", "BT"}
+PAUSED = {"SUSP", "INT"}
+NOT_STARTED = {"NS", "TBD"}
+PLAYED = {"FT", "AET", "PEN"}
+
+PLAY_EVERY = 60.0                      # sekunder mellem polls pr. status-gruppe
+BREAK_EVERY = 180.0
+PAUSED_EVERY = 300.0
+LATE_EVERY = 120.0
+MIN_POLL = 60.0
+PRE_WINDOW = 30 * 60.0                 # NS-kampe polles fra 30 min før kickoff (opstilling, flyttet kickoff)
+LATE_GRACE = 3 * 3600.0                # ... og op til 3 timer efter, hvis status stadig er NS
+RESYNC_EVERY = 6 * 3600.0              # fuld sæson-hentning (flyttede kampe, nye runder)
+
+DIFF_COLUMNS = ["date", "status", "home_goals", "away_goals", "fulltime_home", "fulltime_away", "round", "venue"]
+
+
+def poll_interval(status: str, kickoff: float, now: float) -> float | None:
+    """Sekunder til næste poll af én kamp; None = ikke aktiv (færdig eller langt fra kickoff)."""
+    if status in IN_PLAY:
+        return PLAY_EVERY
+    if status in BREAK:
+        return BREAK_EVERY
+    if status in PAUSED:
+        return PAUSED_EVERY
+    if status in NOT_STARTED:
+        to_kickoff = kickoff - now
+        if 0 < to_kickoff <= PRE_WINDOW:
+            return max(MIN_POLL, to_kickoff / 2)
+        if -LATE_GRACE < to_kickoff <= 0:
+            return LATE_EVERY
+    return None
+
+
+class Scheduler:
+    """Hvornår skal hvilke kampe polles; `due` er næste poll-tidspunkt (epoch) pr. aktiv kamp."""
+
+    def __init__(self):
+        self.due: dict[int, float] = {}
+        self.resync_at = 0.0
+
+    def plan(self, table: pd.DataFrame, now: float) -> tuple[list[int], float]:
+        """(kampe der skal polles nu, sekunder til næste vækning)."""
+        import numpy as np
+
+        fids = table["fixture_id"].to_numpy()
+        kick = table["date"].to_numpy(dtype="datetime64[ms]").astype(np.int64) / 1000.0
+        status = table["status"].to_numpy()
+        active = set()
+        wake = self.resync_at
+        for fid, st, ko in zip(fids.tolist(), status, kick.tolist()):
+            if poll_interval(st, ko, now) is not None:
+                active.add(fid)
+                self.due.setdefault(fid, now)              # lige kommet ind i vinduet → poll straks
+            elif st in NOT_STARTED and ko - PRE_WINDOW > now:
+                wake = min(wake, ko - PRE_WINDOW)           # næste kickoff-vindue
+        for fid in list(self.due):
+            if fid not in active:
+                del self.due[fid]
+        ready = sorted(fid for fid, t in self.due.items() if t <= now)
+        if self.due:
+            wake = min(wake, min(self.due.values()))
+        return ready, max(0.0, wake - now)
+
+    def polled(self, fid: int, status: str, kickoff: float, now: float) -> None:
+        step = poll_interval(status, kickoff, now)
+        if step is None:
+            self.due.pop(fid, None)
+        else:
+            self.due[fid] = now + step
+
+
+class SeasonTable:
+    """Sæsonens fixtures (FIXTURE_SCHEMA-kolonner) + færdigbyggede JSON-svar."""
+
+    def __init__(self, df: pd.DataFrame):
+        import pandas as pd
+
+        self.df = df.sort_values(["date", "fixture_id"], ignore_index=True)
+        self.elapsed: dict[int, int] = {}      # spilleminut for kampe i gang
+        self.version = 0
+        self.updated_at = None
+        self.predictions = pd.DataFrame()
+        self.payloads: dict[str, bytes] = {}
+        self.rebuild()
+
+    @staticmethod
+    def normalize(items) -> pd.DataFrame:
+        from normalize import table_from_items
+
+        return table_from_items(items).to_pandas()
+
+    def apply(self, items) -> pd.DataFrame:
+        """Flet API-items ind; returnerer de rækker der faktisk ændrede sig (nye eller anderledes).
+
+        Spilleminuttet er ikke en DIFF_COLUMN; flytter det sig uden andre ændringer, opdateres
+        kun /live-svaret (så minuttet ikke står stille mellem mål og statusskift).
+        """
+        import pandas as pd
+
+        before = dict(self.elapsed)
+        for it in items:
+            st = (it.get("fixture") or {}).get("status") or {}
+            fid = (it.get("fixture") or {}).get("id")
+            if st.get("short") in IN_PLAY | BREAK and st.get("elapsed") is not None:
+                self.elapsed[fid] = st["elapsed"]
+            else:
+                self.elapsed.pop(fid, None)
+        new = self.normalize(items).drop_duplicates("fixture_id", keep="last")
+        minute_moved = self.elapsed != before
+        if new.empty:
+            if minute_moved:
+                self.refresh_live()
+            return new
+        old = self.df.set_index("fixture_id").reindex(new["fixture_id"])
+        cur = new.set_index("fixture_id")
+        same = pd.Series(True, index=cur.index)
+        for c in DIFF_COLUMNS:
+            a, b = old[c], cur[c]
+            same &= (a == b) | (a.isna() & b.isna())
+        changed = new[~same.to_numpy()]
+        if not changed.empty:
+            keep = self.df[~self.df["fixture_id"].isin(changed["fixture_id"])]
+            self.df = pd.concat([keep, changed], ignore_index=True).sort_values(["date", "fixture_id"],
+                                                                                ignore_index=True)
+            self.rebuild()
+        elif minute_moved:
+            self.refresh_live()
+        return changed
+
+    # ---------- svar ----------
+    @staticmethod
+    def _rows(df: pd.DataFrame, elapsed: dict | None = None) -> list[dict]:
+        import pandas as pd
+
+        out = []
+        for r in df.itertuples(index=False):
+            row = {"fixture_id": int(r.fixture_id), "date": r.date.isoformat(), "status": r.status,
+                   "round": r.round, "home": r.home, "away": r.away,
+                   "home_goals": None if pd.isna(r.home_goals) else int(r.home_goals),
+                   "away_goals": None if pd.isna(r.away_goals) else int(r.away_goals)}
+            if elapsed and r.fixture_id in elapsed:
+                row["elapsed"] = elapsed[r.fixture_id]
+            out.append(row)
+        return out
+
+    def last(self, n: int = 10) -> list[dict]:
+        return self._rows(self.df[self.df["status"].isin(PLAYED)].iloc[::-1].head(n))
+
+    def next(self, n: int = 10) -> list[dict]:
+        return self._rows(self.df[self.df["status"].isin(NOT_STARTED)].head(n))
+
+    def live(self) -> list[dict]:
+        return self._rows(self.df[self.df["status"].isin(IN_PLAY | BREAK | PAUSED)], self.elapsed)
+
+    def upcoming(self, n: int = 10) -> pd.DataFrame:
+        return self.df[self.df["status"].isin(NOT_STARTED)].head(n)
+
+    def prediction_rows(self, n: int = 10) -> list[dict]:
+        if self.predictions.empty:
+            return []
+        p = self.predictions.head(n)
+        return [{"fixture_id": int(r.fixture_id), "date": r.date.isoformat(), "home": r.home, "away": r.away,
+                 "p_home_win": round(float(r.p_home_win), 4), "model_version": r.model_version}
+                for r in p.itertuples(index=False)]
+
+    @staticmethod
+    def _dump(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.updated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def rebuild(self) -> None:
+        self._touch()
+        dump = self._dump
+        self.payloads = {"last10": dump(self.last()), "next10": dump(self.next()),
+                         "live": dump(self.live()), "predictions": dump(self.prediction_rows())}
+
+    def refresh_live(self) -> None:
+        """Kun /live (spilleminuttet) – de andre svar afhænger ikke af det."""
+        self._touch()
+        self.payloads = {**self.payloads, "live": self._dump(self.live())}
+
+
+class LiveDaemon:
+    def __init__(self, league_id: int = LEAGUE_ID, season: int = SEASON, host: str = HOST, port: int = PORT,
+                 write_store: bool = True, predict: bool = True, clock=time.time):
+        self.league_id, self.season = league_id, season
+        self.host, self.port = host, port
+        self.write_store = write_store
+        self.clock = clock
+        self.sched = Scheduler()
+        self.table: SeasonTable | None = None
+        self.client = None
+        self.predictor = None
+        self.use_predictor = predict
+        self.stats = {"polls": 0, "resyncs": 0, "changes": 0, "served": 0, "started": None, "next_wake_s": None}
+        self._stop = asyncio.Event()
+        self._kick = asyncio.Event()
+
+    # ---------- data ----------
+    def load_store(self) -> pd.DataFrame:
+        import pandas as pd
+        from store import read_fixtures
+
+        try:
+            return read_fixtures(league_id=self.league_id, seasons=[self.season])
+        except FileNotFoundError:
+            return pd.DataFrame()
+
+    async def fetch(self, params: dict) -> list:
+        js = await self.client.get("/fixtures", params)
+        if js.get("errors"):
+            print("⚠️ API errors:", js["errors"])
+        return js.get("response", [])
+
+    async def resync(self) -> None:
+        """Hele sæsonen (alle sider) – ved opstart og hver RESYNC_EVERY."""
+        from ingest import fetch_fixtures_async
+
+        items = await fetch_fixtures_async(self.client, self.league_id, self.season)
+        self.stats["resyncs"] += 1
+        self.sched.resync_at = self.clock() + RESYNC_EVERY
+        if items:
+            await self.apply(items)
+
+    async def poll(self, ids: list[int]) -> None:
+        items = []
+        for i in range(0, len(ids), IDS_PER_CALL):
+            items += await self.fetch({"ids": "-".join(str(x) for x in ids[i:i + IDS_PER_CALL])})
+        self.stats["polls"] += 1
+        now = self.clock()
+        seen = set()
+        for it in items:
+            fx = it.get("fixture") or {}
+            kick = datetime.fromisoformat(fx["date"]).timestamp() if fx.get("date") else now
+            self.sched.polled(fx.get("id"), (fx.get("status") or {}).get("short"), kick, now)
+            seen.add(fx.get("id"))
+        for fid in set(ids) - seen:          # ukendt id (fx slettet kamp): vent til næste resync
+            self.sched.due.pop(fid, None)
+        await self.apply(items)
+
+    async def apply(self, items) -> None:
+        import pandas as pd
+
+        changed = self.table.apply(items)
+        if changed.empty:
+            return
+        self.stats["changes"] += len(changed)
+        if len(changed) > 10:
+            print(f"🔄 {len(changed)} kampe opdateret")
+        else:
+            for r in changed.itertuples(index=False):
+                score = "" if pd.isna(r.home_goals) else f" {int(r.home_goals)}-{int(r.away_goals)}"
+                print(f"🔔 {r.status:>3} {r.home} vs {r.away}{score}")
+        if self.write_store:   # kun denne sæsons partition skrives – i en tråd, så serveren ikke blokeres
+            from store import write_fixtures
+
+            await asyncio.to_thread(write_fixtures, self.table.df.copy())
+        if self.predictor is not None and changed["status"].isin(PLAYED).any():
+            await asyncio.to_thread(self.predictor.catch_up, self.league_id)
+        self.refresh_predictions()
+        self._kick.set()   # planen kan have ændret sig (kamp startet/slut, flyttet kickoff)
+
+    def refresh_predictions(self) -> None:
+        if self.predictor is None:
+            return
+        up = self.table.upcoming()
+        if not up.empty:
+            self.table.predictions = self.predictor.predict(up)
+        self.table.rebuild()
+
+    def load_predictor(self) -> None:
+        if not self.use_predictor:
+            return
+        try:
+            from predict import Predictor
+
+            self.predictor = Predictor()
+            n = self.predictor.catch_up(self.league_id)
+            print(f"🧠 Model {self.predictor.version} (+{n} FT-kampe)")
+        except SystemExit as e:   # ingen model endnu – daemonen kører fint uden forudsigelser
+            print(f"⚠️ {e}")
+        except FileNotFoundError:
+            print("⚠️ Fixture-store findes ikke – ingen forudsigelser")
+
+    # ---------- løkke ----------
+    async def run(self) -> None:
+        from api import async_client, RateLimitExhausted
+
+        self.stats["started"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        df = self.load_store()
+        self.table = SeasonTable(df if not df.empty else self.normalize_empty())
+        print(f"📋 {len(self.table.df)} kampe fra fixture-store (liga {self.league_id}, sæson {self.season})")
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"🛰️ Lytter på http://{self.host}:{self.port}  (/last10 /next10 /live /predictions /status)")
+        async with async_client(concurrency=2, use_cache=False) as client, server:
+            self.client = client
+            await self.resync()
+            await asyncio.to_thread(self.load_predictor)
+            self.refresh_predictions()
+            while not self._stop.is_set():
+                try:
+                    await self.step()
+                except RateLimitExhausted as e:
+                    from backfill import seconds_until_reset
+
+                    wait = seconds_until_reset() + 60
+                    print(f"🛑 {e} – pauser {wait / 3600:.1f} t (svar serveres stadig fra hukommelsen)")
+                    await self.idle(wait)
+
+    async def step(self) -> None:
+        """Én omgang: resync, poll af kampe der er due – eller søvn til næste vækning."""
+        now = self.clock()
+        if now >= self.sched.resync_at:
+            await self.resync()
+            return
+        ready, delay = self.sched.plan(self.table.df, now)
+        if ready:
+            await self.poll(ready)
+            return
+        self.stats["next_wake_s"] = round(delay, 1)
+        await self.idle(delay)
+
+    async def idle(self, delay: float) -> None:
+        """Tomgang: ingen kald, kun en timer (vækkes tidligere ved stop eller ændret plan)."""
+        self._kick.clear()
+        waits = [asyncio.ensure_future(self._stop.wait()), asyncio.ensure_future(self._kick.wait())]
+        await asyncio.wait(waits, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        for w in waits:
+            w.cancel()
+
+    @staticmethod
+    def normalize_empty() -> pd.DataFrame:
+        from store import FIXTURE_SCHEMA
+
+        return FIXTURE_SCHEMA.empty_table().to_pandas()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ---------- HTTP ----------
+    def route(self, path: str, query: dict) -> tuple[int, bytes]:
+        t = self.table
+        try:
+            n = min(max(int(query.get("n", ["10"])[0]), 0), MAX_N)
+        except ValueError:
+            return 400, b'{"error": "ugyldig n"}'
+        name = path.strip("/")
+        if name in ("last10", "next10", "live", "predictions") and n == 10:
+            return 200, t.payloads[name]          # færdigbygget – intet arbejde pr. kald
+        body = {"last10": lambda: t.last(n), "next10": lambda: t.next(n), "live": t.live,
+                "predictions": lambda: t.prediction_rows(n),
+                "status": lambda: {**self.stats, "version": t.version, "updated_at": t.updated_at,
+                                   "fixtures": len(t.df), "active": len(self.sched.due),
+                                   "api_requests": self.client.n_requests if self.client else 0}}.get(name)
+        if body is None:
+            return 404, b'{"error": "ukendt endpoint"}'
+        return 200, json.dumps(body(), ensure_ascii=False).encode("utf-8")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass                                  # headers ignoreres
+            parts = line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET" or self.table is None:
+                status, body = 400, b'{"error": "kun GET"}'
+            else:
+                url = urlsplit(parts[1])
+                status, body = self.route(url.path, parse_qs(url.query))
+            self.stats["served"] += 1
+            writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERR'}\r\n"
+                         f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+# ---------- CLI ----------
+def get(what: str, n: int = 10, host: str = HOST, port: int = PORT):
+    """Hent et svar fra den kørende daemon (ingen API-kald, ingen parquet)."""
+    from urllib.request import urlopen
+
+    with urlopen(f"http://{host}:{port}/{what}?n={n}", timeout=5) as r:
+        return json.loads(r.read())
+
+
+def print_rows(what: str, rows) -> None:
+    from zoneinfo import ZoneInfo
+
+    if isinstance(rows, dict):
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return
+    for r in rows:
+        when = datetime.fromisoformat(r["date"]).astimezone(ZoneInfo("Europe/Copenhagen"))
+        if what == "predictions":
+            print(f"{when:%d-%m-%Y %H:%M}  {r['home']:>22} vs {r['away']:<22}  p(hjemmesejr) = {r['p_home_win']:.3f}")
+        elif r.get("home_goals") is None:
+            print(f"{when:%d-%m-%Y %H:%M}  {r['home']} vs {r['away']}  (runde: {r['round']})")
+        else:
+            minute = f" {r['elapsed']}'" if "elapsed" in r else ""
+            print(f"{when:%d-%m-%Y %H:%M}  {r['home']} {r['home_goals']}-{r['away_goals']} {r['away']}"
+                  f"  [{r['status']}{minute}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live-daemon for sæsonens kampe + lokal HTTP/CLI")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="kør daemonen")
+    s.add_argument("--league", type=int, default=LEAGUE_ID)
+    s.add_argument("--season", type=int, default=SEASON)
+    s.add_argument("--host", default=HOST)
+    s.add_argument("--port", type=int, default=PORT)
+    s.add_argument("--no-store", action="store_true", help="skriv ikke ændringer til fixture-store")
+    s.add_argument("--no-predict", action="store_true", help="indlæs ingen model")
+    g = sub.add_parser("get", help="spørg den kørende daemon")
+    g.add_argument("what", choices=["last10", "next10", "live", "predictions", "status"])
+    g.add_argument("-n", type=int, default=10)
+    g.add_argument("--host", default=HOST)
+    g.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    if args.cmd == "get":
+        t0 = time.perf_counter()
+        rows = get(args.what, args.n, args.host, args.port)
+        dt = time.perf_counter() - t0
+        print_rows(args.what, rows)
+        print(f"\n⚡ {dt * 1000:.1f} ms")
+        return
+
+    daemon = LiveDaemon(args.league, args.season, args.host, args.port,
+                        write_store=not args.no_store, predict=not args.no_predict)
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        print("\n👋 Stoppet")
+
+
+if __name__ == "__main__":
+    main()
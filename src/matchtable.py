@@ -0,0 +1,232 @@
+"""Kompakt, kolonnebaseret kamp-/holdtabel – bygget én gang, cachet som Arrow og memory-mappet.
+
+To tabeller deler én team-ordbog (kode → API-id → navn):
+
+* fixtures: én række pr. afsluttet kamp, sorteret på (dato, fixture_id). Holdene
+  er int32-koder og målene int8.
+* long: to rækker pr. kamp (hjemme/ude), sorteret på (hold, dato). Hver række har
+  fix_row (index i fixtures), side, gf/ga/pts som int8 og datoen.
+
+Holdkoderne kommer fra home_id/away_id, så et omdøbt hold forbliver ét hold.
+Tabellerne gemmes ukomprimeret i Arrow IPC under data/cache/match_table/ og
+åbnes med pa.memory_map. Feature- og modelkode deler derfor siderne med OS'ets
+page cache i stedet for at bygge long-formatet igen. Cachen genbygges kun når
+fixture-store har ændret sig (signatur på filnavn/størrelse/mtime).
+
+    mt = load_match_table().select(seasons=[2021, 2022, 2023])
+    df, tm = mt.frame(), mt.team_matches()      # tm → features.rolling_features(df, tm=tm)
+"""
+from __future__ import annotations
+import hashlib, json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from features import TeamMatches
+from store import STORE_DIR, read_table
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "cache" / "match_table"
+CACHE_VERSION = 1
+
+FIXTURES_SCHEMA = pa.schema([
+    ("fixture_id", pa.int64()),
+    ("date", pa.timestamp("ms", tz="UTC")),
+    ("league_id", pa.int32()),
+    ("season", pa.int16()),
+    ("home", pa.int32()),
+    ("away", pa.int32()),
+    ("home_goals", pa.int8()),
+    ("away_goals", pa.int8()),
+])
+
+LONG_SCHEMA = pa.schema([
+    ("team", pa.int32()),
+    ("opp", pa.int32()),
+    ("fix_row", pa.int32()),
+    ("side", pa.int8()),          # 0 = hjemme, 1 = ude
+    ("date", pa.timestamp("ms", tz="UTC")),
+    ("gf", pa.int8()),
+    ("ga", pa.int8()),
+    ("pts", pa.int8()),
+])
+
+TEAMS_SCHEMA = pa.schema([("code", pa.int32()), ("team_id", pa.int64()), ("name", pa.string())])
+
+SOURCE_COLUMNS = ["fixture_id", "date", "league_id", "season", "home_id", "home", "away_id", "away",
+                  "home_goals", "away_goals"]
+
+
+def _np(col) -> np.ndarray:
+    return col.to_numpy() if isinstance(col, pa.ChunkedArray) and col.num_chunks == 1 else np.asarray(col)
+
+
+def _team_dictionary(ids: np.ndarray, names: np.ndarray, dates: np.ndarray):
+    """Koder pr. API-id; navnet er det seneste holdet har spillet under (entydiggjort)."""
+    codes, uniq = pd.factorize(ids)
+    latest = np.empty(len(uniq), dtype=object)
+    order = np.argsort(dates, kind="stable")
+    latest[codes[order]] = names[order]   # sidste skrivning vinder = nyeste dato
+    dup = pd.Series(latest).duplicated(keep=False).to_numpy()
+    latest[dup] = [f"{n} ({i})" for n, i in zip(latest[dup], uniq[dup])]
+    return codes.astype(np.int32), uniq.astype(np.int64), latest
+
+
+class MatchTable:
+    __slots__ = ("fixtures", "long", "teams")
+
+    def __init__(self, fixtures: pa.Table, long: pa.Table, teams: pa.Table):
+        self.fixtures = fixtures
+        self.long = long
+        self.teams = teams
+
+    def __len__(self) -> int:
+        return self.fixtures.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        return self.fixtures.nbytes + self.long.nbytes + self.teams.nbytes
+
+    # ---------- bygning ----------
+    @classmethod
+    def build(cls, src) -> "MatchTable":
+        """Fra Arrow-tabel/DataFrame med SOURCE_COLUMNS (kun kampe med resultat)."""
+        if isinstance(src, pd.DataFrame):
+            src = pa.Table.from_pandas(src[SOURCE_COLUMNS], preserve_index=False)
+        src = src.filter(pc.and_(pc.is_valid(src["home_goals"]), pc.is_valid(src["away_goals"])))
+        src = src.sort_by([("date", "ascending"), ("fixture_id", "ascending")])
+        n = src.num_rows
+        date = src["date"].cast(pa.timestamp("ms", tz="UTC")).combine_chunks()
+        dates = date.cast(pa.int64()).to_numpy()
+        ids = np.concatenate([_np(src["home_id"]), _np(src["away_id"])])
+        names = np.concatenate([src["home"].to_numpy(zero_copy_only=False),
+                                src["away"].to_numpy(zero_copy_only=False)])
+        if pd.isna(ids).any():   # ældre data uden hold-id'er: fald tilbage til navne
+            ids = names
+        codes, uniq, team_names = _team_dictionary(ids, names, np.concatenate([dates, dates]))
+        if ids is names:
+            uniq = np.full(len(uniq), -1, dtype=np.int64)
+        home, away = codes[:n], codes[n:]
+        hg = _np(src["home_goals"]).astype(np.int8)
+        ag = _np(src["away_goals"]).astype(np.int8)
+
+        fixtures = pa.table({
+            "fixture_id": src["fixture_id"].cast(pa.int64()).combine_chunks(),
+            "date": date,
+            "league_id": src["league_id"].cast(pa.int32()).combine_chunks(),
+            "season": src["season"].cast(pa.int16()).combine_chunks(),
+            "home": home, "away": away, "home_goals": hg, "away_goals": ag,
+        }, schema=FIXTURES_SCHEMA)
+
+        rows = np.arange(n, dtype=np.int32)
+        fix_row = np.concatenate([rows, rows])
+        team = np.concatenate([home, away])
+        order = np.lexsort((fix_row, np.concatenate([dates, dates]), team))   # hold, dato, kamp
+        gf = np.concatenate([hg, ag])[order]
+        ga = np.concatenate([ag, hg])[order]
+        long = pa.table({
+            "team": team[order],
+            "opp": np.concatenate([away, home])[order],
+            "fix_row": fix_row[order],
+            "side": (order >= n).astype(np.int8),
+            "date": pa.array(np.concatenate([dates, dates])[order], pa.int64()).cast(LONG_SCHEMA.field("date").type),
+            "gf": gf, "ga": ga,
+            "pts": np.where(gf > ga, 3, np.where(gf == ga, 1, 0)).astype(np.int8),
+        }, schema=LONG_SCHEMA)
+        teams = pa.table({"code": np.arange(len(uniq), dtype=np.int32), "team_id": uniq,
+                          "name": pa.array(team_names, pa.string())}, schema=TEAMS_SCHEMA)
+        return cls(fixtures, long, teams)
+
+    # ---------- udsnit ----------
+    def select(self, *, league_id=None, seasons=None, date_from=None, date_to=None) -> "MatchTable":
+        """Delmængde af kampe; long-tabellens (hold, dato)-orden bevares uden ny sortering."""
+        keep = np.ones(len(self), dtype=bool)
+        if league_id is not None:
+            keep &= np.isin(_np(self.fixtures["league_id"]), np.atleast_1d(league_id))
+        if seasons is not None:
+            keep &= np.isin(_np(self.fixtures["season"]), np.atleast_1d(seasons))
+        if date_from is not None or date_to is not None:
+            d = _np(self.fixtures["date"]).astype("datetime64[ms]").astype(np.int64)
+            if date_from is not None:
+                keep &= d >= pd.Timestamp(date_from).value // 1_000_000
+            if date_to is not None:
+                keep &= d < pd.Timestamp(date_to).value // 1_000_000
+        if keep.all():
+            return self
+        new_row = np.cumsum(keep, dtype=np.int64) - 1
+        fix_row = _np(self.long["fix_row"])
+        lkeep = keep[fix_row]
+        long = self.long.filter(pa.array(lkeep))
+        long = long.set_column(long.schema.get_field_index("fix_row"), "fix_row",
+                               pa.array(new_row[fix_row[lkeep]].astype(np.int32)))
+        return MatchTable(self.fixtures.filter(pa.array(keep)), long, self.teams)
+
+    # ---------- forbrug ----------
+    def team_names(self) -> pd.Index:
+        return pd.Index(self.teams["name"].to_pylist())
+
+    def frame(self) -> pd.DataFrame:
+        """Fixtures som DataFrame; home/away som Categorical med holdnavne (ingen objekt-strenge pr. række)."""
+        names = self.team_names()
+        df = pd.DataFrame({c: _np(self.fixtures[c]) for c in ("fixture_id", "league_id", "season",
+                                                               "home_goals", "away_goals")})
+        df.insert(1, "date", self.fixtures["date"].to_pandas())
+        df.insert(4, "home", pd.Categorical.from_codes(_np(self.fixtures["home"]), categories=names))
+        df.insert(5, "away", pd.Categorical.from_codes(_np(self.fixtures["away"]), categories=names))
+        return df
+
+    def team_matches(self) -> TeamMatches:
+        """features.TeamMatches direkte fra long-tabellen (allerede sorteret)."""
+        order = _np(self.long["side"]).astype(np.int64) * len(self) + _np(self.long["fix_row"])
+        return TeamMatches.from_sorted(len(self), order, _np(self.long["team"]),
+                                       _np(self.long["gf"]), _np(self.long["ga"]))
+
+    # ---------- cache ----------
+    def save(self, cache_dir: Path = CACHE_DIR, signature: str | None = None) -> Path:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for name in ("fixtures", "long", "teams"):
+            tmp = cache_dir / f"{name}.arrow.tmp"
+            tbl = getattr(self, name).combine_chunks()
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, tbl.schema) as w:
+                w.write_table(tbl)
+            tmp.replace(cache_dir / f"{name}.arrow")
+        meta = {"version": CACHE_VERSION, "signature": signature, "fixtures": len(self)}
+        (cache_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        return cache_dir
+
+    @classmethod
+    def load(cls, cache_dir: Path = CACHE_DIR) -> "MatchTable":
+        """Memory-mappet indlæsning: kolonnerne peger direkte ind i filerne (ingen kopi)."""
+        tables = []
+        for name in ("fixtures", "long", "teams"):
+            with pa.memory_map(str(cache_dir / f"{name}.arrow"), "r") as src:
+                tables.append(pa.ipc.open_file(src).read_all())
+        return cls(*tables)
+
+
+def store_signature(store_dir: Path = STORE_DIR) -> str:
+    h = hashlib.sha1()
+    for p in sorted(Path(store_dir).rglob("*.parquet")):
+        st = p.stat()
+        h.update(f"{p.relative_to(store_dir)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def cached_signature(cache_dir: Path = CACHE_DIR) -> str | None:
+    try:
+        meta = json.loads((cache_dir / "meta.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return meta.get("signature") if meta.get("version") == CACHE_VERSION else None
+
+
+def load_match_table(status="FT", store_dir: Path = STORE_DIR, cache_dir: Path = CACHE_DIR,
+                     rebuild: bool = False) -> MatchTable:
+    """Memory-mappet MatchTable; bygges (og caches) kun hvis fixture-store er ændret."""
+    sig = f"{store_signature(store_dir)}:{status}"
+    if not rebuild and cached_signature(cache_dir) == sig:
+        return MatchTable.load(cache_dir)
+    mt = MatchTable.build(read_table(SOURCE_COLUMNS, status=status, store_dir=store_dir))
+    mt.save(cache_dir, sig)
+    return MatchTable.load(cache_dir)
@@ -0,0 +1,399 @@
+"""Lokal stand-in for API-Football til offline tests og benchmarks.
+
+Serverer optagede svar (fra http-cachen i data/cache eller en mappe med JSON-filer)
+og falder ellers tilbage til syntetiske ligaer/sæsoner. Kan simulere paginering,
+429-svar, minut-/dagskvoter og latenstid – med de samme x-ratelimit-* headers som
+det rigtige API, så token-bucket'en i api.py opfører sig som i produktion.
+
+Kør:  python src/mockapi.py --port 8765 --latency-ms 40 --rate-per-min 300
+      APIFOOTBALL_BASE=http://127.0.0.1:8765 APIFOOTBALL_CACHE=0 python src/ingest.py
+"""
+from __future__ import annotations
+import argparse, json, random, sqlite3, threading, time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+from cache import cache_key
+
+SUPERLIGA_ID = 119
+DETAILS = ("events", "lineups", "statistics", "players")
+BOOKMAKERS = ((8, "Bet365"), (6, "Bwin"), (11, "1xBet"))
+ODDS_PAGE = 10   # /odds pagineres altid (10 kampe pr. side som API'et)
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0          # fast svartid pr. kald
+    jitter_ms: float = 0.0           # + uniform(0, jitter)
+    rate_per_min: int = 10_000       # minutkvote (429 når den er brugt)
+    daily_quota: int = 1_000_000
+    p429: float = 0.0                # sandsynlighed for tilfældig 429
+    page_size: int = 0               # 0 = ingen paginering af /fixtures
+    n_leagues: int = 1
+    n_teams: int = 12
+    current_season: int = 2025
+    seed: int = 0
+
+
+class SyntheticData:
+    """Deterministiske API-formede payloads pr. (liga, sæson) – caches i hukommelsen."""
+
+    def __init__(self, cfg: MockConfig):
+        self.cfg = cfg
+        self._fixtures: dict[tuple[int, int], list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def league_ids(self) -> list[int]:
+        return [SUPERLIGA_ID] + [1000 + i for i in range(1, self.cfg.n_leagues)]
+
+    def leagues(self) -> list[dict]:
+        out = []
+        for lid in self.league_ids():
+            name = "Superliga" if lid == SUPERLIGA_ID else f"Mock League {lid}"
+            out.append({
+                "league": {"id": lid, "name": name, "type": "League"},
+                "country": {"name": "Denmark" if lid == SUPERLIGA_ID else "Mockland", "code": "DK"},
+                "seasons": [{"year": y} for y in range(2015, self.cfg.current_season + 1)],
+            })
+        return out
+
+    def fixtures(self, league_id: int, season: int) -> list[dict]:
+        key = (league_id, season)
+        with self._lock:
+            if key not in self._fixtures:
+                self._fixtures[key] = self._build(league_id, season)
+            return self._fixtures[key]
+
+    def _build(self, league_id: int, season: int) -> list[dict]:
+        import pandas as pd
+        from bench_features import synthetic_fixtures
+
+        df = synthetic_fixtures(1, 1, self.cfg.n_teams, seed=self.cfg.seed + league_id * 10_000 + season)
+        df["date"] = df["date"] + pd.DateOffset(years=season - 2000)
+        cutoff = len(df) // 2 if season >= self.cfg.current_season else len(df)
+        league_name = "Superliga" if league_id == SUPERLIGA_ID else f"Mock League {league_id}"
+        teams = {t: league_id * 100 + i for i, t in enumerate(sorted(set(df["home"]) | set(df["away"])))}
+        out = []
+        for i, r in enumerate(df.itertuples(index=False)):
+            played = i < cutoff
+            hg = int(r.home_goals) if played else None
+            ag = int(r.away_goals) if played else None
+            out.append({
+                "fixture": {
+                    "id": int(league_id * 10_000_000 + season * 1000 + i),
+                    "date": r.date.isoformat(),
+                    "status": {"long": "Match Finished" if played else "Not Started",
+                               "short": "FT" if played else "NS"},
+                    "venue": {"name": f"Stadium {r.home}"},
+                },
+                "league": {"id": league_id, "name": league_name, "season": season, "round": r.round},
+                "teams": {"home": {"id": teams[r.home], "name": f"{league_name} {r.home}"},
+                          "away": {"id": teams[r.away], "name": f"{league_name} {r.away}"}},
+                "goals": {"home": hg, "away": ag},
+                "score": {"fulltime": {"home": hg, "away": ag}},
+            })
+        return out
+
+    def fixture(self, fixture_id: int) -> dict | None:
+        """Slå en kamp op ud fra id'et (league * 10^7 + season * 1000 + løbenummer)."""
+        league_id, rest = divmod(fixture_id, 10_000_000)
+        season, i = divmod(rest, 1000)
+        if league_id not in self.league_ids():
+            return None
+        items = self.fixtures(league_id, season)
+        return items[i] if i < len(items) else None
+
+
+def load_recordings(src: Path | None) -> dict[str, bytes]:
+    """Optagede svar: enten http-cachens SQLite eller en mappe med {key}.json."""
+    if src is None or not src.exists():
+        return {}
+    if src.is_dir():
+        return {p.stem: p.read_bytes() for p in src.glob("*.json")}
+    db = sqlite3.connect(str(src))
+    try:
+        return {k: bytes(b) for k, b in db.execute("SELECT key, body FROM responses")}
+    finally:
+        db.close()
+
+
+class MockState:
+    def __init__(self, cfg: MockConfig, recordings: dict[str, bytes]):
+        self.cfg = cfg
+        self.recordings = recordings
+        self.data = SyntheticData(cfg)
+        self.rng = random.Random(cfg.seed)
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.day_count = 0
+        self.n_requests = 0
+        self.n_429 = 0
+
+    def admit(self) -> tuple[bool, dict]:
+        """Minut-/dagskvote; returnerer (ok, rate-limit headers)."""
+        with self.lock:
+            self.n_requests += 1
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_count = now, 0
+            ok = (self.window_count < self.cfg.rate_per_min and self.day_count < self.cfg.daily_quota
+                  and self.rng.random() >= self.cfg.p429)
+            if ok:
+                self.window_count += 1
+                self.day_count += 1
+            else:
+                self.n_429 += 1
+            hdrs = {
+                "x-ratelimit-limit": str(self.cfg.rate_per_min),
+                "x-ratelimit-remaining": str(max(0, self.cfg.rate_per_min - self.window_count)),
+                "x-ratelimit-requests-limit": str(self.cfg.daily_quota),
+                "x-ratelimit-requests-remaining": str(max(0, self.cfg.daily_quota - self.day_count)),
+            }
+            if not ok:
+                hdrs["retry-after"] = f"{max(0.05, 60 - (now - self.window_start)):.2f}" \
+                    if self.window_count >= self.cfg.rate_per_min else "0.1"
+            return ok, hdrs
+
+    # ---------- syntetiske endpoints ----------
+    def respond(self, path: str, q: dict) -> dict:
+        if path == "/status":
+            return _wrap({"account": {"firstname": "mock"}, "time": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        if path == "/leagues":
+            items = self.data.leagues()
+            if "search" in q:
+                items = [i for i in items if q["search"].lower() in i["league"]["name"].lower()]
+            if "country" in q:
+                items = [i for i in items if i["country"]["name"].lower() == q["country"].lower()]
+            if "id" in q:
+                items = [i for i in items if i["league"]["id"] == int(q["id"])]
+            return _wrap(items)
+        if path == "/fixtures":
+            return self._fixtures(q)
+        if path == "/odds":
+            return self._odds(q)
+        if path == "/predictions":
+            fx = self.data.fixture(int(q.get("fixture", 0)))
+            return _wrap([self._prediction(fx)] if fx else [])
+        if path.startswith("/fixtures/"):
+            fx = self.data.fixture(int(q.get("fixture", 0)))
+            return _wrap(self._detail(path, fx) if fx else [])
+        return _wrap([])
+
+    def _fixtures(self, q: dict) -> dict:
+        if "ids" in q:   # som API'et: events/lineups/statistics/players er indlejret pr. kamp
+            items = [fx for fx in map(self.data.fixture, map(int, q["ids"].split("-"))) if fx]
+            return _wrap([{**fx, **{k: self._detail(f"/fixtures/{k}", fx) for k in DETAILS}} for fx in items])
+        if "league" not in q or "season" not in q:
+            return {"errors": {"required": "league and season"}, "response": []}
+        items = self.data.fixtures(int(q["league"]), int(q["season"]))
+        if "status" in q:
+            wanted = set(q["status"].split("-"))
+            items = [fx for fx in items if fx["fixture"]["status"]["short"] in wanted]
+        if "from" in q:
+            items = [fx for fx in items if fx["fixture"]["date"][:10] >= q["from"]]
+        if "to" in q:
+            items = [fx for fx in items if fx["fixture"]["date"][:10] <= q["to"]]
+        if "last" in q:
+            items = [fx for fx in items if fx["fixture"]["status"]["short"] == "FT"][-int(q["last"]):][::-1]
+        if "next" in q:
+            items = [fx for fx in items if fx["fixture"]["status"]["short"] == "NS"][:int(q["next"])]
+        if self.cfg.page_size:
+            total = max(1, -(-len(items) // self.cfg.page_size))
+            page = int(q.get("page", 1))
+            lo = (page - 1) * self.cfg.page_size
+            return _wrap(items[lo:lo + self.cfg.page_size], page, total)
+        return _wrap(items)
+
+    def _odds(self, q: dict) -> dict:
+        """Pre-match 1X2-odds; ét snapshot pr. kamp, der skifter hver time (gentagne kørsler → ny historik)."""
+        if "fixture" in q:
+            items = [fx for fx in [self.data.fixture(int(q["fixture"]))] if fx]
+        elif "league" in q and "season" in q:
+            items = self.data.fixtures(int(q["league"]), int(q["season"]))
+        else:
+            return {"errors": {"required": "fixture or league and season"}, "response": []}
+        total = max(1, -(-len(items) // ODDS_PAGE))
+        page = int(q.get("page", 1))
+        hour = int(time.time() // 3600)
+        return _wrap([self._odds_item(fx, hour) for fx in items[(page - 1) * ODDS_PAGE:page * ODDS_PAGE]],
+                     page, total)
+
+    @staticmethod
+    def _market(fx: dict) -> tuple[float, float, float]:
+        rnd = random.Random(fx["fixture"]["id"])
+        ph, pd_ = rnd.uniform(0.3, 0.6), rnd.uniform(0.2, 0.3)
+        return ph, pd_, 1 - ph - pd_
+
+    def _odds_item(self, fx: dict, hour: int) -> dict:
+        kickoff = datetime.fromisoformat(fx["fixture"]["date"])
+        rnd = random.Random(fx["fixture"]["id"] * 7919 + hour)
+        update = kickoff - timedelta(hours=rnd.randint(1, 72))
+        books = []
+        for bid, name in BOOKMAKERS:
+            margin = 1.04 + rnd.uniform(0, 0.05)
+            drift = rnd.uniform(-0.02, 0.02)
+            ph, pd_, pa = self._market(fx)
+            ph, pa = ph + drift, pa - drift
+            books.append({"id": bid, "name": name, "bets": [
+                {"id": 1, "name": "Match Winner",
+                 "values": [{"value": v, "odd": f"{1 / (p * margin):.2f}"}
+                            for v, p in (("Home", ph), ("Draw", pd_), ("Away", pa))]},
+                {"id": 5, "name": "Goals Over/Under", "values": [{"value": "Over 2.5", "odd": "1.90"},
+                                                                 {"value": "Under 2.5", "odd": "1.90"}]}]})
+        return {"league": {"id": fx["league"]["id"], "season": fx["league"]["season"]},
+                "fixture": {"id": fx["fixture"]["id"], "timezone": "UTC", "date": fx["fixture"]["date"]},
+                "update": update.isoformat(), "bookmakers": books}
+
+    def _prediction(self, fx: dict) -> dict:
+        ph, pd_, pa = self._market(fx)
+        pct = [round(100 * p / 5) * 5 for p in (ph, pd_, pa)]   # API'et runder til hele 5 %
+        return {"predictions": {"winner": {"id": fx["teams"]["home"]["id"], "name": fx["teams"]["home"]["name"]},
+                                "win_or_draw": True, "advice": "Double chance : home or draw",
+                                "percent": {"home": f"{pct[0]}%", "draw": f"{pct[1]}%", "away": f"{pct[2]}%"}},
+                "league": fx["league"], "teams": fx["teams"]}
+
+    def _detail(self, path: str, fx: dict) -> list:
+        fid = fx["fixture"]["id"]
+        if fx["fixture"]["status"]["short"] != "FT":
+            return []
+        rnd = random.Random(fid)
+        teams = [fx["teams"]["home"], fx["teams"]["away"]]
+        squad = {t["id"]: [t["id"] * 100 + k for k in range(16)] for t in teams}
+        if path == "/fixtures/lineups":
+            return [{"team": t, "formation": "4-4-2", "coach": {"id": t["id"] * 10, "name": f"Coach {t['id']}"},
+                     "startXI": [{"player": {"id": pid, "name": f"P{pid}", "number": k + 1,
+                                             "pos": "GDDDDMMMMFF"[k], "grid": f"{k // 4 + 1}:{k % 4 + 1}"}}
+                                 for k, pid in enumerate(squad[t["id"]][:11])],
+                     "substitutes": [{"player": {"id": pid, "name": f"P{pid}", "number": 12 + k, "pos": "M",
+                                                 "grid": None}} for k, pid in enumerate(squad[t["id"]][11:])]}
+                    for t in teams]
+        if path == "/fixtures/events":
+            goals = [0] * fx["goals"]["home"] + [1] * fx["goals"]["away"]
+            cards = [rnd.choice((0, 1)) for _ in range(rnd.randint(0, 4))]
+            evs = [(side, "Goal", "Normal Goal") for side in goals] + [(side, "Card", "Yellow Card") for side in cards]
+            return sorted(({"time": {"elapsed": rnd.randint(1, 90), "extra": None}, "team": teams[side],
+                            "player": {"id": rnd.choice(squad[teams[side]["id"]]), "name": None},
+                            "assist": {"id": None, "name": None}, "type": typ, "detail": det, "comments": None}
+                           for side, typ, det in evs), key=lambda e: e["time"]["elapsed"])
+        if path == "/fixtures/statistics":
+            return [{"team": t, "statistics": [{"type": "Shots on Goal", "value": rnd.randint(0, 10)},
+                                               {"type": "Total Shots", "value": rnd.randint(5, 25)},
+                                               {"type": "Ball Possession", "value": f"{rnd.randint(30, 70)}%"},
+                                               {"type": "Red Cards", "value": None}]}
+                    for t in teams]
+        if path == "/fixtures/players":
+            return [{"team": t, "players": [
+                {"player": {"id": pid, "name": f"P{pid}"},
+                 "statistics": [{"games": {"minutes": 90, "rating": f"{rnd.uniform(5.5, 8.5):.1f}"},
+                                 "goals": {"total": None, "assists": None},
+                                 "shots": {"total": rnd.randint(0, 4), "on": None},
+                                 "passes": {"total": rnd.randint(10, 80), "key": rnd.randint(0, 3)},
+                                 "tackles": {"total": rnd.randint(0, 5)},
+                                 "cards": {"yellow": 0, "red": 0}}]}
+                for pid in squad[t["id"]][:11]]} for t in teams]
+        return []
+
+
+def _wrap(response, current: int = 1, total: int = 1) -> dict:
+    n = len(response) if isinstance(response, list) else 1
+    return {"get": "", "parameters": {}, "errors": [], "results": n,
+            "paging": {"current": current, "total": total}, "response": response}
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, som det rigtige API
+
+        def do_GET(self):
+            cfg = state.cfg
+            if cfg.latency_ms or cfg.jitter_ms:
+                time.sleep((cfg.latency_ms + state.rng.uniform(0, cfg.jitter_ms)) / 1000)
+            url = urlsplit(self.path)
+            q = dict(parse_qsl(url.query))
+            ok, hdrs = state.admit()
+            if not ok:
+                body = json.dumps({"errors": {"rateLimit": "Too many requests"}}).encode()
+                return self._send(429, body, hdrs)
+            body = state.recordings.get(cache_key(url.path, q))
+            if body is None:
+                body = json.dumps(state.respond(url.path, q), ensure_ascii=False).encode("utf-8")
+            self._send(200, body, hdrs)
+
+        def _send(self, code: int, body: bytes, hdrs: dict):
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in hdrs.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class MockServer:
+    """Mock-API i en baggrundstråd: `with MockServer(cfg) as srv: srv.base_url ...`"""
+
+    def __init__(self, cfg: MockConfig | None = None, recordings: Path | None = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.state = MockState(cfg or MockConfig(), load_recordings(recordings))
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokal mock af API-Football")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", type=Path, help="http_cache.sqlite eller mappe med {key}.json")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-per-min", type=int, default=10_000)
+    parser.add_argument("--daily-quota", type=int, default=1_000_000)
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument("--leagues", type=int, default=1)
+    parser.add_argument("--teams", type=int, default=12)
+    args = parser.parse_args()
+
+    cfg = MockConfig(args.latency_ms, args.jitter_ms, args.rate_per_min, args.daily_quota, args.p429,
+                     args.page_size, args.leagues, args.teams)
+    srv = MockServer(cfg, args.recordings, args.host, args.port)
+    print(f"🧪 Mock API-Football på {srv.base_url}  ({len(srv.state.recordings)} optagede svar)")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+        print(f"\n{srv.state.n_requests} kald, {srv.state.n_429} × 429")
+
+
+if __name__ == "__main__":
+    main()
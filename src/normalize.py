@@ -0,0 +1,154 @@
+"""Streaming normalisering af rå /fixtures NDJSON → typede Arrow record batches.
+
+pyarrow's JSON-læser parser filen i blokke af fast størrelse direkte til nested
+structs (fixture/league/teams/goals/score) med et fast skema; felterne trækkes
+ud kolonnevis med pyarrow.compute, og batches skrives til fixture-store én ad
+gangen (flettet i datoorden, se store._sorted_batches). Hukommelsen er dermed
+bundet af blokstørrelsen, ikke filstørrelsen.
+"""
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pyarrow as pa
+import pyarrow.json as pj
+import pyarrow.compute as pc
+from store import FIXTURE_SCHEMA, STORE_DIR, write_fixtures
+
+BLOCK_SIZE = 4 * 1024 * 1024  # bytes pr. parse-blok
+
+_team = pa.struct([("id", pa.int64()), ("name", pa.string())])
+_hg = pa.struct([("home", pa.int16()), ("away", pa.int16())])
+
+# kun de felter vi bruger – resten af API-svaret ignoreres under parsning
+RAW_SCHEMA = pa.schema([
+    ("fixture", pa.struct([
+        ("id", pa.int64()),
+        ("date", pa.string()),
+        ("status", pa.struct([("short", pa.string())])),
+        ("venue", pa.struct([("name", pa.string())])),
+    ])),
+    ("league", pa.struct([
+        ("id", pa.int32()),
+        ("name", pa.string()),
+        ("season", pa.int32()),
+        ("round", pa.string()),
+    ])),
+    ("teams", pa.struct([("home", _team), ("away", _team)])),
+    ("goals", _hg),
+    ("score", pa.struct([("fulltime", _hg)])),
+])
+
+# output-kolonne → sti ind i RAW_SCHEMA
+FIELD_PATHS = {
+    "fixture_id":    ("fixture", "id"),
+    "date":          ("fixture", "date"),
+    "status":        ("fixture", "status", "short"),
+    "venue":         ("fixture", "venue", "name"),
+    "league_id":     ("league", "id"),
+    "league":        ("league", "name"),
+    "season":        ("league", "season"),
+    "round":         ("league", "round"),
+    "home_id":       ("teams", "home", "id"),
+    "home":          ("teams", "home", "name"),
+    "away_id":       ("teams", "away", "id"),
+    "away":          ("teams", "away", "name"),
+    "home_goals":    ("goals", "home"),
+    "away_goals":    ("goals", "away"),
+    "fulltime_home": ("score", "fulltime", "home"),
+    "fulltime_away": ("score", "fulltime", "away"),
+}
+
+
+def _extract(batch, path) -> pa.Array:
+    arr = batch.column(path[0])
+    for name in path[1:]:
+        arr = pc.struct_field(arr, name)
+    return arr
+
+
+def flatten(batch) -> pa.RecordBatch:
+    """Nested rå batch → flad batch i FIXTURE_SCHEMA (ingen Python-dicts pr. række)."""
+    cols = []
+    for field in FIXTURE_SCHEMA:
+        arr = _extract(batch, FIELD_PATHS[field.name])
+        if pa.types.is_timestamp(field.type):
+            # ISO-8601 med offset; parse i µs og trunkér (evt. brøkdele af sekunder)
+            arr = pc.cast(arr, pa.timestamp("us", tz="UTC"))
+            cols.append(pc.cast(arr, field.type, safe=False))
+        else:
+            cols.append(pc.cast(arr, field.type))
+    return pa.RecordBatch.from_arrays(cols, schema=FIXTURE_SCHEMA)
+
+
+def iter_raw_batches(path: Path, block_size: int = BLOCK_SIZE):
+    reader = pj.open_json(
+        path,
+        read_options=pj.ReadOptions(block_size=block_size),
+        parse_options=pj.ParseOptions(explicit_schema=RAW_SCHEMA, unexpected_field_behavior="ignore"),
+    )
+    for batch in reader:
+        if batch.num_rows:
+            yield batch
+
+
+def iter_fixture_batches(path: Path, block_size: int = BLOCK_SIZE, keep=None):
+    """Flade batches fra én NDJSON-fil; `keep` er en evt. bool-maske over hele filen."""
+    offset = 0
+    for raw in iter_raw_batches(path, block_size):
+        flat = flatten(raw)
+        if keep is not None:
+            flat = flat.filter(pa.array(keep[offset:offset + flat.num_rows]))
+        offset += raw.num_rows
+        yield flat
+
+
+def last_occurrence_mask(ids: np.ndarray) -> np.ndarray | None:
+    """Maske der kun beholder sidste forekomst af hvert fixture_id (None hvis ingen dubletter)."""
+    _, first_in_rev = np.unique(ids[::-1], return_index=True)
+    if len(first_in_rev) == len(ids):
+        return None
+    mask = np.zeros(len(ids), dtype=bool)
+    mask[len(ids) - 1 - first_in_rev] = True
+    return mask
+
+
+def table_from_items(items) -> pa.Table:
+    """Allerede parsede API-items (liste af dicts) → flad Arrow-tabel."""
+    raw = pa.Table.from_pylist(list(items), schema=RAW_SCHEMA)
+    batches = [flatten(b) for b in raw.to_batches()]
+    return pa.Table.from_batches(batches, schema=FIXTURE_SCHEMA)
+
+
+def normalize_ndjson(path: Path, store_dir: Path = STORE_DIR, block_size: int = BLOCK_SIZE) -> int:
+    """Stream én rå NDJSON-fil ind i fixture-store; returnerer antal skrevne rækker.
+
+    Inkrementelle kørsler appender opdaterede kampe til den rå fil, så samme
+    fixture_id kan optræde flere gange – den sidste linje vinder. Id'erne
+    samles under første gennemløb (8 bytes/række); kun hvis der findes
+    dubletter, streames filen en gang til med en maske.
+    """
+    ids = []
+
+    def first_pass():
+        for batch in iter_fixture_batches(path, block_size):
+            ids.append(batch.column("fixture_id").to_numpy(zero_copy_only=False))
+            yield batch
+
+    n = _write_batches(first_pass(), store_dir)
+    all_ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+    keep = last_occurrence_mask(all_ids)
+    if keep is not None:
+        n = _write_batches(iter_fixture_batches(path, block_size, keep), store_dir)
+    return n
+
+
+def _write_batches(batches, store_dir: Path) -> int:
+    counted = {"n": 0}
+
+    def counting():
+        for b in batches:
+            counted["n"] += b.num_rows
+            yield b
+
+    write_fixtures(pa.RecordBatchReader.from_batches(FIXTURE_SCHEMA, counting()), store_dir)
+    return counted["n"]
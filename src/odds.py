@@ -0,0 +1,400 @@
+"""Odds- og prediction-snapshots fra API-Football + point-in-time (as-of) join mod modellens output.
+
+Ingestion (`odds.py ingest`)
+    /odds?league=&season= (pagineret, 10 kampe pr. side) og evt. /predictions?fixture=
+    for kommende kampe foldes ud én gang til flade rækker. Odds bliver én række pr.
+    (kamp, bookmaker, snapshot) med 1X2-odds (bet id 1, "Match Winner"), og
+    predictions én række pr. (kamp, hentetidspunkt). Rækkerne tilføjes som nye
+    parquet-filer i data/odds/{snapshots,predictions}/league_id=…/season=…/.
+    Eksisterende filer røres aldrig. Hver fil er sorteret på ts, og snapshots der
+    allerede findes (samme kamp, bookmaker og ts) springes over. En gentaget kørsel
+    tilføjer derfor kun nye kurser.
+
+Join-indeks (`AsOfIndex`)
+    Snapshots bliver til én konsensusrække pr. (fixture_id, ts): overround fjernes
+    pr. bookmaker, sandsynlighederne midles, og den bedste odds pr. udfald gemmes.
+    Rækkerne sorteres på en int64-nøgle (kamp-kode << 42 | ts i ms). Et as-of-opslag
+    for tusindvis af (fixture_id, tidspunkt)-par er så én np.searchsorted: "seneste
+    snapshot ≤ t for den kamp", svarende til pd.merge_asof(by="fixture_id"), men
+    uden at sortere forespørgslerne og uden at læse JSON igen. Indekset caches i
+    data/cache/odds_index/ og bygges kun om når snapshot-tabellen har ændret sig.
+
+Edge (`odds.py edge`)
+    Modellens p_home_win (predict.py, client.py eller backtest.py) joines mod
+    markedet som det så ud --lead-hours før kickoff: edge = p_model − p_market og
+    EV ved at spille hjemmesejr til bedste odds. For afsluttede kampe sammenlignes
+    Brier og ROI for de kampe hvor edge > --threshold.
+
+Kør:  python src/odds.py ingest [--league 119] [--season 2025] [--predictions]
+      python src/odds.py edge --preds data/parquet/backtest_logreg_C1_w5.parquet [--lead-hours 1]
+"""
+from __future__ import annotations
+import argparse, json
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from cache import current_season
+from store import PARTITIONING
+
+ROOT = Path(__file__).resolve().parents[1]
+ODDS_DIR = ROOT / "data" / "odds" / "snapshots"
+PRED_DIR = ROOT / "data" / "odds" / "predictions"
+INDEX_DIR = ROOT / "data" / "cache" / "odds_index"
+SEASON = current_season()   # APIFOOTBALL_SEASON eller ud fra datoen (skifter i juli)
+LEAGUE_ID = 119
+MATCH_WINNER = 1          # bet id for 1X2
+TS_BITS = 42              # ms siden 1970 < 2^42 frem til år 2109; kamp-koden får de øvre 21 bit
+
+ODDS_SCHEMA = pa.schema([
+    ("fixture_id", pa.int64()),
+    ("ts", pa.timestamp("ms", tz="UTC")),           # bookmakerens "update"
+    ("fetched_at", pa.timestamp("ms", tz="UTC")),
+    ("league_id", pa.int32()),
+    ("season", pa.int32()),
+    ("bookmaker_id", pa.int32()),
+    ("bookmaker", pa.string()),
+    ("odd_home", pa.float64()),
+    ("odd_draw", pa.float64()),
+    ("odd_away", pa.float64()),
+])
+
+PRED_SCHEMA = pa.schema([
+    ("fixture_id", pa.int64()),
+    ("ts", pa.timestamp("ms", tz="UTC")),           # hentetidspunkt (API'et giver ikke et eget)
+    ("league_id", pa.int32()),
+    ("season", pa.int32()),
+    ("api_home", pa.float64()),
+    ("api_draw", pa.float64()),
+    ("api_away", pa.float64()),
+    ("advice", pa.string()),
+])
+
+ODDS_KEY = ["fixture_id", "bookmaker_id", "ts"]
+PRED_KEY = ["fixture_id", "ts"]
+
+
+# ---------- udfoldning (én gang, ved ingestion) ----------
+def _ts(s: str | None):
+    return pd.Timestamp(s).tz_convert("UTC") if s else None
+
+
+def flatten_odds(items, fetched_at: datetime) -> pa.Table:
+    """/odds-items → én række pr. (kamp, bookmaker) med 1X2-odds; andre bets ignoreres."""
+    cols = {n: [] for n in ODDS_SCHEMA.names}
+    for it in items:
+        fx, lg = it.get("fixture") or {}, it.get("league") or {}
+        ts = _ts(it.get("update")) or fetched_at
+        for bm in it.get("bookmakers") or []:
+            bet = next((b for b in bm.get("bets") or [] if b.get("id") == MATCH_WINNER), None)
+            if bet is None:
+                continue
+            odd = {v.get("value"): float(v["odd"]) for v in bet.get("values") or [] if v.get("odd")}
+            if not {"Home", "Draw", "Away"} <= odd.keys():
+                continue
+            for name, val in (("fixture_id", fx.get("id")), ("ts", ts), ("fetched_at", fetched_at),
+                              ("league_id", lg.get("id")), ("season", lg.get("season")),
+                              ("bookmaker_id", bm.get("id")), ("bookmaker", bm.get("name")),
+                              ("odd_home", odd["Home"]), ("odd_draw", odd["Draw"]), ("odd_away", odd["Away"])):
+                cols[name].append(val)
+    return pa.table(cols, schema=ODDS_SCHEMA)
+
+
+def flatten_predictions(items_by_fixture: dict, league_id: int, season: int, fetched_at: datetime) -> pa.Table:
+    """{fixture_id: /predictions-response} → én række pr. kamp med API'ets procenter (0–1)."""
+    pct = lambda s: float(str(s).rstrip("%")) / 100 if s not in (None, "") else None
+    cols = {n: [] for n in PRED_SCHEMA.names}
+    for fid, resp in items_by_fixture.items():
+        if not resp:
+            continue
+        pr = resp[0].get("predictions") or {}
+        p = pr.get("percent") or {}
+        for name, val in (("fixture_id", fid), ("ts", fetched_at), ("league_id", league_id), ("season", season),
+                          ("api_home", pct(p.get("home"))), ("api_draw", pct(p.get("draw"))),
+                          ("api_away", pct(p.get("away"))), ("advice", pr.get("advice"))):
+            cols[name].append(val)
+    return pa.table(cols, schema=PRED_SCHEMA)
+
+
+# ---------- append-only tabel ----------
+def snapshots_dataset(root: Path, schema: pa.Schema) -> ds.Dataset:
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=schema)
+
+
+def append_snapshots(table: pa.Table, root: Path, key: list[str]) -> int:
+    """Tilføj nye rækker som ny(e) fil(er); rækker hvis nøgle allerede findes springes over."""
+    if table.num_rows == 0:
+        return 0
+    if root.exists():
+        ids = pc.unique(table["fixture_id"])
+        old = snapshots_dataset(root, table.schema).to_table(columns=key, filter=pc.field("fixture_id").isin(ids))
+        if old.num_rows:
+            table = table.join(old, key, join_type="left anti")
+    if table.num_rows == 0:
+        return 0
+    table = table.sort_by([("ts", "ascending"), ("fixture_id", "ascending")])
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    ds.write_dataset(table, root, format="parquet", partitioning=PARTITIONING,
+                     basename_template=f"part-{stamp}-{{i}}.parquet",
+                     existing_data_behavior="overwrite_or_ignore")   # nye filnavne → intet overskrives
+    return table.num_rows
+
+
+def read_snapshots(root: Path = ODDS_DIR, schema: pa.Schema = ODDS_SCHEMA, league_id=None, seasons=None) -> pa.Table:
+    if not Path(root).exists():
+        raise FileNotFoundError(f"Ingen snapshots i {root} – kør odds.py ingest først")
+    filt = None
+    if league_id is not None:
+        filt = pc.field("league_id").isin(np.atleast_1d(league_id).tolist())
+    if seasons is not None:
+        f = pc.field("season").isin(np.atleast_1d(seasons).tolist())
+        filt = f if filt is None else filt & f
+    return snapshots_dataset(root, schema).to_table(filter=filt)
+
+
+# ---------- as-of indeks ----------
+class AsOfIndex:
+    """Værdier pr. (fixture_id, ts) sorteret på én int64-nøgle; asof() er en vektoriseret merge_asof."""
+    __slots__ = ("fixtures", "keys", "values")
+
+    def __init__(self, fixtures: np.ndarray, keys: np.ndarray, values: pd.DataFrame):
+        self.fixtures = fixtures     # sorterede unikke fixture_id'er (kode = position)
+        self.keys = keys             # kode << TS_BITS | ts_ms, stigende
+        self.values = values         # én række pr. nøgle (inkl. fixture_id og ts)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AsOfIndex":
+        """df med fixture_id, ts og værdikolonner; (fixture_id, ts) skal være unik."""
+        ts = df["ts"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        fixtures, code = np.unique(df["fixture_id"].to_numpy(np.int64), return_inverse=True)
+        if len(fixtures) >= 1 << (63 - TS_BITS):
+            raise ValueError(f"For mange kampe til nøglen: {len(fixtures)}")
+        keys = (code.astype(np.int64) << TS_BITS) | ts
+        order = np.argsort(keys, kind="stable")
+        return cls(fixtures, keys[order], df.iloc[order].reset_index(drop=True))
+
+    def asof(self, fixture_ids, when) -> pd.DataFrame:
+        """Seneste række med ts ≤ when for hver (fixture_id, when); NaN-række hvis ingen findes."""
+        fids = np.asarray(fixture_ids, dtype=np.int64)
+        t = pd.DatetimeIndex(pd.to_datetime(when, utc=True)).as_unit("ms").asi8
+        code = np.searchsorted(self.fixtures, fids)
+        known = code < len(self.fixtures)
+        known[known] = self.fixtures[code[known]] == fids[known]
+        q = (code.astype(np.int64) << TS_BITS) | t
+        pos = np.searchsorted(self.keys, q, side="right") - 1
+        hit = known & (pos >= 0)
+        hit[hit] = (self.keys[pos[hit]] >> TS_BITS) == code[hit]      # samme kamp, ikke forrige kamps sidste række
+        out = self.values.iloc[np.where(hit, pos, 0)].reset_index(drop=True)
+        out = out.astype({c: "float64" for c in out.columns if out[c].dtype.kind in "iub"})
+        out.loc[~hit, :] = np.nan
+        return out
+
+    # ---------- cache ----------
+    def save(self, path: Path, signature: str | None = None) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        self.values.to_parquet(tmp, index=False)
+        tmp.replace(path)
+        path.with_suffix(".json").write_text(json.dumps({"signature": signature, "rows": len(self)}),
+                                             encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "AsOfIndex":
+        return cls.from_frame(pd.read_parquet(path))   # allerede sorteret → argsort er billig
+
+
+def market_consensus(odds: pa.Table | pd.DataFrame) -> pd.DataFrame:
+    """Én række pr. (fixture_id, ts): overround-fri gennemsnitssandsynlighed, bedste odds, antal bookmakere."""
+    df = odds.to_pandas() if isinstance(odds, pa.Table) else odds
+    inv = 1.0 / df[["odd_home", "odd_draw", "odd_away"]].to_numpy()
+    over = inv.sum(axis=1)
+    p = inv / over[:, None]
+    work = pd.DataFrame({"fixture_id": df["fixture_id"].to_numpy(), "ts": df["ts"].to_numpy(),
+                         "p_home": p[:, 0], "p_draw": p[:, 1], "p_away": p[:, 2], "overround": over,
+                         "best_home": df["odd_home"].to_numpy(), "best_draw": df["odd_draw"].to_numpy(),
+                         "best_away": df["odd_away"].to_numpy()})
+    g = work.groupby(["fixture_id", "ts"], sort=False)
+    out = g.agg(n_books=("p_home", "size"), p_home=("p_home", "mean"), p_draw=("p_draw", "mean"),
+                p_away=("p_away", "mean"), overround=("overround", "mean"), best_home=("best_home", "max"),
+                best_draw=("best_draw", "max"), best_away=("best_away", "max")).reset_index()
+    out["ts"] = pd.to_datetime(out["ts"], utc=True)
+    return out
+
+
+def load_index(odds_dir: Path = ODDS_DIR, index_dir: Path = INDEX_DIR, rebuild: bool = False) -> AsOfIndex:
+    """Markedets as-of indeks; genbygges kun hvis snapshot-tabellen har ændret sig."""
+    from matchtable import store_signature
+
+    path = index_dir / "market.parquet"
+    sig = store_signature(odds_dir)
+    meta = path.with_suffix(".json")
+    if not rebuild and path.exists() and meta.exists() and \
+            json.loads(meta.read_text(encoding="utf-8")).get("signature") == sig:
+        return AsOfIndex.load(path)
+    idx = AsOfIndex.from_frame(market_consensus(read_snapshots(odds_dir)))
+    idx.save(path, sig)
+    return idx
+
+
+# ---------- edge ----------
+def edge_table(preds: pd.DataFrame, market: AsOfIndex, lead: pd.Timedelta = pd.Timedelta(0),
+               api: AsOfIndex | None = None) -> pd.DataFrame:
+    """preds (fixture_id, date, p_home_win) + markedet som det så ud `lead` før kickoff."""
+    when = pd.to_datetime(preds["date"], utc=True) - lead
+    m = market.asof(preds["fixture_id"], when)
+    out = preds[["fixture_id", "date"] + [c for c in ("home", "away") if c in preds]].reset_index(drop=True)
+    out["p_model"] = preds["p_home_win"].to_numpy()
+    out["p_market"] = m["p_home"].to_numpy()
+    out["best_home"] = m["best_home"].to_numpy()
+    out["n_books"] = m["n_books"].to_numpy()
+    out["odds_age_h"] = (when.reset_index(drop=True) - m["ts"]).dt.total_seconds() / 3600
+    out["edge"] = out["p_model"] - out["p_market"]
+    out["ev"] = out["p_model"] * out["best_home"] - 1          # forventet gevinst pr. krone på hjemmesejr
+    if api is not None:
+        out["p_api"] = api.asof(preds["fixture_id"], when)["api_home"].to_numpy()
+    return out
+
+
+def edge_summary(t: pd.DataFrame, outcomes: pd.Series | None = None, threshold: float = 0.05) -> dict:
+    """Dækning, gns. edge og – for kampe med resultat – Brier mod markedet og ROI for edge > threshold."""
+    m = t[t["p_market"].notna()]
+    res = {"fixtures": len(t), "with_odds": len(m), "mean_edge": float(m["edge"].mean()) if len(m) else None,
+           "mean_abs_edge": float(m["edge"].abs().mean()) if len(m) else None}
+    if outcomes is not None and len(m):
+        y = m["fixture_id"].map(outcomes)
+        done = y.notna().to_numpy()
+        yy = y[done].to_numpy(dtype=float)
+        mm = m[done]
+        bets = (mm["edge"] > threshold).to_numpy()
+        profit = np.where(yy[bets] == 1, mm["best_home"].to_numpy()[bets] - 1, -1.0)
+        res.update({"settled": int(done.sum()),
+                    "brier_model": float(np.mean((mm["p_model"].to_numpy() - yy) ** 2)) if done.any() else None,
+                    "brier_market": float(np.mean((mm["p_market"].to_numpy() - yy) ** 2)) if done.any() else None,
+                    "bets": int(bets.sum()), "roi": float(profit.mean()) if bets.any() else None})
+    return res
+
+
+# ---------- ingestion ----------
+async def fetch_odds_async(client, league_id: int, season: int) -> list:
+    """Alle sider af /odds for liga+sæson (side 2..total samtidigt), kun 1X2."""
+    import asyncio
+
+    base = {"league": league_id, "season": season, "bet": MATCH_WINNER}
+    js = await client.get("/odds", base)
+    if js.get("errors"):
+        print("⚠️ API errors:", js["errors"])
+        return []
+    total = (js.get("paging") or {}).get("total", 1)
+    rest = await asyncio.gather(*[client.get("/odds", {**base, "page": p}) for p in range(2, total + 1)])
+    return [it for page in [js, *rest] for it in page.get("response", [])]
+
+
+async def fetch_predictions_async(client, fixture_ids) -> dict:
+    import asyncio
+
+    resps = await asyncio.gather(*[client.get("/predictions", {"fixture": fid}) for fid in fixture_ids])
+    return {fid: js.get("response", []) for fid, js in zip(fixture_ids, resps)}
+
+
+def ingest(league_id: int, season: int, predictions: bool = False, max_predictions: int = 20,
+           odds_dir: Path = ODDS_DIR, pred_dir: Path = PRED_DIR) -> dict:
+    import asyncio
+    from api import async_client
+
+    async def go():
+        # /odds ændrer sig løbende → ingen svarcache, ellers gemmer vi det samme snapshot igen og igen
+        async with async_client(concurrency=4, use_cache=False) as client:
+            items = await fetch_odds_async(client, league_id, season)
+            preds = {}
+            if predictions:
+                now = pd.Timestamp.now(tz="UTC")
+                upcoming = sorted({it["fixture"]["id"] for it in items
+                                   if _ts(it["fixture"].get("date")) and _ts(it["fixture"]["date"]) > now})
+                preds = await fetch_predictions_async(client, upcoming[:max_predictions])
+            return items, preds, client.n_requests
+
+    fetched_at = pd.Timestamp.now(tz="UTC").floor("ms")
+    items, preds, calls = asyncio.run(go())
+    odds = flatten_odds(items, fetched_at)
+    n_odds = append_snapshots(odds, odds_dir, ODDS_KEY)
+    n_pred = append_snapshots(flatten_predictions(preds, league_id, season, fetched_at), pred_dir, PRED_KEY) \
+        if preds else 0
+    return {"calls": calls, "fixtures": len(items), "rows": odds.num_rows, "new_odds": n_odds,
+            "new_predictions": n_pred}
+
+
+# ---------- CLI ----------
+def load_preds(path: Path) -> pd.DataFrame:
+    df = pd.read_parquet(path)
+    if "fixture_id" not in df.columns:
+        raise SystemExit(f"{path} mangler fixture_id – gen-kør client.py/predict.py/backtest.py")
+    return df
+
+
+def outcomes_from_store(fixture_ids) -> pd.Series:
+    from store import read_fixtures
+
+    try:
+        df = read_fixtures(["fixture_id", "home_goals", "away_goals"], status="FT")
+    except FileNotFoundError:
+        return pd.Series(dtype=float)
+    df = df[df["fixture_id"].isin(fixture_ids)]
+    return pd.Series((df["home_goals"] > df["away_goals"]).astype(float).to_numpy(), index=df["fixture_id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odds-/prediction-snapshots og model-vs-marked edge")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("ingest", help="hent 1X2-odds (og evt. API-predictions) og tilføj snapshots")
+    i.add_argument("--league", type=int, default=LEAGUE_ID)
+    i.add_argument("--season", type=int, default=SEASON)
+    i.add_argument("--predictions", action="store_true", help="hent også /predictions for kommende kampe")
+    i.add_argument("--max-predictions", type=int, default=20, help="loft over /predictions-kald (ét pr. kamp)")
+    e = sub.add_parser("edge", help="join modellens p_home_win mod markedet (as-of)")
+    e.add_argument("--preds", type=Path, required=True, help="parquet med fixture_id, date, p_home_win")
+    e.add_argument("--lead-hours", type=float, default=1.0, help="markedet som det så ud så mange timer før kickoff")
+    e.add_argument("--threshold", type=float, default=0.05, help="edge-tærskel for ROI-beregningen")
+    e.add_argument("--rebuild", action="store_true", help="byg as-of indekset forfra")
+    e.add_argument("--out", type=Path, help="gem join-resultatet som parquet")
+    args = parser.parse_args()
+
+    if args.cmd == "ingest":
+        r = ingest(args.league, args.season, args.predictions, args.max_predictions)
+        print(f"📈 {r['fixtures']} kampe, {r['rows']} bookmaker-rækker ({r['calls']} kald) → "
+              f"{r['new_odds']} nye odds-snapshots, {r['new_predictions']} nye predictions")
+        print(f"💾 {ODDS_DIR}")
+        return
+
+    import time
+
+    t0 = time.perf_counter()
+    market = load_index(rebuild=args.rebuild)
+    api = None
+    if PRED_DIR.exists():
+        api = AsOfIndex.from_frame(read_snapshots(PRED_DIR, PRED_SCHEMA).to_pandas())
+    t1 = time.perf_counter()
+    preds = load_preds(args.preds)
+    t = edge_table(preds, market, pd.Timedelta(hours=args.lead_hours), api)
+    t2 = time.perf_counter()
+    summary = edge_summary(t, outcomes_from_store(preds["fixture_id"]), args.threshold)
+    print(f"🔎 Indeks: {len(market)} snapshots ({t1 - t0:.2f}s); join af {len(t)} kampe på {(t2 - t1) * 1000:.1f} ms")
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    cols = [c for c in ("date", "home", "away", "p_model", "p_market", "p_api", "edge", "best_home", "odds_age_h")
+            if c in t]
+    print(t[t["p_market"].notna()].sort_values("edge", ascending=False)[cols].head(10)
+          .to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        t.to_parquet(args.out, index=False)
+        print("Gemte:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Inkrementel, leakage-fri feature-state til live forudsigelser.
+
+Hvert hold har en lille ring-buffer (array-baseret, __slots__) med de seneste N
+resultater og løbende summer pr. vindue, så en afsluttet kamp opdateres i O(1)
+og pre-match features for en kommende kamp slås op uden at læse historikken.
+Features svarer præcist til features.rolling_features(..., shift=True).
+
+    fs = FeatureStore.from_history(df_ft)          # eller FeatureStore.load()
+    fs.prematch("Brøndby", "FC København")
+    fs.update("Brøndby", "FC København", 2, 1)     # når kampen er FT
+"""
+from __future__ import annotations
+import math, pickle
+from array import array
+from pathlib import Path
+import pandas as pd
+from features import AGGS, feature_names
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = ROOT / "data" / "state" / "online_features.pkl"
+
+_VALUE_INDEX = {"pts": 0, "gd": 1, "gf": 2, "ga": 3}
+_NAN = float("nan")
+
+
+class TeamForm:
+    """Ring-buffer med de sidste `size` kampe for ét hold + løbende vinduessummer."""
+    __slots__ = ("size", "windows", "decays", "buf", "head", "count", "sums", "ewm_num", "ewm_den")
+
+    def __init__(self, windows=(5,), ewm_spans=()):
+        self.windows = tuple(windows)
+        self.size = max(self.windows) if self.windows else 1
+        self.decays = tuple(1.0 - 2.0 / (s + 1.0) for s in ewm_spans)
+        self.buf = array("d", [0.0] * (4 * self.size))   # [pts, gd, gf, ga] pr. slot
+        self.head = 0                                    # næste slot der skrives
+        self.count = 0
+        self.sums = array("d", [0.0] * (4 * len(self.windows)))
+        self.ewm_num = array("d", [0.0] * (4 * len(self.decays)))
+        self.ewm_den = array("d", [0.0] * len(self.decays))
+
+    def push(self, gf: float, ga: float) -> None:
+        pts = 3.0 if gf > ga else (1.0 if gf == ga else 0.0)
+        vals = (pts, gf - ga, gf, ga)
+        for wi, w in enumerate(self.windows):
+            if self.count >= w:   # værdien der falder ud af dette vindue
+                old = ((self.head - w) % self.size) * 4
+                for j in range(4):
+                    self.sums[wi * 4 + j] -= self.buf[old + j]
+            for j in range(4):
+                self.sums[wi * 4 + j] += vals[j]
+        for di, d in enumerate(self.decays):
+            for j in range(4):
+                self.ewm_num[di * 4 + j] = vals[j] + d * self.ewm_num[di * 4 + j]
+            self.ewm_den[di] = 1.0 + d * self.ewm_den[di]
+        slot = self.head * 4
+        for j in range(4):
+            self.buf[slot + j] = vals[j]
+        self.head = (self.head + 1) % self.size
+        self.count += 1
+
+    def window(self, wi: int, name: str) -> float:
+        col, how = AGGS[name]
+        n = min(self.count, self.windows[wi])
+        if n == 0:
+            return _NAN
+        s = self.sums[wi * 4 + _VALUE_INDEX[col]]
+        return s / n if how == "mean" else s
+
+    def ewm(self, di: int, name: str) -> float:
+        if self.count == 0:
+            return _NAN
+        col, _ = AGGS[name]
+        return self.ewm_num[di * 4 + _VALUE_INDEX[col]] / self.ewm_den[di]
+
+
+class FeatureStore:
+    """Holdtilstande for alle hold; giver pre-match features uden adgang til parquet."""
+
+    def __init__(self, windows=(5,), ewm_spans=()):
+        self.windows = tuple(windows)
+        self.ewm_spans = tuple(ewm_spans)
+        self.teams: dict[str, TeamForm] = {}
+        self.last_fixture_id = None
+        self.last_date = None        # seneste kampdato der er talt med (til catch-up)
+        self.names = feature_names(self.windows, self.ewm_spans)
+
+    def _team(self, name: str) -> TeamForm:
+        tf = self.teams.get(name)
+        if tf is None:
+            tf = self.teams[name] = TeamForm(self.windows, self.ewm_spans)
+        return tf
+
+    def update(self, home: str, away: str, home_goals, away_goals, fixture_id=None, date=None) -> None:
+        """Registrér en afsluttet (FT) kamp – O(1) pr. hold."""
+        hg, ag = float(home_goals), float(away_goals)
+        self._team(home).push(hg, ag)
+        self._team(away).push(ag, hg)
+        if fixture_id is not None:
+            self.last_fixture_id = fixture_id
+        if date is not None and (self.last_date is None or date > self.last_date):
+            self.last_date = date
+
+    def _side(self, team: str) -> list[float]:
+        tf = self.teams.get(team)
+        out = []
+        for wi, w in enumerate(self.windows):
+            out += [tf.window(wi, k) if tf else _NAN for k in AGGS]
+        for di, _ in enumerate(self.ewm_spans):
+            out += [tf.ewm(di, k) if tf else _NAN for k in AGGS]
+        return out
+
+    def prematch(self, home: str, away: str) -> dict:
+        """Features for en kommende kamp (samme navne som rolling_features)."""
+        return dict(zip(self.names, self._side(home) + self._side(away)))
+
+    def prematch_frame(self, fixtures: pd.DataFrame) -> pd.DataFrame:
+        """Pre-match features for en batch kommende kampe (fx next10 fra last10games.py)."""
+        rows = [self._side(h) + self._side(a) for h, a in zip(fixtures["home"], fixtures["away"])]
+        return pd.DataFrame(rows, columns=self.names, index=fixtures.index)
+
+    def extend(self, df: pd.DataFrame) -> int:
+        """Anvend afsluttede kampe (sorteret på dato) i rækkefølge; returnerer antal anvendte."""
+        none = [None] * len(df)
+        fids = df["fixture_id"] if "fixture_id" in df else none
+        dates = df["date"] if "date" in df else none
+        n = 0
+        for h, a, hg, ag, fid, dt in zip(df["home"], df["away"], df["home_goals"], df["away_goals"], fids, dates):
+            if not (math.isnan(float(hg)) or math.isnan(float(ag))):
+                self.update(h, a, hg, ag, fid, dt)
+                n += 1
+        return n
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, windows=(5,), ewm_spans=()) -> "FeatureStore":
+        """Byg tilstand fra afsluttede kampe (forventes sorteret på dato)."""
+        fs = cls(windows, ewm_spans)
+        fs.extend(df)
+        return fs
+
+    def save(self, path: Path = STATE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: Path = STATE_PATH) -> "FeatureStore":
+        with path.open("rb") as f:
+            return pickle.load(f)
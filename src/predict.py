@@ -0,0 +1,153 @@
+"""Scor kommende kampe med seneste gemte model – ingen træning, ingen fuld historik.
+
+Artefaktet fra client.py indeholder modellen, feature-metadata og en
+online.FeatureStore med holdenes form efter sidste træningskamp (og for
+rating-modeller en ratings.RatingEngine efter sidste spilledag). Ved opstart
+indhentes kun FT-kampe spillet siden da (filter skubbes ned i parquet), og
+alle kampe i batchen scores med ét vektoriseret kald (ren NumPy for logistisk
+regression, så sklearn ikke engang importeres).
+
+Kør:  python src/predict.py                    # næste 10 NS-kampe fra fixture-store
+      python src/predict.py --source api       # næste 10 hentet live (som last10games.py)
+      python src/predict.py --input kampe.parquet
+"""
+from __future__ import annotations
+import argparse, time, pickle
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import joblib
+
+ROOT = Path(__file__).resolve().parents[1]
+MODELS_DIR = ROOT / "data" / "models"
+OUT_FILE = ROOT / "data" / "parquet" / "preds_upcoming.parquet"
+LEAGUE_ID = 119   # Superliga – fixture-store kan indeholde flere ligaer efter backfill
+SUPPORTED_VERSIONS = {1}
+
+
+def latest_model(models_dir: Path = MODELS_DIR) -> Path:
+    paths = sorted(models_dir.glob("model_*.joblib"))   # tidsstempel i navnet → leksikografisk = kronologisk
+    if not paths:
+        raise SystemExit(f"Ingen model i {models_dir} – kør client.py først")
+    return paths[-1]
+
+
+class Predictor:
+    """Indlæst artefakt; genbruges til mange batches uden at blive genindlæst."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or latest_model()
+        art = joblib.load(self.path)
+        if art.get("format_version") not in SUPPORTED_VERSIONS:
+            raise SystemExit(f"Ukendt artefakt-version {art.get('format_version')} i {self.path}")
+        self.linear = art["linear"]
+        self._model_pickle = art["model_pickle"]
+        self._model = None
+        self.features = art["features"]
+        self.nan_fill = art["nan_fill"]
+        self.state = art["feature_state"]
+        self.ratings = art.get("rating_state")   # kun modeller med Elo/Dixon-Coles-features
+        self.version = f"{art['trained_at']}_{art['candidate']}"
+
+    @property
+    def model(self):
+        """sklearn-modellen – først unpickled (og sklearn importeret) når den faktisk skal bruges."""
+        if self._model is None:
+            self._model = pickle.loads(self._model_pickle)
+        return self._model
+
+    def proba(self, X: np.ndarray) -> np.ndarray:
+        if self.linear is not None:   # logistisk regression: ren NumPy, ingen sklearn-import
+            z = X @ self.linear["coef"] + self.linear["intercept"]
+            return 1.0 / (1.0 + np.exp(-z))
+        return self.model.predict_proba(X)[:, 1]
+
+    def catch_up(self, league_id=LEAGUE_ID) -> int:
+        """Anvend FT-kampe spillet efter modellens sidste træningskamp."""
+        from store import read_fixtures
+
+        cols = ["fixture_id", "date", "league_id", "season", "home", "away", "home_goals", "away_goals"]
+        last = self.state.last_date
+        if self.ratings is not None and self.ratings.last_date is not None:
+            last = self.ratings.last_date if last is None else min(last, self.ratings.last_date)
+        df = read_fixtures(cols, league_id=league_id, status="FT", date_from=last)
+        if self.ratings is not None:
+            self.ratings.update(df)   # kendte fixture_id'er springes over; nye spilledage lægges på
+        if self.state.last_date is not None:
+            df = df[df["date"] > self.state.last_date]
+        return self.state.extend(df)
+
+    def prematch_frame(self, fixtures: pd.DataFrame) -> pd.DataFrame:
+        feats = self.state.prematch_frame(fixtures)
+        if self.ratings is not None:
+            feats = pd.concat([feats, self.ratings.prematch_frame(fixtures)], axis=1)
+        return feats
+
+    def predict(self, fixtures: pd.DataFrame) -> pd.DataFrame:
+        X = self.prematch_frame(fixtures)[self.features].to_numpy(dtype=np.float64)
+        if self.nan_fill is not None:
+            X = np.nan_to_num(X, nan=self.nan_fill)
+        out = fixtures[[c for c in ("fixture_id", "date", "home", "away") if c in fixtures]].copy()
+        out["p_home_win"] = self.proba(X)
+        out["model_version"] = self.version
+        return out
+
+
+def upcoming_from_store(n: int, league_id=LEAGUE_ID) -> pd.DataFrame:
+    from store import read_fixtures
+
+    df = read_fixtures(["fixture_id", "date", "league_id", "home", "away"], league_id=league_id,
+                       status="NS", date_from=pd.Timestamp.now(tz="UTC"))
+    return df.head(n)
+
+
+def upcoming_from_api(n: int, league_id=LEAGUE_ID) -> pd.DataFrame:
+    from last10games import fetch_season, last_next
+
+    _, nxt = last_next(fetch_season(league_id), n)
+    return nxt.rename(columns={"dt_utc": "date"})[["fixture_id", "date", "home", "away"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scor kommende kampe med seneste model")
+    parser.add_argument("--source", choices=["store", "api"], default="store",
+                        help="hvor de kommende kampe hentes fra")
+    parser.add_argument("--input", type=Path, help="parquet med kolonnerne home/away (+ fixture_id/date)")
+    parser.add_argument("--model", type=Path, help="bestemt artefakt (default: nyeste i data/models)")
+    parser.add_argument("-n", type=int, default=10, help="antal kommende kampe")
+    parser.add_argument("--league", type=int, default=LEAGUE_ID, help="liga-id (samme liga som modellen er trænet på)")
+    parser.add_argument("--out", type=Path, default=OUT_FILE)
+    parser.add_argument("--no-catch-up", action="store_true",
+                        help="brug feature-state præcis som ved træning (ingen parquet-læsning)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    pred = Predictor(args.model)
+    n_new = 0 if args.no_catch_up else pred.catch_up(args.league)
+    t_load = time.perf_counter() - t0
+
+    if args.input:
+        fixtures = pd.read_parquet(args.input)
+    elif args.source == "api":
+        fixtures = upcoming_from_api(args.n, args.league)
+    else:
+        fixtures = upcoming_from_store(args.n, args.league)
+    if fixtures.empty:
+        print("Ingen kommende kampe fundet.")
+        return
+
+    t1 = time.perf_counter()
+    out = pred.predict(fixtures)
+    t_pred = time.perf_counter() - t1
+
+    for _, r in out.iterrows():
+        print(f"{r['home']:>22} vs {r['away']:<22}  p(hjemmesejr) = {r['p_home_win']:.3f}")
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    out.to_parquet(args.out, index=False)
+    print(f"\n🧠 Model {pred.version} (+{n_new} nye FT-kampe) indlæst på {t_load*1000:.0f} ms, "
+          f"{len(out)} kampe scoret på {t_pred*1000:.1f} ms")
+    print("Gemte:", args.out)
+
+
+if __name__ == "__main__":
+    main()
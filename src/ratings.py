@@ -0,0 +1,455 @@
+"""Ratingmotor: Elo med hjemmebanefordel og Dixon-Coles (angreb/forsvar, Poisson) som features.
+
+Kampene køres kronologisk én spilledag (UTC-kalenderdag) ad gangen pr. liga.
+Alle kampe på samme dag opdateres vektoriseret med NumPy (ingen numba). Pre-match
+værdierne for en spilledag beregnes kun ud fra tidligere dage.
+
+* Elo: K-faktor skaleret med målforskellen. Ved sæsonskifte trækkes
+  ratingerne mod start-værdien.
+* Dixon-Coles:
+  - log λ = μ + hjemme + angreb + forsvar, med tidsvægt exp(-ξ·dage).
+  - Refittes efter hver spilledag (eller hver n'te) med L-BFGS, warm-started
+    fra forrige fit, så en ny runde kun koster få iterationer.
+  - ρ (lav-score-korrektionen) fittes bagefter på de faste λ'er.
+
+Tilstanden gemmes som et snapshot før hver spilledag. En ny runde er derfor én
+inkrementel opdatering. Et rettet eller forsinket resultat spoler tilbage til
+dagen før og afspiller resten igen. Kun snapshots fra indeværende og forrige
+sæson beholdes (RatingParams.snapshot_seasons), så checkpointet og model-
+artefaktet ikke vokser med hele historikken; en rettelse ældre end det lægges
+oven på det ældste snapshot.
+
+    from ratings import rating_features, RatingEngine
+    feats = rating_features(df, kinds=("elo", "dc"))        # samme index som df
+    eng = RatingEngine.load(); eng.update(nye_ft_kampe); eng.save()
+
+Kør:  python src/ratings.py [--league 119] [--rebuild] [--top 12]
+"""
+from __future__ import annotations
+import argparse, math, pickle, time
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = ROOT / "data" / "state" / "ratings.pkl"
+DAY_NS = 86_400 * 10**9
+
+# alle kolonner motoren beregner pr. kamp; modellen bruger de relative (ingen rå 1500-tal)
+COLUMNS = ["elo_diff", "elo_p", "dc_xg", "dc_xg_away", "dc_p_home", "dc_p_draw", "dc_p_away"]
+KINDS = {
+    "elo": ["elo_diff", "elo_p"],
+    "dc": ["dc_xg", "dc_xg_away", "dc_p_home", "dc_p_draw", "dc_p_away"],
+}
+SOURCE_COLUMNS = ["fixture_id", "date", "league_id", "season", "home", "away", "home_goals", "away_goals"]
+
+
+@dataclass(frozen=True)
+class RatingParams:
+    elo_k: float = 20.0
+    elo_home: float = 60.0          # hjemmebanefordel i Elo-point
+    elo_init: float = 1500.0
+    elo_carry: float = 0.8          # andel af afstanden til start-værdien der beholdes ved ny sæson
+    dc_xi: float = 0.0019           # tidsvægt pr. dag (Dixon & Coles 1997)
+    dc_window_days: int = 3 * 365   # ældre kampe vejer < 13 % og tages ikke med i fittet
+    dc_ridge: float = 3.0           # L2 på angreb/forsvar: identificerbarhed og nye hold nær snittet
+    dc_every: int = 1               # refit hver n'te spilledag
+    dc_warm: bool = True            # warm start fra forrige fit (False = fra bunden hver gang)
+    max_goals: int = 10
+    snapshot_seasons: int = 2       # rewind-historik: indeværende + forrige sæson (0 = ubegrænset)
+
+
+def rating_feature_names(kinds=()) -> list[str]:
+    return [c for k in kinds for c in KINDS[k]]
+
+
+# ---------- modeller ----------
+def elo_expected(diff: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + 10.0 ** (-diff / 400.0))
+
+
+def elo_margin(gd: np.ndarray) -> np.ndarray:
+    """Målforskels-multiplikator (World Football Elo): 1, 1.5, (11 + N)/8."""
+    gd = np.abs(gd)
+    return np.where(gd <= 1, 1.0, np.where(gd == 2, 1.5, (11.0 + gd) / 8.0))
+
+
+def dc_tau(hg, ag, lh, la, rho):
+    """Dixon-Coles-korrektion for 0-0, 1-0, 0-1 og 1-1 (1 for alle andre resultater)."""
+    return np.select([(hg == 0) & (ag == 0), (hg == 0) & (ag == 1), (hg == 1) & (ag == 0), (hg == 1) & (ag == 1)],
+                     [1.0 - lh * la * rho, 1.0 + lh * rho, 1.0 + la * rho, 1.0 - rho], 1.0)
+
+
+def dc_probs(lh: np.ndarray, la: np.ndarray, rho: float, max_goals: int = 10):
+    """(p_hjemme, p_uafgjort, p_ude) fra scorematricen 0..max_goals med tau-korrektion."""
+    k = np.arange(max_goals + 1)
+    logfact = np.cumsum(np.log(np.maximum(k, 1)))
+    ph = np.exp(k * np.log(lh[:, None]) - lh[:, None] - logfact)
+    pa = np.exp(k * np.log(la[:, None]) - la[:, None] - logfact)
+    m = ph[:, :, None] * pa[:, None, :]
+    m[:, 0, 0] *= 1.0 - lh * la * rho
+    m[:, 0, 1] *= 1.0 + lh * rho
+    m[:, 1, 0] *= 1.0 + la * rho
+    m[:, 1, 1] *= 1.0 - rho
+    m /= m.sum(axis=(1, 2))[:, None, None]
+    return (np.tril(m, -1).sum(axis=(1, 2)), np.trace(m, axis1=1, axis2=2),
+            np.triu(m, 1).sum(axis=(1, 2)))
+
+
+def _dc_nll(x, h, a, hg, ag, w, nt, ridge):
+    """Vægtet Poisson-NLL + ridge og analytisk gradient; x = [μ, hjemme, angreb(nt), forsvar(nt)]."""
+    mu, home, att, dfn = x[0], x[1], x[2:2 + nt], x[2 + nt:]
+    eh = mu + home + att[h] + dfn[a]
+    ea = mu + att[a] + dfn[h]
+    lh, la = np.exp(eh), np.exp(ea)
+    f = np.dot(w, lh - hg * eh + la - ag * ea) + 0.5 * ridge * (att @ att + dfn @ dfn)
+    rh, ra = w * (lh - hg), w * (la - ag)
+    g = np.empty_like(x)
+    g[0] = rh.sum() + ra.sum()
+    g[1] = rh.sum()
+    g[2:2 + nt] = np.bincount(h, rh, nt) + np.bincount(a, ra, nt) + ridge * att
+    g[2 + nt:] = np.bincount(a, rh, nt) + np.bincount(h, ra, nt) + ridge * dfn
+    return f, g
+
+
+def _take(values: np.ndarray, codes: np.ndarray, default: float) -> np.ndarray:
+    if not len(values):
+        return np.full(len(codes), default)
+    return np.where(codes >= 0, values[np.maximum(codes, 0)], default)
+
+
+class _Log:
+    """Anvendte kampe i kronologisk orden (voksende arrays) + deres pre-match værdier."""
+    FIELDS = {"fixture_id": np.int64, "date": np.int64, "season": np.int32, "home": np.int32,
+              "away": np.int32, "hg": np.float64, "ag": np.float64}
+
+    def __init__(self):
+        self.n = 0
+        self.cols = {k: np.empty(0, dtype=t) for k, t in self.FIELDS.items()}
+        self.pre = np.empty((0, len(COLUMNS)))
+
+    def append(self, pre: np.ndarray, **cols) -> None:
+        m = len(pre)
+        if self.n + m > len(self.pre):
+            cap = max(2 * len(self.pre), self.n + m, 256)
+            for k, v in self.cols.items():
+                self.cols[k] = np.resize(v, cap)
+            self.pre = np.resize(self.pre, (cap, len(COLUMNS)))
+        for k, v in cols.items():
+            self.cols[k][self.n:self.n + m] = v
+        self.pre[self.n:self.n + m] = pre
+        self.n += m
+
+    def __getitem__(self, k) -> np.ndarray:
+        return self.cols[k][:self.n]
+
+    def truncate(self, n: int) -> dict:
+        """Fjern alt efter række n; returnerer de fjernede kampe."""
+        tail = {k: v[n:self.n].copy() for k, v in self.cols.items()}
+        self.n = n
+        return tail
+
+
+class LeagueRatings:
+    """Elo- og Dixon-Coles-tilstand for én liga, opdateret en spilledag ad gangen."""
+
+    def __init__(self, params: RatingParams = RatingParams()):
+        self.params = params
+        self.codes: dict[str, int] = {}
+        self.names: list[str] = []
+        self.elo = np.empty(0)
+        self.mu, self.home_adv, self.rho = math.log(1.3), 0.2, 0.0
+        self.att, self.dfn = np.empty(0), np.empty(0)
+        self.season = None
+        self.matchdays = 0
+        self.dc_iters = 0
+        self.log = _Log()
+        self.index: dict[int, int] = {}     # fixture_id → række i log
+        self.snapshots: list[tuple] = []    # tilstand før hver spilledag
+
+    @property
+    def last_date(self) -> pd.Timestamp | None:
+        return pd.Timestamp(int(self.log["date"][-1]), tz="UTC") if self.log.n else None
+
+    # ---------- hold ----------
+    def _grow(self) -> None:
+        n = len(self.names)
+        if len(self.elo) < n:
+            m = n - len(self.elo)
+            self.elo = np.concatenate([self.elo, np.full(m, self.params.elo_init)])
+            self.att = np.concatenate([self.att, np.zeros(m)])
+            self.dfn = np.concatenate([self.dfn, np.zeros(m)])
+
+    def team_codes(self, names, add: bool = True) -> np.ndarray:
+        """Holdnavne → koder; ukendte hold får -1 når add=False."""
+        local, uniq = pd.factorize(np.asarray(names, dtype=object))
+        out = np.empty(len(uniq), dtype=np.int32)
+        for i, name in enumerate(uniq):
+            c = self.codes.get(name)
+            if c is None:
+                if not add:
+                    out[i] = -1
+                    continue
+                c = self.codes[name] = len(self.names)
+                self.names.append(name)
+            out[i] = c
+        self._grow()
+        return out[local]
+
+    # ---------- pre-match ----------
+    def prematch(self, h: np.ndarray, a: np.ndarray) -> np.ndarray:
+        """Pre-match værdier (COLUMNS) ud fra den aktuelle tilstand; kode -1 = ukendt hold (snit)."""
+        p = self.params
+        diff = _take(self.elo, h, p.elo_init) + p.elo_home - _take(self.elo, a, p.elo_init)
+        lh = np.exp(self.mu + self.home_adv + _take(self.att, h, 0.0) + _take(self.dfn, a, 0.0))
+        la = np.exp(self.mu + _take(self.att, a, 0.0) + _take(self.dfn, h, 0.0))
+        ph, pd_, pa = dc_probs(lh, la, self.rho, p.max_goals)
+        return np.column_stack([diff, elo_expected(diff), lh, la, ph, pd_, pa])
+
+    # ---------- opdatering ----------
+    def _snapshot(self, day: int) -> None:
+        self.snapshots.append((day, self.log.n, self.elo.copy(), self.att.copy(), self.dfn.copy(),
+                               self.mu, self.home_adv, self.rho, self.season, self.matchdays))
+        keep = self.params.snapshot_seasons
+        if keep and self.season is not None:   # det netop tilføjede snapshot har season == self.season
+            k = next(i for i, snap in enumerate(self.snapshots) if snap[8] is not None and snap[8] > self.season - keep)
+            del self.snapshots[:k]
+
+    def _apply_matchday(self, fid, date, season, h, a, hg, ag) -> None:
+        """Én spilledag: snapshot, sæsonskifte, pre-match værdier, Elo-opdatering og evt. DC-refit."""
+        p = self.params
+        self._snapshot(int(date[0] // DAY_NS))
+        s = int(season.max())
+        if s >= 0:   # -1 = ukendt sæson (ingen regression mod snittet)
+            if self.season is not None and s > self.season:
+                self.elo = p.elo_init + p.elo_carry * (self.elo - p.elo_init)
+            self.season = s if self.season is None else max(self.season, s)
+
+        pre = self.prematch(h, a)
+        # alle dagens kampe ud fra ratingen før dagen (np.add.at: samme hold to gange tæller begge)
+        score = np.where(hg > ag, 1.0, np.where(hg == ag, 0.5, 0.0))
+        delta = p.elo_k * elo_margin(hg - ag) * (score - pre[:, 1])
+        np.add.at(self.elo, h, delta)
+        np.add.at(self.elo, a, -delta)
+
+        start = self.log.n
+        self.log.append(pre, fixture_id=fid, date=date, season=season, home=h, away=a, hg=hg, ag=ag)
+        self.index.update(zip(fid.tolist(), range(start, self.log.n)))
+        self.matchdays += 1
+        if self.matchdays % p.dc_every == 0:
+            self.fit_dc(int(date.max()))
+
+    def fit_dc(self, now: int) -> None:
+        """Refit angreb/forsvar på vinduet op til `now` (ns); warm start fra nuværende parametre."""
+        from scipy.optimize import minimize, minimize_scalar
+
+        p, log = self.params, self.log
+        lo = np.searchsorted(log["date"], now - p.dc_window_days * DAY_NS, "left")
+        h, a, hg, ag = log["home"][lo:], log["away"][lo:], log["hg"][lo:], log["ag"][lo:]
+        w = np.exp(-p.dc_xi * (now - log["date"][lo:]) / DAY_NS)
+        nt = len(self.names)
+        if p.dc_warm:
+            x0 = np.concatenate([[self.mu, self.home_adv], self.att, self.dfn])
+        else:
+            x0 = np.concatenate([[math.log(max((hg.mean() + ag.mean()) / 2, 0.1)), 0.0], np.zeros(2 * nt)])
+        res = minimize(_dc_nll, x0, args=(h, a, hg, ag, w, nt, p.dc_ridge), jac=True, method="L-BFGS-B")
+        self.dc_iters += res.nit
+        x = res.x
+        self.mu, self.home_adv, self.att, self.dfn = float(x[0]), float(x[1]), x[2:2 + nt].copy(), x[2 + nt:].copy()
+
+        low = (hg <= 1) & (ag <= 1)
+        if low.any():
+            lh = np.exp(self.mu + self.home_adv + self.att[h[low]] + self.dfn[a[low]])
+            la = np.exp(self.mu + self.att[a[low]] + self.dfn[h[low]])
+            wl, hl, al = w[low], hg[low], ag[low]
+            # ρ afgrænses så tau > 0 for alle lav-score-kampe i vinduet
+            bound = min(0.25, 0.99 / float((lh * la).max()), 0.99 / float(max(lh.max(), la.max())))
+            nll = lambda r: -np.dot(wl, np.log(np.maximum(dc_tau(hl, al, lh, la, r), 1e-12)))
+            self.rho = float(minimize_scalar(nll, bounds=(-bound, bound), method="bounded").x)
+
+    def rewind(self, day: int) -> dict:
+        """Gå tilbage til tilstanden før spilledag `day` (dage siden epoch); returnerer fjernede kampe."""
+        i = next((k for k, s in enumerate(self.snapshots) if s[0] >= day), len(self.snapshots))
+        if i == len(self.snapshots):
+            return {k: np.empty(0, dtype=t) for k, t in _Log.FIELDS.items()}
+        _, n, elo, att, dfn, self.mu, self.home_adv, self.rho, self.season, self.matchdays = self.snapshots[i]
+        del self.snapshots[i:]
+        self.elo, self.att, self.dfn = elo, att, dfn
+        self._grow()
+        tail = self.log.truncate(n)
+        for fid in tail["fixture_id"].tolist():
+            del self.index[fid]
+        return tail
+
+    def update(self, fid, date, season, home, away, hg, ag) -> np.ndarray:
+        """Anvend afsluttede kampe (arrays); kendte fixture_id'er springes over, medmindre
+        resultatet er rettet – så spoles der tilbage til kampens dag og afspilles igen.
+
+        Returnerer pre-match værdier (COLUMNS) for alle input-rækker.
+        """
+        pos = np.fromiter((self.index.get(f, -1) for f in fid.tolist()), np.int64, len(fid))
+        new = pos < 0
+        fixed = np.zeros(len(fid), dtype=bool)
+        if not new.all():
+            k = pos[~new]
+            fixed[~new] = (self.log["hg"][k] != hg[~new]) | (self.log["ag"][k] != ag[~new])
+        todo = new | fixed
+        if todo.any():
+            cols = {"fixture_id": fid[todo], "date": date[todo],
+                    "season": season[todo] if season is not None else np.full(int(todo.sum()), -1),
+                    "home": self.team_codes(home[todo]), "away": self.team_codes(away[todo]),
+                    "hg": hg[todo], "ag": ag[todo]}
+            first = int(cols["date"].min() // DAY_NS)
+            if fixed.any():   # den gamle kampdag kan ligge før den nye (flyttet kamp)
+                first = min(first, int(self.log["date"][pos[fixed]].min() // DAY_NS))
+            if self.log.n and first <= self.log["date"][-1] // DAY_NS:   # forsinket/rettet resultat
+                tail = self.rewind(first)
+                tail = {k: v[~np.isin(tail["fixture_id"], cols["fixture_id"])] for k, v in tail.items()}
+                # rettelser ældre end snapshot-vinduet kan ikke afspilles igen – den gamle værdi bliver stående
+                keep = np.fromiter((f not in self.index for f in cols["fixture_id"].tolist()), bool,
+                                   len(cols["fixture_id"]))
+                cols = {k: np.concatenate([tail[k], v[keep]]) for k, v in cols.items()}
+            order = np.lexsort((cols["fixture_id"], cols["date"]))
+            cols = {k: v[order] for k, v in cols.items()}
+            days = cols["date"] // DAY_NS
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(days)]):
+                self._apply_matchday(*(cols[k][lo:hi] for k in _Log.FIELDS))
+        rows = np.fromiter((self.index[f] for f in fid.tolist()), np.int64, len(fid))
+        return self.log.pre[rows]
+
+    def table(self) -> pd.DataFrame:
+        return pd.DataFrame({"team": self.names, "elo": self.elo, "attack": self.att, "defence": self.dfn}) \
+            .sort_values("elo", ascending=False, ignore_index=True)
+
+
+class RatingEngine:
+    """LeagueRatings pr. league_id (ratinger på tværs af ligaer er ikke sammenlignelige)."""
+
+    def __init__(self, params: RatingParams = RatingParams()):
+        self.params = params
+        self.leagues: dict = {}
+
+    def league(self, league_id) -> LeagueRatings:
+        lr = self.leagues.get(league_id)
+        if lr is None:
+            lr = self.leagues[league_id] = LeagueRatings(self.params)
+        return lr
+
+    @property
+    def last_date(self) -> pd.Timestamp | None:
+        """Tidligste 'seneste kamp' på tværs af ligaer – catch-up herfra mister intet."""
+        dates = [lr.last_date for lr in self.leagues.values() if lr.log.n]
+        return min(dates) if dates else None
+
+    @property
+    def matchdays(self) -> int:
+        return sum(lr.matchdays for lr in self.leagues.values())
+
+    @property
+    def dc_iters(self) -> int:
+        return sum(lr.dc_iters for lr in self.leagues.values())
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Anvend afsluttede kampe; pre-match værdier (COLUMNS) for hver række med resultat, ellers NaN."""
+        out = np.full((len(df), len(COLUMNS)), np.nan)
+        hg = df["home_goals"].to_numpy(dtype=float)
+        ag = df["away_goals"].to_numpy(dtype=float)
+        played = ~(np.isnan(hg) | np.isnan(ag))
+        leagues = df["league_id"].to_numpy() if "league_id" in df else np.zeros(len(df), dtype=int)
+        fid = df["fixture_id"].to_numpy(dtype=np.int64)
+        date = pd.DatetimeIndex(pd.to_datetime(df["date"], utc=True)).as_unit("ns").asi8
+        season = df["season"].to_numpy(dtype=np.int64) if "season" in df else None
+        home, away = np.asarray(df["home"], dtype=object), np.asarray(df["away"], dtype=object)
+        for lid in pd.unique(leagues[played]):
+            rows = np.flatnonzero(played & (leagues == lid))
+            out[rows] = self.league(None if "league_id" not in df else int(lid)).update(
+                fid[rows], date[rows], season[rows] if season is not None else None,
+                home[rows], away[rows], hg[rows], ag[rows])
+        return pd.DataFrame(out, columns=COLUMNS, index=df.index)
+
+    def _league_of(self, home: str, away: str):
+        for lid, lr in self.leagues.items():
+            if home in lr.codes or away in lr.codes:
+                return lid
+        return next(iter(self.leagues), None)
+
+    def prematch_frame(self, fixtures: pd.DataFrame) -> pd.DataFrame:
+        """Pre-match værdier for kommende kampe; ligaen findes via league_id eller holdnavnene."""
+        out = np.full((len(fixtures), len(COLUMNS)), np.nan)
+        if "league_id" in fixtures:
+            lids = fixtures["league_id"].to_numpy()
+        else:
+            lids = np.array([self._league_of(h, a) for h, a in zip(fixtures["home"], fixtures["away"])], dtype=object)
+        home, away = np.asarray(fixtures["home"], dtype=object), np.asarray(fixtures["away"], dtype=object)
+        for lid in pd.unique(lids):
+            rows = np.flatnonzero(lids == lid)
+            lr = self.leagues.get(lid if lid is None else int(lid)) or LeagueRatings(self.params)
+            out[rows] = lr.prematch(lr.team_codes(home[rows], add=False), lr.team_codes(away[rows], add=False))
+        return pd.DataFrame(out, columns=COLUMNS, index=fixtures.index)
+
+    def save(self, path: Path = STATE_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+        return path
+
+    @staticmethod
+    def load(path: Path = STATE_PATH) -> "RatingEngine":
+        with path.open("rb") as f:
+            return pickle.load(f)
+
+
+def rating_features(df: pd.DataFrame, kinds=("elo", "dc"), params: RatingParams = RatingParams()) -> pd.DataFrame:
+    """Pre-match rating-features pr. fixture-række (samme index som df), fra en frisk motor."""
+    return RatingEngine(params).update(df)[rating_feature_names(kinds)]
+
+
+def main():
+    from instrument import start_trace, span
+    from store import read_fixtures
+
+    parser = argparse.ArgumentParser(description="Opdatér Elo/Dixon-Coles-ratinger inkrementelt fra fixture-store")
+    parser.add_argument("--league", type=int, nargs="+", help="liga-id'er (default: alle)")
+    parser.add_argument("--seasons", type=int, nargs="+", help="sæsoner (default: alle)")
+    parser.add_argument("--rebuild", action="store_true", help="ignorér checkpoint og beregn fra bunden")
+    parser.add_argument("--dc-every", type=int, default=1, help="refit Dixon-Coles hver n'te spilledag")
+    parser.add_argument("--cold", action="store_true", help="ingen warm start af Dixon-Coles (til sammenligning)")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    args = parser.parse_args()
+
+    tr = start_trace("ratings")
+    if args.state.exists() and not args.rebuild:
+        eng = RatingEngine.load(args.state)
+    else:
+        eng = RatingEngine(RatingParams(dc_every=args.dc_every, dc_warm=not args.cold))
+    before, iters = eng.matchdays, eng.dc_iters
+    # kun kampe efter checkpointet; en liga der ikke er i checkpointet læses fra start
+    known = args.league is None or all(lid in eng.leagues for lid in args.league)
+    with span("read") as sp:
+        df = read_fixtures(SOURCE_COLUMNS, league_id=args.league, seasons=args.seasons,
+                           status="FT", date_from=eng.last_date if known else None)
+        sp["rows"] = len(df)
+    t0 = time.perf_counter()
+    with span("update", rows=len(df)) as sp:
+        eng.update(df)
+        sp.update(matchdays=eng.matchdays - before, dc_iters=eng.dc_iters - iters)
+    dt = time.perf_counter() - t0
+    print(f"📈 {eng.matchdays - before} nye spilledage ({len(df)} kampe læst) på {dt:.2f}s, "
+          f"{eng.dc_iters - iters} Dixon-Coles-iterationer")
+    for lid, lr in eng.leagues.items():
+        if args.league and lid not in args.league:
+            continue
+        print(f"\nLiga {lid} efter {lr.last_date:%Y-%m-%d} (ρ={lr.rho:+.3f}, hjemme={math.exp(lr.home_adv):.2f}×):")
+        print(lr.table().head(args.top).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("\n💾 Checkpoint:", eng.save(args.state))
+    print("🧭 Trace:", tr.save())
+
+
+if __name__ == "__main__":
+    import ratings   # checkpointet skal pickle ratings.RatingEngine, ikke __main__.RatingEngine
+    ratings.main()
@@ -0,0 +1,323 @@
+"""Monte Carlo af resten af sæsonen: mesterskab, top 6, playoff og nedrykning (Superliga-split).
+
+Alle resterende kampe samples for mange sæsoner på én gang som NumPy-arrays.
+Målene trækkes fra en Poisson-model, så målforskel og scorede mål kan afgøre
+pointlighed.
+
+* λ for hvert holdpar kommer fra Dixon-Coles-ratingerne (ratings.py).
+* Gives p_home_win fra predict.py, fordeles λ om for de kendte NS-kampe, så
+  P(hjemmesejr) matcher modellen. Det samlede målforventning er uændret.
+
+Superliga spiller 22 runder grundspil og deler sig derefter i to grupper på 6,
+der spiller dobbelt turnering med pointene fra grundspillet. Er splittet ikke
+programsat endnu, dannes gruppe-kampene pr. simulation ud fra den simulerede
+stilling efter grundspillet.
+
+Stillinger sorteres vektoriseret på point, målforskel, scorede mål og lodtrækning.
+Simulationerne kan fordeles over en procespool (joblib/loky). Hver worker får
+sin egen uafhængige RNG-strøm (SeedSequence.spawn).
+
+    st = prepare(fixtures, league_ratings)           # fixtures: hele sæsonen (FT + NS)
+    table = simulate(st, n=100_000, n_jobs=4)
+
+Kør:  python src/simulate.py [-n 100000] [--jobs 4] [--preds data/parquet/preds_upcoming.parquet]
+"""
+from __future__ import annotations
+import argparse, time
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from cache import current_season
+from ratings import LeagueRatings, RatingEngine, STATE_PATH, dc_probs
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_FILE = ROOT / "data" / "parquet" / "season_sim.parquet"
+PREDS_FILE = ROOT / "data" / "parquet" / "preds_upcoming.parquet"   # predict.py
+SEASON = current_season()   # APIFOOTBALL_SEASON eller ud fra datoen (skifter i juli)
+LEAGUE_ID = 119
+CHUNK = 25_000      # simulationer pr. vektoriseret blok (holder hukommelsen nede)
+MAX_GOALS = 10      # mål pr. hold pr. kamp kappes her (P(> 10) er forsvindende)
+
+
+@dataclass(frozen=True)
+class SeasonFormat:
+    split: int | None = 6       # hold i mesterskabsspillet; None = ingen split
+    split_rounds: int = 2       # hvor mange gange hvert par mødes i gruppen
+    playoff_pos: int = 7        # vinderen af kvalifikationsspillet → europæisk playoff
+    relegated: int = 2          # de sidste N rykker ned
+
+
+SUPERLIGA = SeasonFormat()
+
+
+@dataclass
+class SeasonState:
+    teams: list
+    points: np.ndarray          # (T,) stilling fra FT-kampe
+    gf: np.ndarray
+    ga: np.ndarray
+    home: np.ndarray            # (F,) resterende kampe som holdkoder
+    away: np.ndarray
+    lam_h: np.ndarray           # (F,) forventede mål
+    lam_a: np.ndarray
+    pair_h: np.ndarray          # (T, T) λ for dannede gruppe-kampe (hjemme i, ude j)
+    pair_a: np.ndarray
+    top: np.ndarray | None      # (T,) bool når splittet allerede er kendt, ellers None
+
+
+def split_lambda(p_home: np.ndarray, total: np.ndarray, max_goals: int = 10, iters: int = 40):
+    """(λh, λa) med λh + λa = total og P(hjemmesejr) = p_home; vektoriseret bisektion på andelen."""
+    lo, hi = np.full(len(p_home), 0.01), np.full(len(p_home), 0.99)
+    for _ in range(iters):
+        mid = (lo + hi) / 2
+        ph = dc_probs(mid * total, (1 - mid) * total, 0.0, max_goals)[0]
+        lo, hi = np.where(ph < p_home, mid, lo), np.where(ph < p_home, hi, mid)
+    share = (lo + hi) / 2
+    return share * total, (1 - share) * total
+
+
+def _is_split_round(rounds: pd.Series) -> np.ndarray:
+    return ~rounds.fillna("Regular Season").str.startswith("Regular Season").to_numpy()
+
+
+def prepare(fixtures: pd.DataFrame, lr: LeagueRatings, fmt: SeasonFormat = SUPERLIGA,
+            preds: pd.DataFrame | None = None) -> SeasonState:
+    """Stilling + resterende kampe med λ ud fra hele sæsonens fixtures (FT og NS)."""
+    teams = sorted(set(fixtures["home"]) | set(fixtures["away"]))
+    code = {t: i for i, t in enumerate(teams)}
+    T = len(teams)
+    h = fixtures["home"].map(code).to_numpy()
+    a = fixtures["away"].map(code).to_numpy()
+    hg = fixtures["home_goals"].to_numpy(dtype=float)
+    ag = fixtures["away_goals"].to_numpy(dtype=float)
+    played = ~(np.isnan(hg) | np.isnan(ag))
+
+    hp, ap = h[played], a[played]
+    hgp, agp = hg[played].astype(np.int64), ag[played].astype(np.int64)
+    pts_h = np.where(hgp > agp, 3, np.where(hgp == agp, 1, 0))
+    pts_a = np.where(agp > hgp, 3, np.where(hgp == agp, 1, 0))
+    points = np.bincount(hp, pts_h, T) + np.bincount(ap, pts_a, T)
+    gf = np.bincount(hp, hgp, T) + np.bincount(ap, agp, T)
+    ga = np.bincount(hp, agp, T) + np.bincount(ap, hgp, T)
+
+    # λ for alle holdpar fra Dixon-Coles (ukendte hold = ligasnit)
+    codes = lr.team_codes(teams, add=False)
+    pre = lr.prematch(np.repeat(codes, T), np.tile(codes, T))
+    pair_h, pair_a = pre[:, 2].reshape(T, T), pre[:, 3].reshape(T, T)
+
+    rest = ~played
+    home, away = h[rest], a[rest]
+    lam_h, lam_a = pair_h[home, away].copy(), pair_a[home, away].copy()
+    if preds is not None and "fixture_id" in fixtures:
+        p = fixtures.loc[rest, ["fixture_id"]].merge(preds[["fixture_id", "p_home_win"]], how="left")["p_home_win"]
+        m = p.notna().to_numpy()
+        if m.any():
+            lam_h[m], lam_a[m] = split_lambda(p.to_numpy()[m], lam_h[m] + lam_a[m])
+
+    top = None
+    if fmt.split and "round" in fixtures:
+        sr = _is_split_round(fixtures["round"])
+        if sr.any():   # splittet er programsat: gruppen med den nuværende fører er mesterskabsspillet
+            top = np.zeros(T, dtype=bool)
+            top[np.argmax(points * 10_000 + (gf - ga) * 100 + gf)] = True
+            for _ in range(T):
+                linked = top[h[sr]] | top[a[sr]]
+                top[h[sr][linked]] = top[a[sr][linked]] = True
+    return SeasonState(teams, points.astype(float), gf.astype(float), ga.astype(float), home, away,
+                       lam_h, lam_a, pair_h, pair_a, top)
+
+
+def _group_pairs(k: int, rounds: int) -> tuple[np.ndarray, np.ndarray]:
+    i, j = np.meshgrid(np.arange(k), np.arange(k), indexing="ij")
+    ordered = i != j
+    pi, pj = [i[ordered]] * (rounds // 2), [j[ordered]] * (rounds // 2)
+    if rounds % 2:
+        once = i < j
+        pi, pj = pi + [i[once]], pj + [j[once]]
+    return np.concatenate(pi), np.concatenate(pj)
+
+
+def _sort_key(points, gd, gf, rng) -> np.ndarray:
+    """Point, målforskel, scorede mål og til sidst lodtrækning – som én float pr. hold."""
+    return points.astype(float) * 1e6 + (gd + 500) * 1e3 + gf + rng.random(points.shape)
+
+
+def poisson_cdf(lam: np.ndarray, max_goals: int = MAX_GOALS) -> np.ndarray:
+    """P(X <= k) for k = 0..max_goals-1 pr. λ (sidste kolonne; resten af halen = max_goals mål)."""
+    k = np.arange(max_goals)
+    logfact = np.cumsum(np.log(np.maximum(k, 1)))
+    lam = np.asarray(lam, dtype=float)[..., None]
+    return np.cumsum(np.exp(k * np.log(lam) - lam - logfact), axis=-1)
+
+
+def sample_goals(u: np.ndarray, cdf_cols) -> np.ndarray:
+    """Invers CDF: antal k hvor u > P(X <= k); cdf_cols[k] broadcastes mod u. Hurtigere end rng.poisson."""
+    g = np.zeros(u.shape, dtype=np.int8)
+    for col in cdf_cols:
+        g += u > col
+    return g
+
+
+def simulate_chunk(st: SeasonState, fmt: SeasonFormat, n: int, rng: np.random.Generator):
+    """n sæsoner → (positionstællinger (T, T), pointsum (T,))."""
+    T = len(st.teams)
+    F = len(st.home)
+    points = np.broadcast_to(st.points, (n, T)).astype(np.float32)
+    gf = np.broadcast_to(st.gf, (n, T)).astype(np.float32)
+    ga = np.broadcast_to(st.ga, (n, T)).astype(np.float32)
+
+    if F:   # kendte kampe: samme hold i alle simulationer → incidensmatricer og én matmul pr. størrelse
+        inc_h = np.zeros((F, T), dtype=np.float32)
+        inc_a = np.zeros((F, T), dtype=np.float32)
+        inc_h[np.arange(F), st.home] = 1
+        inc_a[np.arange(F), st.away] = 1
+        hg = sample_goals(rng.random((n, F), dtype=np.float32), poisson_cdf(st.lam_h).T).astype(np.float32)
+        ag = sample_goals(rng.random((n, F), dtype=np.float32), poisson_cdf(st.lam_a).T).astype(np.float32)
+        draw = hg == ag
+        points += (np.float32(3) * (hg > ag) + draw) @ inc_h + (np.float32(3) * (ag > hg) + draw) @ inc_a
+        gf += hg @ inc_h + ag @ inc_a
+        ga += ag @ inc_h + hg @ inc_a
+
+    if fmt.split and st.top is None:   # grundspil slut → dan gruppe-kampene ud fra den simulerede stilling
+        order = np.argsort(-_sort_key(points, gf - ga, gf, rng), axis=1)
+        top_i, top_j = _group_pairs(fmt.split, fmt.split_rounds)
+        bot_i, bot_j = _group_pairs(T - fmt.split, fmt.split_rounds)
+        home = np.concatenate([order[:, top_i], order[:, fmt.split + bot_i]], axis=1)
+        away = np.concatenate([order[:, top_j], order[:, fmt.split + bot_j]], axis=1)
+        pair = home * T + away
+        cdf_h, cdf_a = poisson_cdf(st.pair_h).reshape(T * T, -1).T, poisson_cdf(st.pair_a).reshape(T * T, -1).T
+        hg = sample_goals(rng.random(pair.shape, dtype=np.float32), (c[pair] for c in cdf_h))
+        ag = sample_goals(rng.random(pair.shape, dtype=np.float32), (c[pair] for c in cdf_a))
+        draw = hg == ag
+        # holdene varierer pr. simulation → bincount på (simulation, hold)
+        idx = (np.arange(n)[:, None] * T + np.concatenate([home, away], axis=1)).ravel()
+        add = lambda v: np.bincount(idx, v.ravel(), n * T).reshape(n, T)
+        points += add(np.concatenate([3 * (hg > ag) + draw, 3 * (ag > hg) + draw], axis=1))
+        gf += add(np.concatenate([hg, ag], axis=1))
+        ga += add(np.concatenate([ag, hg], axis=1))
+        top = np.zeros((n, T), dtype=bool)
+        np.put_along_axis(top, order[:, :fmt.split], True, axis=1)
+    elif fmt.split:
+        top = np.broadcast_to(st.top, (n, T))
+    else:
+        top = np.zeros((n, T), dtype=bool)
+
+    final = np.argsort(-(_sort_key(points, gf - ga, gf, rng) + top * 1e12), axis=1)   # (n, pos) → hold
+    counts = np.bincount((final * T + np.arange(T)).ravel(), minlength=T * T).reshape(T, T)
+    return counts, points.sum(axis=0, dtype=np.float64)
+
+
+def _run_shard(st: SeasonState, fmt: SeasonFormat, n: int, seed: np.random.SeedSequence):
+    rng = np.random.Generator(np.random.PCG64(seed))
+    T = len(st.teams)
+    counts, pts = np.zeros((T, T), dtype=np.int64), np.zeros(T)
+    for lo in range(0, n, CHUNK):
+        c, p = simulate_chunk(st, fmt, min(CHUNK, n - lo), rng)
+        counts += c
+        pts += p
+    return counts, pts
+
+
+def simulate(st: SeasonState, fmt: SeasonFormat = SUPERLIGA, n: int = 100_000, seed: int = 0,
+             n_jobs: int = 1) -> pd.DataFrame:
+    """Sandsynligheder pr. hold: mester, top 6, playoff, nedrykning, forventede point og position."""
+    seeds = np.random.SeedSequence(seed).spawn(max(n_jobs, 1))
+    sizes = [n // len(seeds) + (i < n % len(seeds)) for i in range(len(seeds))]
+    if len(seeds) == 1:
+        outs = [_run_shard(st, fmt, n, seeds[0])]
+    else:
+        from joblib import Parallel, delayed
+        outs = Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_run_shard)(st, fmt, k, s) for k, s in zip(sizes, seeds))
+    counts = sum(c for c, _ in outs)
+    pts = sum(p for _, p in outs)
+    T = len(st.teams)
+    prob = counts / n
+    table = pd.DataFrame({
+        "team": st.teams,
+        "points": st.points.astype(int),
+        "gd": (st.gf - st.ga).astype(int),
+        "exp_points": pts / n,
+        "exp_pos": prob @ np.arange(1, T + 1),
+        "p_title": prob[:, 0],
+    })
+    if fmt.split:
+        table["p_top6" if fmt.split == 6 else f"p_top{fmt.split}"] = prob[:, :fmt.split].sum(axis=1)
+    if fmt.playoff_pos and fmt.playoff_pos <= T:
+        table["p_playoff"] = prob[:, fmt.playoff_pos - 1]
+    table["p_relegation"] = prob[:, T - fmt.relegated:].sum(axis=1)
+    pos = pd.DataFrame(prob, columns=[f"pos{i}" for i in range(1, T + 1)])
+    return pd.concat([table, pos], axis=1).sort_values("exp_pos", ignore_index=True)
+
+
+# ---------- input ----------
+def season_from_store(league_id: int, season: int) -> pd.DataFrame:
+    from store import read_fixtures
+
+    return read_fixtures(["fixture_id", "date", "league_id", "season", "round", "status", "home", "away",
+                          "home_goals", "away_goals"], league_id=league_id, seasons=[season])
+
+
+def season_from_api(league_id: int, season: int) -> pd.DataFrame:
+    from last10games import fetch_season
+
+    df = fetch_season(league_id, season).rename(columns={"dt_utc": "date", "hg": "home_goals", "ag": "away_goals"})
+    df["league_id"], df["season"] = league_id, season
+    return df
+
+
+def league_ratings(season_df: pd.DataFrame, league_id: int, state: Path = STATE_PATH) -> LeagueRatings:
+    """Checkpoint fra ratings.py (hvis det findes) + sæsonens FT-kampe; ellers kun sæsonens kampe."""
+    eng = RatingEngine.load(state) if state.exists() else RatingEngine()
+    ft = season_df[season_df["status"].isin(["FT", "AET", "PEN"])] if "status" in season_df else season_df
+    eng.update(ft.assign(league_id=league_id))
+    return eng.league(league_id)
+
+
+def main():
+    from instrument import start_trace, span
+
+    parser = argparse.ArgumentParser(description="Monte Carlo af resten af sæsonen (Superliga-split)")
+    parser.add_argument("--league", type=int, default=LEAGUE_ID)
+    parser.add_argument("--season", type=int, default=SEASON)
+    parser.add_argument("--source", choices=["store", "api"], default="store")
+    parser.add_argument("-n", type=int, default=100_000, help="antal simulerede sæsoner")
+    parser.add_argument("--jobs", type=int, default=1, help="processer (hver med egen RNG-strøm)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--preds", type=Path, help=f"p_home_win pr. fixture_id (fx {PREDS_FILE.relative_to(ROOT)})")
+    parser.add_argument("--no-split", action="store_true", help="almindelig turnering uden mesterskabsspil")
+    parser.add_argument("--out", type=Path, default=OUT_FILE)
+    args = parser.parse_args()
+
+    tr = start_trace("simulate")
+    fmt = SeasonFormat(split=None) if args.no_split else SUPERLIGA
+    with span("load") as sp:
+        season_df = (season_from_api if args.source == "api" else season_from_store)(args.league, args.season)
+        sp["rows"] = len(season_df)
+    if season_df.empty:
+        print("Ingen fixtures fundet.")
+        return
+    with span("ratings"):
+        lr = league_ratings(season_df, args.league)
+    preds = pd.read_parquet(args.preds) if args.preds else None
+    st = prepare(season_df, lr, fmt, preds)
+    split = "kendt" if st.top is not None else ("simuleres" if fmt.split else "ingen")
+    print(f"🎲 {len(st.home)} resterende kampe, {len(st.teams)} hold, split: {split}")
+
+    t0 = time.perf_counter()
+    with span("simulate", sims=args.n, jobs=args.jobs):
+        table = simulate(st, fmt, args.n, args.seed, args.jobs)
+    dt = time.perf_counter() - t0
+    cols = [c for c in ("team", "points", "gd", "exp_points", "exp_pos", "p_title", "p_top6", "p_playoff",
+                        "p_relegation") if c in table]
+    print(table[cols].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"\n⏱️ {args.n:,} sæsoner på {dt:.2f}s ({args.n / dt:,.0f}/s)")
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    table.to_parquet(args.out, index=False)
+    print("Gemte:", args.out)
+    print("🧭 Trace:", tr.save())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Hive-partitioneret fixture-store (league_id=/season=) via pyarrow.dataset.
+
+Skrivning erstatter kun de partitioner der skrives til; læsning skubber filtre på
+liga/sæson/status/dato ned i parquet (partition pruning + row-group statistik)
+og læser kun de kolonner der bedes om.
+
+    from store import read_fixtures
+    df = read_fixtures(["date", "home", "away"], seasons=[2023], status="FT")
+"""
+from __future__ import annotations
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+ROOT = Path(__file__).resolve().parents[1]
+STORE_DIR = ROOT / "data" / "fixtures"
+ROWS_PER_GROUP = 64 * 1024
+SORT_KEYS = [("date", "ascending"), ("fixture_id", "ascending")]
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("league_id", pa.int32()), ("season", pa.int32())]), flavor="hive"
+)
+
+# fast skema – samme typer uanset hvilken sæson/liga der skrives
+FIXTURE_SCHEMA = pa.schema([
+    ("fixture_id", pa.int64()),
+    ("date", pa.timestamp("ms", tz="UTC")),
+    ("status", pa.string()),
+    ("venue", pa.string()),
+    ("league_id", pa.int32()),
+    ("league", pa.string()),
+    ("season", pa.int32()),
+    ("round", pa.string()),
+    ("home_id", pa.int64()),
+    ("home", pa.string()),
+    ("away_id", pa.int64()),
+    ("away", pa.string()),
+    ("home_goals", pa.int16()),
+    ("away_goals", pa.int16()),
+    ("fulltime_home", pa.int16()),
+    ("fulltime_away", pa.int16()),
+])
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """pandas (fra normalize_fixtures) → Arrow-tabel i FIXTURE_SCHEMA, sorteret på dato."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"], utc=True)
+    df = df.sort_values(["date", "fixture_id"], kind="stable")
+    return pa.Table.from_pandas(df[FIXTURE_SCHEMA.names], schema=FIXTURE_SCHEMA, preserve_index=False, safe=False)
+
+
+def _sorted_batches(reader: pa.RecordBatchReader):
+    """Sorteret strøm fra en næsten-sorteret strøm (API-sider kommer i kronologisk orden).
+
+    Rækker fra de hidtidige batches holdes tilbage, indtil næste batch viser at intet
+    tidligere kan komme; kun overlappet mellem nabobatches ligger i hukommelsen.
+    """
+    pending = None
+    for batch in reader:
+        if not batch.num_rows:
+            continue
+        nxt = pa.Table.from_batches([batch])
+        if pending is not None:
+            n = pc.sum(pc.less(pending.column("date"), pc.min(batch.column("date")))).as_py() or 0
+            yield from pending.slice(0, n).to_batches()   # alt før næste batch er endeligt
+            nxt = pa.concat_tables([pending.slice(n), nxt])
+        pending = nxt.sort_by(SORT_KEYS)
+    if pending is not None:
+        yield from pending.to_batches()
+
+
+def write_fixtures(data, store_dir: Path = STORE_DIR) -> None:
+    """Skriv fixtures (DataFrame, Arrow-tabel eller RecordBatchReader); berørte league/season-partitioner overskrives.
+
+    Rækkerne sorteres på (date, fixture_id) før skrivning, så partitioner og row groups
+    er dato-sorterede (snævre min/max-statistikker til datofiltre). En RecordBatchReader
+    materialiseres ikke, men flettes løbende (se _sorted_batches).
+    """
+    if isinstance(data, pa.RecordBatchReader):
+        table = pa.RecordBatchReader.from_batches(data.schema, _sorted_batches(data))
+    elif isinstance(data, pd.DataFrame):
+        table = to_table(data)
+    else:
+        table = data.sort_by(SORT_KEYS)
+    ds.write_dataset(
+        table,
+        store_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=ROWS_PER_GROUP,
+        min_rows_per_group=0,
+        preserve_order=True,
+    )
+
+
+def fixtures_dataset(store_dir: Path = STORE_DIR) -> ds.Dataset:
+    if not Path(store_dir).exists():
+        raise FileNotFoundError(f"Fixture-store findes ikke: {store_dir} – kør ingest.py først")
+    return ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING, schema=FIXTURE_SCHEMA)
+
+
+def partition_exists(league_id: int, season: int, store_dir: Path = STORE_DIR) -> bool:
+    return (Path(store_dir) / f"league_id={league_id}" / f"season={season}").is_dir()
+
+
+def _utc(x) -> pd.Timestamp:
+    ts = pd.Timestamp(x)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def build_filter(league_id=None, seasons=None, status=None, date_from=None, date_to=None):
+    """Byg et pyarrow-udtryk; None betyder 'intet filter' for det felt."""
+    conds = []
+    if league_id is not None:
+        ids = [league_id] if isinstance(league_id, int) else list(league_id)
+        conds.append(ds.field("league_id").isin(ids))
+    if seasons is not None:
+        seasons = [seasons] if isinstance(seasons, int) else list(seasons)
+        conds.append(ds.field("season").isin(seasons))
+    if status is not None:
+        status = [status] if isinstance(status, str) else list(status)
+        conds.append(ds.field("status").isin(status))
+    if date_from is not None:
+        conds.append(ds.field("date") >= _utc(date_from))
+    if date_to is not None:
+        conds.append(ds.field("date") < _utc(date_to))
+    if not conds:
+        return None
+    expr = conds[0]
+    for c in conds[1:]:
+        expr = expr & c
+    return expr
+
+
+def read_table(columns=None, *, league_id=None, seasons=None, status=None,
+               date_from=None, date_to=None, store_dir: Path = STORE_DIR) -> pa.Table:
+    filt = build_filter(league_id, seasons, status, date_from, date_to)
+    return fixtures_dataset(store_dir).to_table(columns=columns, filter=filt)
+
+
+def read_fixtures(columns=None, *, league_id=None, seasons=None, status=None,
+                  date_from=None, date_to=None, store_dir: Path = STORE_DIR) -> pd.DataFrame:
+    """Læs et udsnit af fixture-store som DataFrame (sorteret på dato)."""
+    tbl = read_table(columns, league_id=league_id, seasons=seasons, status=status,
+                     date_from=date_from, date_to=date_to, store_dir=store_dir)
+    df = tbl.to_pandas()
+    if "date" in df.columns:
+        df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    return df
@@ -0,0 +1,31 @@
+# src/test_backtest.py
+# Tjekker walk-forward: en runde scores kun med kampe fra før rundens start, og varm start
+# giver (næsten) samme sandsynligheder som fuld refit. Kør: python src/test_backtest.py (eller pytest)
+import numpy as np
+from bench_features import synthetic_fixtures
+from backtest import backtest
+from train import BASELINE
+
+def test_no_lookahead():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=3, n_teams=8, seed=6)
+    a = backtest(df, [BASELINE], eval_from=2001, min_train=50, cache_dir=None)[BASELINE.name]["p"]
+    cut = df["date"] >= df.loc[df["season"] == 2002, "date"].min()
+    df2 = df.copy()
+    df2.loc[cut, "home_goals"] += 3                            # fremtiden ændres ...
+    b = backtest(df2, [BASELINE], eval_from=2001, min_train=50, cache_dir=None)[BASELINE.name]["p"]
+    early = ~cut.to_numpy() & ~np.isnan(a)
+    assert early.sum() > 0 and np.array_equal(a[early], b[early])   # ... men fortidens forudsigelser er uændrede
+
+def test_warm_start_matches_cold_refit():
+    df = synthetic_fixtures(n_leagues=2, n_seasons=3, n_teams=8, seed=7)
+    warm = backtest(df, [BASELINE], eval_from=2001, min_train=50, cache_dir=None)[BASELINE.name]
+    cold = backtest(df, [BASELINE], eval_from=2001, min_train=50, warm=False, cache_dir=None)[BASELINE.name]
+    assert np.allclose(warm["p"], cold["p"], atol=5e-3, equal_nan=True)
+    assert warm["log"]["n_iter"].sum() < cold["log"]["n_iter"].sum()
+    every3 = backtest(df, [BASELINE], eval_from=2001, min_train=50, refit_every=3, cache_dir=None)[BASELINE.name]
+    assert every3["log"]["refit"].sum() < warm["log"]["refit"].sum()
+
+if __name__ == "__main__":
+    test_no_lookahead()
+    test_warm_start_matches_cold_refit()
+    print("✅ walk-forward uden lookahead, varm start ≈ fuld refit")
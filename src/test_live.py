@@ -0,0 +1,56 @@
+# src/test_live.py
+# Tjekker live-daemonens planlægning (kun kampe tæt på kickoff/i gang polles) og diff'en
+# mod tabellen i hukommelsen – uden netværk. Kør: python src/test_live.py (eller pytest)
+import copy, json
+import pandas as pd
+from mockapi import MockConfig, SyntheticData
+from live import MAX_N, PRE_WINDOW, LiveDaemon, Scheduler, SeasonTable, poll_interval
+
+def season_items():
+    return SyntheticData(MockConfig()).fixtures(119, 2025)
+
+def test_only_near_kickoff_is_polled():
+    items = season_items()
+    table = SeasonTable(SeasonTable.normalize(items))
+    first_ns = table.df.loc[table.df["status"] == "NS", "date"].min().timestamp()
+
+    sched = Scheduler()
+    sched.resync_at = first_ns + 86400
+    ready, delay = sched.plan(table.df, first_ns - 2 * PRE_WINDOW)
+    assert ready == [] and delay == PRE_WINDOW                  # tomgang til kickoff-vinduet
+
+    ready, _ = sched.plan(table.df, first_ns - 600)
+    kicks = table.df.set_index("fixture_id")["date"]
+    assert ready and all(kicks[f].timestamp() == first_ns for f in ready)
+    assert poll_interval("1H", first_ns, first_ns + 600) < poll_interval("HT", first_ns, first_ns + 2700)
+    assert poll_interval("FT", first_ns, first_ns + 7200) is None
+
+def test_apply_returns_only_changes():
+    items = season_items()
+    table = SeasonTable(SeasonTable.normalize(items))
+    assert table.apply(copy.deepcopy(items)).empty               # samme data → ingen ændringer
+
+    i = next(k for k, it in enumerate(items) if it["fixture"]["status"]["short"] == "NS")
+    it = copy.deepcopy(items[i])
+    it["fixture"]["status"] = {"long": "First Half", "short": "1H", "elapsed": 23}
+    it["goals"] = {"home": 1, "away": 0}
+    changed = table.apply([it])
+    assert changed["fixture_id"].tolist() == [it["fixture"]["id"]]
+    live = table.live()
+    assert live[0]["elapsed"] == 23 and live[0]["home_goals"] == 1
+    assert len(table.df) == len(items) and table.df["date"].is_monotonic_increasing
+
+    it["fixture"]["status"]["elapsed"] = 31                     # kun minuttet flytter sig
+    assert table.apply([copy.deepcopy(it)]).empty
+    assert json.loads(table.payloads["live"])[0]["elapsed"] == 31
+
+    daemon = LiveDaemon()
+    daemon.table = table
+    assert daemon.route("/next10", {"n": ["abc"]})[0] == 400
+    assert daemon.route("/next10", {"n": ["-5"]}) == (200, b"[]")
+    assert len(json.loads(daemon.route("/last10", {"n": ["10000000"]})[1])) <= MAX_N
+
+if __name__ == "__main__":
+    test_only_near_kickoff_is_polled()
+    test_apply_returns_only_changes()
+    print("✅ live-planlægning og diff virker")
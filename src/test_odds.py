@@ -0,0 +1,52 @@
+# src/test_odds.py
+# Tjekker odds-snapshots: gentaget ingestion er append-only uden dubletter, og as-of indekset
+# giver samme svar som pd.merge_asof(by="fixture_id"). Kør: python src/test_odds.py (eller pytest)
+import numpy as np
+import pandas as pd
+from mockapi import MockConfig, MockState
+from odds import (AsOfIndex, ODDS_KEY, append_snapshots, flatten_odds, flatten_predictions, market_consensus,
+                  read_snapshots)
+
+def mock_odds(hour: int):
+    st = MockState(MockConfig(), {})
+    return [st._odds_item(fx, hour) for fx in st.data.fixtures(119, 2025)[:40]]
+
+def test_append_only_without_duplicates(tmp_path):
+    now = pd.Timestamp("2025-08-01", tz="UTC")
+    assert append_snapshots(flatten_odds(mock_odds(1), now), tmp_path, ODDS_KEY) == 120   # 40 kampe × 3 bookmakere
+    assert append_snapshots(flatten_odds(mock_odds(1), now), tmp_path, ODDS_KEY) == 0     # samme snapshot igen
+    assert append_snapshots(flatten_odds(mock_odds(2), now), tmp_path, ODDS_KEY) > 0      # nye kurser
+    df = read_snapshots(tmp_path).to_pandas()
+    assert not df.duplicated(ODDS_KEY).any()
+    assert len(list(tmp_path.rglob("*.parquet"))) == 2
+
+def test_asof_matches_merge_asof():
+    now = pd.Timestamp("2025-08-01", tz="UTC")
+    cons = pd.concat([market_consensus(flatten_odds(mock_odds(h), now)) for h in range(5)])
+    cons = cons.drop_duplicates(["fixture_id", "ts"]).astype({"ts": "datetime64[ms, UTC]"})
+    idx = AsOfIndex.from_frame(cons)
+    rng = np.random.default_rng(0)
+    q = pd.DataFrame({"fixture_id": rng.choice(np.r_[cons["fixture_id"].unique(), [1]], 2000),
+                      "when": cons["ts"].min() + pd.to_timedelta(rng.integers(-24, 24 * 120, 2000), unit="h")})
+    got = idx.asof(q["fixture_id"], q["when"])
+    ref = pd.merge_asof(q.reset_index().sort_values("when"), cons.sort_values("ts"), left_on="when",
+                        right_on="ts", by="fixture_id").sort_values("index")
+    assert got["p_home"].notna().sum() > 0
+    assert np.allclose(got["p_home"].to_numpy(), ref["p_home"].to_numpy(), equal_nan=True)
+
+def test_prediction_percentages():
+    st = MockState(MockConfig(), {})
+    fx = st.data.fixtures(119, 2025)[0]
+    t = flatten_predictions({fx["fixture"]["id"]: [st._prediction(fx)]}, 119, 2025, pd.Timestamp.now(tz="UTC"))
+    row = t.to_pylist()[0]
+    assert abs(row["api_home"] + row["api_draw"] + row["api_away"] - 1) < 0.11   # hele 5 % pr. udfald
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_append_only_without_duplicates(Path(tmp))
+    test_asof_matches_merge_asof()
+    test_prediction_percentages()
+    print("✅ odds-snapshots append-only og as-of join = merge_asof")
@@ -0,0 +1,40 @@
+# src/test_online_features.py
+# Tjekker at den inkrementelle FeatureStore giver præcis samme pre-match features
+# som batch-beregningen i features.py. Kør: python src/test_online_features.py (eller pytest)
+import time
+import numpy as np
+from bench_features import synthetic_fixtures
+from features import rolling_features
+from online import FeatureStore
+
+WINDOWS = (3, 5, 10)
+EWM_SPANS = (5,)
+
+def test_online_matches_batch():
+    df = synthetic_fixtures(n_leagues=3, n_seasons=3, n_teams=8, seed=1)
+    batch = rolling_features(df, windows=WINDOWS, ewm_spans=EWM_SPANS, shift=True)
+
+    fs = FeatureStore(WINDOWS, EWM_SPANS)
+    online = np.empty((len(df), len(fs.names)))
+    for i, (h, a, hg, ag) in enumerate(zip(df["home"], df["away"], df["home_goals"], df["away_goals"])):
+        online[i] = list(fs.prematch(h, a).values())   # før kampen ...
+        fs.update(h, a, hg, ag)                         # ... og så resultatet
+
+    ref = batch[fs.names].to_numpy()
+    assert np.array_equal(np.isnan(online), np.isnan(ref))
+    assert np.allclose(online, ref, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+def test_prematch_is_fast():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=2, n_teams=12)
+    fs = FeatureStore.from_history(df, WINDOWS, EWM_SPANS)
+    n = 10_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fs.prematch("L0T1", "L0T2")
+    per_call = (time.perf_counter() - t0) / n
+    assert per_call < 1e-3, f"{per_call*1e6:.0f} µs pr. opslag"
+
+if __name__ == "__main__":
+    test_online_matches_batch()
+    test_prematch_is_fast()
+    print("✅ online feature-state matcher batch-beregningen")
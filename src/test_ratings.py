@@ -0,0 +1,70 @@
+# src/test_ratings.py
+# Tjekker at inkrementelle rating-opdateringer (ny runde, forsinket resultat) giver præcis
+# samme pre-match værdier som én samlet kørsel. Kør: python src/test_ratings.py (eller pytest)
+import numpy as np
+from bench_features import synthetic_fixtures
+from ratings import RatingEngine, RatingParams
+
+def test_incremental_matches_batch():
+    df = synthetic_fixtures(n_leagues=2, n_seasons=2, n_teams=8, seed=2)
+    full = RatingEngine().update(df)
+
+    eng = RatingEngine()
+    for _, day in df.groupby(df["date"].dt.date, sort=True):   # én spilledag ad gangen
+        eng.update(day)
+    assert np.allclose(eng.update(df).to_numpy(), full.to_numpy(), rtol=1e-12, atol=1e-12)
+
+def test_late_result_replays():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=2, n_teams=8, seed=3)
+    full = RatingEngine().update(df)
+    late = df.index[40:44]
+
+    eng = RatingEngine()
+    eng.update(df.drop(late))
+    eng.update(df.loc[late])                                   # spoler tilbage og afspiller igen
+    assert np.allclose(eng.update(df).to_numpy(), full.to_numpy(), rtol=1e-12, atol=1e-12)
+
+def test_corrected_result_replays():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=2, n_teams=8, seed=7)
+    eng = RatingEngine()
+    before = eng.update(df)
+    fixed = df.copy()
+    row = fixed.index[60]
+    fixed.loc[row, ["home_goals", "away_goals"]] = fixed.loc[row, ["away_goals", "home_goals"]].to_numpy() + [4, 0]
+    after = eng.update(fixed)                                  # kendt fixture_id med rettet score
+    later = (fixed["date"] > fixed.loc[row, "date"]).to_numpy()
+    assert not np.allclose(after.to_numpy()[later], before.to_numpy()[later])
+    assert np.allclose(after.to_numpy(), RatingEngine().update(fixed).to_numpy(), rtol=1e-12, atol=1e-12)
+
+def test_no_leakage_within_matchday():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=1, n_teams=8, seed=4)
+    a = RatingEngine().update(df)
+    df2 = df.copy()
+    last_day = df2["date"] == df2["date"].max()
+    df2.loc[last_day, "home_goals"] += 5                       # dagens resultater må ikke påvirke dagens features
+    b = RatingEngine().update(df2)
+    assert np.array_equal(a.to_numpy(), b.to_numpy())
+
+def test_warm_start_saves_iterations():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=3, n_teams=10, seed=5)
+    warm, cold = RatingEngine(), RatingEngine(RatingParams(dc_warm=False))
+    warm.update(df)
+    cold.update(df)
+    assert warm.dc_iters < cold.dc_iters
+
+def test_snapshots_bounded():
+    df = synthetic_fixtures(n_leagues=1, n_seasons=4, n_teams=8, seed=6)
+    eng = RatingEngine()
+    eng.update(df)
+    (lr,) = eng.leagues.values()
+    assert {s[8] for s in lr.snapshots} == {df["season"].max() - 1, df["season"].max()}   # kun de to seneste sæsoner
+    assert len(lr.snapshots) < lr.matchdays
+
+if __name__ == "__main__":
+    test_incremental_matches_batch()
+    test_late_result_replays()
+    test_corrected_result_replays()
+    test_no_leakage_within_matchday()
+    test_warm_start_saves_iterations()
+    test_snapshots_bounded()
+    print("✅ inkrementelle ratings matcher batch-beregningen")
@@ -1,18 +1,11 @@
 # src/test_season.py
-from dotenv import load_dotenv
-import os, httpx, sys
-
-load_dotenv()
-KEY = os.getenv("APIFOOTBALL_KEY")
-BASE = "https://v3.football.api-sports.io"
-HDRS = {"x-apisports-key": KEY, "Accept": "application/json"}
+import os, sys
+from api import get_client
 
 SEASON = int(os.getenv("APIFOOTBALL_SEASON", "2025"))  # 2024 = sæson 2024/25
 LID = 119  # Superliga-ID (fundet tidligere)
 
-r = httpx.get(f"{BASE}/fixtures", params={"league": LID, "season": SEASON}, headers=HDRS, timeout=30)
-r.raise_for_status()
-js = r.json()
+js = get_client().get("/fixtures", {"league": LID, "season": SEASON})
 errs = js.get("errors")
 n = len(js.get("response", []))
 
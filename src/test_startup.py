@@ -0,0 +1,35 @@
+# src/test_startup.py
+# Vagt for kold start: hurtige CLI-kommandoer må ikke trække pandas/numpy/sklearn ind ved import,
+# og import må ikke have sideeffekter (mapper, sys.exit uden nøgle). Kør: python src/test_startup.py (eller pytest)
+import os, subprocess, sys
+from bench_startup import GUARDS, ROOT, SRC, import_profile
+
+def test_no_heavy_imports():
+    for module, (forbidden, _) in GUARDS.items():
+        _, names = import_profile(module)
+        assert not names & forbidden, f"{module} importerer {sorted(names & forbidden)}"
+
+def data_snapshot() -> dict:
+    """Alle stier under ROOT/data med (størrelse, mtime) – modulerne skriver dér, ikke i cwd."""
+    data = ROOT / "data"
+    return {p: (p.stat().st_size, p.stat().st_mtime_ns) for p in data.rglob("*")} if data.exists() else {}
+
+def test_import_has_no_side_effects(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "APIFOOTBALL_KEY"}
+    env["PYTHONPATH"] = str(SRC)
+    code = "import cli, diagnose, ingest, last10games, live, predict, odds, backtest"
+    before, existed = data_snapshot(), (ROOT / "data").exists()
+    r = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert r.returncode == 0, r.stdout + r.stderr
+    assert not any(tmp_path.iterdir())                      # intet oprettet i cwd
+    assert (ROOT / "data").exists() == existed              # fx ingen data/cache/http_cache.sqlite ved import
+    assert data_snapshot() == before
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_no_heavy_imports()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_import_has_no_side_effects(Path(tmp))
+    print("✅ kold start uden tunge imports og sideeffekter")
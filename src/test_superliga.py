@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 import httpx
 import sys
 from pprint import pprint
+from api import get_client, DEFAULT_BASE
 
 load_dotenv()
 API_KEY = os.getenv("APIFOOTBALL_KEY")
@@ -10,25 +11,11 @@ if not API_KEY:
     print("⚠️  APIFOOTBALL_KEY mangler i .env")
     sys.exit(1)
 
-# Vælg base: direkte API-Football (typisk) eller RapidAPI fallback
-BASE_URL = os.getenv("APIFOOTBALL_BASE", "https://v3.football.api-sports.io")
-USE_RAPIDAPI = "rapidapi" in BASE_URL
-
-if USE_RAPIDAPI:
-    headers = {
-        "X-RapidAPI-Key": API_KEY,
-        "X-RapidAPI-Host": "v3.football.api-sports.io",
-        "Accept": "application/json",
-    }
-else:
-    headers = {
-        "x-apisports-key": API_KEY,
-        "Accept": "application/json",
-    }
+# Base: direkte API-Football (typisk) eller RapidAPI fallback – headers vælges i api.build_headers
+BASE_URL = os.getenv("APIFOOTBALL_BASE", DEFAULT_BASE)
 
 def get(path, params=None):
-    url = f"{BASE_URL}{path}"
-    r = httpx.get(url, params=params, headers=headers, timeout=30)
+    r = get_client().request(path, params)
     try:
         r.raise_for_status()
     except httpx.HTTPStatusError as e:
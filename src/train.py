@@ -0,0 +1,203 @@
+"""Træningsdriver: folds × kandidatmodeller parallelt over en procespool (joblib/loky).
+
+Feature-matricen for alle kandidater bygges én gang (foreningen af vinduessæt),
+dumpes til disk og åbnes som memmap, så workers deler siderne i stedet for at
+få hele matricen pickled. Hver opgave er (kandidat, fold) → out-of-fold sandsynligheder.
+"""
+from __future__ import annotations
+import json, time, pickle, tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import joblib
+from joblib import Parallel, delayed
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import brier_score_loss, log_loss
+from features import rolling_features, feature_names
+from ratings import rating_features, rating_feature_names
+from instrument import span
+
+ROOT = Path(__file__).resolve().parents[1]
+MODELS_DIR = ROOT / "data" / "models"
+REPORTS_DIR = ROOT / "data" / "reports"
+ARTIFACT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Candidate:
+    name: str
+    kind: str                       # "logreg" | "hgb"
+    windows: tuple = (5,)
+    ewm_spans: tuple = ()
+    params: dict = field(default_factory=dict, hash=False)
+    ratings: tuple = ()             # ratings.KINDS: "elo", "dc"
+
+    @property
+    def features(self) -> list[str]:
+        return feature_names(self.windows, self.ewm_spans) + rating_feature_names(self.ratings)
+
+
+BASELINE = Candidate("logreg_C1_w5", "logreg", (5,), (), {"C": 1.0})
+
+WINDOW_SETS = {
+    "w5": ((5,), ()),
+    "w3-5-10": ((3, 5, 10), ()),
+    "w5-ewm5": ((5,), (5,)),
+}
+
+RATING_SETS = {
+    "w5-elo": ((5,), (), ("elo",)),
+    "w5-elo-dc": ((5,), (), ("elo", "dc")),
+}
+
+
+def default_grid(with_hgb: bool = False) -> list[Candidate]:
+    grid = [
+        Candidate(f"logreg_C{c:g}_{ws}", "logreg", w, e, {"C": c})
+        for ws, (w, e) in WINDOW_SETS.items()
+        for c in (0.1, 1.0, 10.0)
+    ]
+    grid += [
+        Candidate(f"logreg_C{c:g}_{rs}", "logreg", w, e, {"C": c}, r)
+        for rs, (w, e, r) in RATING_SETS.items()
+        for c in (0.1, 1.0, 10.0)
+    ]
+    if with_hgb:
+        grid += [
+            Candidate(f"hgb_d{d}_{ws}", "hgb", w, e,
+                      {"max_depth": d, "learning_rate": 0.05, "max_iter": 200})
+            for ws, (w, e) in WINDOW_SETS.items()
+            for d in (2, 3)
+        ]
+        grid += [
+            Candidate(f"hgb_d3_{rs}", "hgb", w, e,
+                      {"max_depth": 3, "learning_rate": 0.05, "max_iter": 200}, r)
+            for rs, (w, e, r) in RATING_SETS.items()
+        ]
+    return grid
+
+
+def make_model(kind: str, params: dict):
+    if kind == "logreg":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(max_iter=1000, **params)
+    if kind == "hgb":
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(**params)
+    raise ValueError(f"Ukendt modeltype: {kind}")
+
+
+def prepare(X: np.ndarray, kind: str) -> np.ndarray:
+    """LogisticRegression tåler ikke NaN (første kamp pr. hold) → 0 som i den oprindelige pipeline."""
+    return np.nan_to_num(X, nan=0.0) if kind == "logreg" else X
+
+
+def build_matrix(df: pd.DataFrame, candidates, tm=None) -> tuple[np.ndarray, list[str]]:
+    """Én feature-matrix med foreningen af alle kandidaters kolonner (tm: færdig TeamMatches, fx fra matchtable)."""
+    windows = sorted({w for c in candidates for w in c.windows})
+    spans = sorted({s for c in candidates for s in c.ewm_spans})
+    kinds = [k for k in ("elo", "dc") if any(k in c.ratings for c in candidates)]
+    with span("features", rows=len(df)) as sp:
+        feats = rolling_features(df, windows=windows, ewm_spans=spans, shift=True, tm=tm)
+        if kinds:   # pre-match ratinger (kun tidligere spilledage tæller med)
+            with span("ratings", kinds=",".join(kinds)):
+                feats = pd.concat([feats, rating_features(df, kinds)], axis=1)
+        X = np.ascontiguousarray(feats.to_numpy(dtype=np.float64))
+        sp.update(columns=X.shape[1], bytes=X.nbytes)
+    return X, list(feats.columns)
+
+
+def _fit_fold(X, y, cols, train_idx, test_idx, kind, params):
+    Xc = prepare(X[:, cols], kind)
+    mdl = make_model(kind, params)
+    mdl.fit(Xc[train_idx], y[train_idx])
+    return mdl.predict_proba(Xc[test_idx])[:, 1]
+
+
+def run_grid(df: pd.DataFrame, y: np.ndarray, candidates, n_splits: int = 5, n_jobs: int = -1, tm=None):
+    """Kør alle (kandidat, fold)-par parallelt; returnér resultattabel + OOF-sandsynligheder."""
+    X, all_cols = build_matrix(df, candidates, tm)
+    col_idx = {c: i for i, c in enumerate(all_cols)}
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    tested = np.concatenate([te for _, te in folds])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "X.joblib"
+        joblib.dump(X, path)
+        Xm = joblib.load(path, mmap_mode="r")       # workers får kun filnavnet
+        tasks = [(ci, fi) for ci in range(len(candidates)) for fi in range(len(folds))]
+        t0 = time.perf_counter()
+        with span("cv_fits", fits=len(tasks), rows=len(y), n_jobs=n_jobs):   # CPU-tid i workers tælles ikke med
+            outs = Parallel(n_jobs=n_jobs, backend="loky")(
+                delayed(_fit_fold)(Xm, y, [col_idx[f] for f in candidates[ci].features],
+                                   folds[fi][0], folds[fi][1], candidates[ci].kind, candidates[ci].params)
+                for ci, fi in tasks
+            )
+        elapsed = time.perf_counter() - t0
+        del Xm
+
+    oof = {c.name: np.full(len(y), np.nan) for c in candidates}
+    for (ci, fi), p in zip(tasks, outs):
+        oof[candidates[ci].name][folds[fi][1]] = p
+
+    rows = []
+    for c in candidates:
+        p = oof[c.name][tested]
+        rows.append({"candidate": c.name, "kind": c.kind,
+                     "brier": brier_score_loss(y[tested], p),
+                     "logloss": log_loss(y[tested], p, labels=[0, 1])})
+    table = pd.DataFrame(rows).sort_values("logloss").reset_index(drop=True)
+    print(f"⏱️ {len(tasks)} fits ({len(candidates)} kandidater × {n_splits} folds) på {elapsed:.1f}s")
+    return table, oof, X, all_cols
+
+
+def fit_final(X: np.ndarray, all_cols: list[str], y: np.ndarray, cand: Candidate):
+    """Refit vinderen på alle data."""
+    cols = [all_cols.index(f) for f in cand.features]
+    mdl = make_model(cand.kind, cand.params)
+    with span("fit_final", candidate=cand.name, rows=len(y)):
+        mdl.fit(prepare(X[:, cols], cand.kind), y)
+    return mdl
+
+
+def save_model(mdl, cand: Candidate, metrics: dict, feature_state=None, rating_state=None,
+               models_dir: Path = MODELS_DIR) -> Path:
+    """Gem versioneret artefakt: model + alt predict.py skal bruge for at bygge features.
+
+    sklearn-modellen lægges som pickle-bytes, så artefaktet kan indlæses uden at
+    importere sklearn; lineære modeller får desuden coef/intercept som rene arrays.
+    """
+    import sklearn
+
+    models_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = models_dir / f"model_{stamp}_{cand.name}.joblib"
+    joblib.dump({
+        "format_version": ARTIFACT_VERSION,
+        "sklearn_version": sklearn.__version__,
+        "model_pickle": pickle.dumps(mdl, protocol=pickle.HIGHEST_PROTOCOL),
+        "linear": ({"coef": mdl.coef_[0].copy(), "intercept": float(mdl.intercept_[0])}
+                   if cand.kind == "logreg" else None),
+        "candidate": cand.name,
+        "kind": cand.kind,
+        "windows": list(cand.windows),
+        "ewm_spans": list(cand.ewm_spans),
+        "ratings": list(cand.ratings),
+        "features": cand.features,
+        "params": cand.params,
+        "nan_fill": 0.0 if cand.kind == "logreg" else None,
+        "metrics": metrics,
+        "trained_at": stamp,
+        "feature_state": feature_state,   # online.FeatureStore efter sidste træningskamp
+        "rating_state": rating_state,     # ratings.RatingEngine efter sidste spilledag (kun med ratings)
+    }, path)
+    return path
+
+
+def save_report(table: pd.DataFrame, reports_dir: Path = REPORTS_DIR) -> Path:
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    path = reports_dir / "cv_grid.json"
+    path.write_text(json.dumps(table.to_dict(orient="records"), indent=2), encoding="utf-8")
+    return path